@@ -0,0 +1,115 @@
+"""
+Exported (TorchScript / ONNX) versions of the ResNeXt+LSTM checkpoints.
+
+`python manage.py export_models` writes the graphs next to each checkpoint
+(models/model_X.pt -> models/model_X.torchscript, models/model_X.onnx) and
+MODEL_ENGINE picks which one the registry serves:
+- both graphs take (batch, frames, 3, 112, 112) with batch and frames dynamic
+- they return (fmap, logits) like Model.forward
+- ONNX graphs run with ONNX Runtime on CPU, no torch model is built
+- a graph older than its checkpoint is ignored (the eager model is used)
+"""
+import inspect
+import os
+
+import torch
+
+EXPORT_SUFFIXES = {'torchscript': '.torchscript', 'onnx': '.onnx'}
+
+
+def exported_model_path(model_path, engine):
+    return os.path.splitext(model_path)[0] + EXPORT_SUFFIXES[engine]
+
+
+def export_model(model, model_path, engines=('torchscript', 'onnx'), sequence_length=20, im_size=112, opset_version=17):
+    """
+    Trace an eval-mode Model and write the requested graphs next to model_path.
+
+    Returns {engine: written path}.
+    """
+    model = model.cpu().eval()
+    example = torch.rand(1, sequence_length, 3, im_size, im_size)
+
+    paths = {}
+    with torch.no_grad():
+        if 'torchscript' in engines:
+            paths['torchscript'] = exported_model_path(model_path, 'torchscript')
+            torch.jit.save(torch.jit.trace(model, example, check_trace=False), paths['torchscript'])
+
+        if 'onnx' in engines:
+            paths['onnx'] = exported_model_path(model_path, 'onnx')
+            kwargs = {}
+            # torch >= 2.5 defaults to the dynamo exporter; the graph is written for the tracing one
+            if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+                kwargs['dynamo'] = False
+            torch.onnx.export(
+                model,
+                (example,),
+                paths['onnx'],
+                input_names=['frames'],
+                output_names=['fmap', 'logits'],
+                dynamic_axes={
+                    'frames': {0: 'batch', 1: 'frames'},
+                    'fmap': {0: 'batch_frames'},
+                    'logits': {0: 'batch'},
+                },
+                opset_version=opset_version,
+                **kwargs
+            )
+    return paths
+
+
+class TorchScriptModel:
+    """Traced Model run by the TorchScript interpreter"""
+
+    def __init__(self, path):
+        self.module = torch.jit.load(path, map_location='cpu')
+        self.module.eval()
+
+    def eval(self):
+        return self
+
+    def __call__(self, x):
+        return self.module(x.cpu())
+
+
+class OnnxModel:
+    """Model graph run by ONNX Runtime's CPU execution provider"""
+
+    def __init__(self, path, num_threads=None):
+        # Optional dependency, only needed for MODEL_ENGINE=onnx
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX graphs need onnxruntime (pip install onnxruntime==1.17.1)") from e
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or torch.get_num_threads()
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+    def eval(self):
+        return self
+
+    def __call__(self, x):
+        fmap, logits = self.session.run(['fmap', 'logits'], {'frames': x.cpu().contiguous().numpy()})
+        return torch.from_numpy(fmap), torch.from_numpy(logits)
+
+
+def load_exported_model(model_path, engine):
+    """The up-to-date exported graph of a checkpoint, None when there isn't one"""
+    path = exported_model_path(model_path, engine)
+    if not os.path.exists(path):
+        print(f"No {engine} graph for {model_path} (run manage.py export_models), using the eager model")
+        return None
+    if os.stat(path).st_mtime_ns < os.stat(model_path).st_mtime_ns:
+        print(f"{path} is older than its checkpoint (re-run manage.py export_models), using the eager model")
+        return None
+
+    try:
+        model = TorchScriptModel(path) if engine == 'torchscript' else OnnxModel(path)
+    except Exception as e:
+        print(f"Could not load {path}: {e}")
+        return None
+
+    print(f"Loaded {engine} graph from: {path}")
+    return model
@@ -0,0 +1,59 @@
+import glob
+import os
+
+import torch
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_app.exported_models import export_model, load_exported_model
+from ml_app.views import build_model, im_size
+
+
+class Command(BaseCommand):
+    help = "Export the checkpoints in models/ to TorchScript and ONNX (used with MODEL_ENGINE)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('checkpoints', nargs='*',
+                            help='Checkpoints to export (default: every models/*.pt)')
+        parser.add_argument('--engines', nargs='+', default=['torchscript', 'onnx'],
+                            choices=['torchscript', 'onnx'])
+        parser.add_argument('--atol', type=float, default=1e-4,
+                            help='Largest logit difference accepted against the eager model')
+
+    def handle(self, *args, **options):
+        checkpoints = options['checkpoints'] or sorted(glob.glob(os.path.join(settings.PROJECT_DIR, 'models', '*.pt')))
+        if not checkpoints:
+            raise CommandError("No checkpoints found in models/")
+
+        failed = []
+        for model_path in checkpoints:
+            # model_<acc>_acc_<sequence length>_frames_... (see get_accurate_model)
+            try:
+                sequence_length = int(os.path.basename(model_path).split("_")[3])
+            except (IndexError, ValueError):
+                sequence_length = 20
+
+            model = build_model().cpu()
+            model.load_state_dict(torch.load(model_path, map_location=torch.device('cpu')))
+            model.eval()
+
+            paths = export_model(model, model_path, tuple(options['engines']), sequence_length, im_size)
+
+            # Graphs must agree with the eager model, also at a sequence length they weren't traced with
+            for engine in paths:
+                exported = load_exported_model(model_path, engine)
+                if exported is None:
+                    failed.append(f"{paths[engine]} (could not be loaded)")
+                    continue
+                for frames in (sequence_length, max(1, sequence_length // 2)):
+                    x = torch.rand(1, frames, 3, im_size, im_size)
+                    with torch.no_grad():
+                        diff = (exported(x)[1] - model(x)[1]).abs().max().item()
+                    if diff > options['atol']:
+                        failed.append(f"{paths[engine]} ({frames} frames, max logit diff {diff:.2e})")
+
+            self.stdout.write(f"Exported {model_path}: {', '.join(paths.values())}")
+
+        if failed:
+            raise CommandError("Exported graphs differ from the eager model: " + "; ".join(failed))
+        self.stdout.write(self.style.SUCCESS(f"Exported {len(checkpoints)} checkpoint(s)"))
@@ -0,0 +1,84 @@
+"""
+Background writer for the preview images of the predict page.
+
+Frames and face crops were saved as full-resolution PNGs inline, before
+inference could start. The writer takes them off the request path:
+- a small thread pool encodes and writes the images while the model runs
+- a bounded queue: submit blocks once max_queued images wait, so decoded
+  frames can't pile up in memory
+- previews are downscaled to max_side and saved as JPEG
+- files are written to a temp name and renamed, so a preview is either
+  complete or absent
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import numpy as np
+from PIL import Image
+
+
+class MediaWriter:
+    """
+    Thread pool writing RGB uint8 images as downscaled JPEG previews
+
+    Args:
+        max_workers: Encoder threads
+        max_queued: Images waiting to be written before submit blocks
+        max_side: Longest preview side in pixels (never upscaled)
+        quality: JPEG quality
+    """
+
+    def __init__(self, max_workers=2, max_queued=16, max_side=480, quality=85):
+        self.max_side = max_side
+        self.quality = quality
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='media')
+        self.slots = threading.BoundedSemaphore(max(1, max_queued))
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def _write(self, image, path):
+        try:
+            preview = Image.fromarray(np.ascontiguousarray(image))
+            if max(preview.size) > self.max_side:
+                preview.thumbnail((self.max_side, self.max_side), Image.BILINEAR)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            preview.save(tmp_path, format='JPEG', quality=self.quality)
+            os.replace(tmp_path, path)
+        finally:
+            self.slots.release()
+
+    def _done(self, path, future):
+        with self.lock:
+            if self.pending.get(path) is future:
+                del self.pending[path]
+        if future.exception() is not None:
+            print(f"Preview write failed for {path}: {future.exception()}")
+
+    def submit(self, image, path):
+        """Queue an image to be written to path (blocks while the queue is full)"""
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(self._write, image, path)
+        except Exception:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.pending[path] = future
+        future.add_done_callback(lambda done: self._done(path, done))
+        return future
+
+    def exists(self, path):
+        """Whether path is on disk or about to be written"""
+        with self.lock:
+            if path in self.pending:
+                return True
+        return os.path.exists(path)
+
+    def flush(self, paths=None, timeout=None):
+        """Wait for queued writes (all, or those of the given paths)"""
+        with self.lock:
+            futures = list(self.pending.values()) if paths is None else [
+                self.pending[path] for path in paths if path in self.pending
+            ]
+        wait(futures, timeout=timeout)
@@ -0,0 +1,138 @@
+"""
+Process-wide model registry.
+
+Each gunicorn worker keeps the checkpoints it has served in memory, keyed by
+sequence length, so a request only pays for inference:
+- models are loaded lazily on first use (or warmed at worker start)
+- least recently used models are evicted when the registry is full or the
+  machine runs low on memory
+- a checkpoint is reloaded when its file changes on disk (mtime)
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import torch
+
+
+def available_memory_mb():
+    """Memory available to new allocations in MB, None if it can't be read"""
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class ModelRegistry:
+    """
+    LRU cache of loaded models keyed by sequence length.
+
+    model_factory builds an empty model (on the right device), resolve_path
+    maps a sequence length to a checkpoint path ("" when there is none).
+    model_loader, when given, replaces the factory + load_state_dict step
+    (e.g. to serve an exported graph of the checkpoint).
+    """
+
+    def __init__(self, model_factory, resolve_path, models_dir, max_models=2, min_free_mb=0, model_loader=None):
+        self.model_factory = model_factory
+        self.model_loader = model_loader
+        self.resolve_path = resolve_path
+        self.models_dir = models_dir
+        self.max_models = max(1, max_models)
+        self.min_free_mb = min_free_mb
+        self._models = OrderedDict()  # sequence_length -> (path, mtime, model)
+        self._paths = {}               # sequence_length -> resolved checkpoint path
+        self._models_dir_mtime = None
+        self._lock = threading.Lock()
+
+    def _checkpoint_path(self, sequence_length):
+        # Re-run the models/ glob only when files were added or removed
+        try:
+            dir_mtime = os.stat(self.models_dir).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+        if dir_mtime != self._models_dir_mtime:
+            self._paths.clear()
+            self._models_dir_mtime = dir_mtime
+
+        if sequence_length not in self._paths:
+            model_path = self.resolve_path(sequence_length)
+            if model_path and not os.path.isabs(model_path):
+                model_path = os.path.join(self.models_dir, model_path)
+            self._paths[sequence_length] = model_path
+        return self._paths[sequence_length]
+
+    def _memory_is_tight(self):
+        if not self.min_free_mb:
+            return False
+        free_mb = available_memory_mb()
+        return free_mb is not None and free_mb < self.min_free_mb
+
+    def _evict(self):
+        while self._models and (len(self._models) >= self.max_models or self._memory_is_tight()):
+            sequence_length, (model_path, _, _) = self._models.popitem(last=False)
+            print(f"Evicting model for sequence length {sequence_length}: {model_path}")
+
+    def _load(self, model_path):
+        if self.model_loader is not None:
+            return self.model_loader(model_path)
+        model = self.model_factory()
+        model.load_state_dict(torch.load(model_path, map_location=torch.device('cpu')))
+        model.eval()
+        return model
+
+    def get(self, sequence_length):
+        """
+        Return (model, checkpoint path) for a sequence length.
+
+        (None, "") when no checkpoint matches.
+        """
+        with self._lock:
+            model_path = self._checkpoint_path(sequence_length)
+            if not model_path:
+                self._models.pop(sequence_length, None)
+                return None, ""
+
+            try:
+                mtime = os.stat(model_path).st_mtime_ns
+            except OSError:
+                # Checkpoint vanished since the last glob
+                self._paths.pop(sequence_length, None)
+                self._models.pop(sequence_length, None)
+                return None, ""
+
+            entry = self._models.get(sequence_length)
+            if entry and entry[0] == model_path and entry[1] == mtime:
+                self._models.move_to_end(sequence_length)
+                return entry[2], model_path
+
+            # Drop the stale copy before loading so both aren't held at once
+            if entry:
+                print(f"Reloading model for sequence length {sequence_length}: {model_path}")
+                del self._models[sequence_length]
+            self._evict()
+
+            print(f"Loading model from: {model_path}")
+            model = self._load(model_path)
+            self._models[sequence_length] = (model_path, mtime, model)
+            return model, model_path
+
+    def warm(self, sequence_lengths):
+        """Load the given sequence lengths up front (e.g. at worker start)"""
+        for sequence_length in sequence_lengths:
+            try:
+                self.get(sequence_length)
+            except Exception as e:
+                print(f"Could not warm model for sequence length {sequence_length}: {e}")
+
+    def loaded(self):
+        """Sequence lengths currently in memory, least recently used first"""
+        with self._lock:
+            return list(self._models)
@@ -22,6 +22,12 @@ from PIL import Image as pImage
 import time
 from django.conf import settings
 from .forms import VideoUploadForm
+from .model_registry import ModelRegistry
+from .exported_models import load_exported_model
+from .result_cache import ResultCache
+from .media_writer import MediaWriter
+from .preprocessing import preprocess_batch, resize_batch
+import hashlib
 
 index_template_name = 'index.html'
 predict_template_name = 'predict.html'
@@ -37,6 +43,7 @@ if torch.cuda.is_available():
 else:
     device = 'cpu'
 
+# Per-image reference of preprocess_batch (the model input pipeline the checkpoints were trained with)
 train_transforms = transforms.Compose([
                                         transforms.ToPILImage(),
                                         transforms.Resize((im_size,im_size)),
@@ -45,9 +52,9 @@ train_transforms = transforms.Compose([
 
 class Model(nn.Module):
 
-    def __init__(self, num_classes,latent_dim= 2048, lstm_layers=1 , hidden_dim = 2048, bidirectional = False):
+    def __init__(self, num_classes,latent_dim= 2048, lstm_layers=1 , hidden_dim = 2048, bidirectional = False, pretrained = True):
         super(Model, self).__init__()
-        model = models.resnext50_32x4d(pretrained = True)
+        model = models.resnext50_32x4d(pretrained = pretrained)
         self.model = nn.Sequential(*list(model.children())[:-2])
         self.lstm = nn.LSTM(latent_dim,hidden_dim, lstm_layers,  bidirectional)
         self.relu = nn.LeakyReLU()
@@ -77,39 +84,49 @@ class validation_dataset(Dataset):
     def __getitem__(self,idx):
         video_path = self.video_names[idx]
         frames = []
-        a = int(100/self.count)
-        first_frame = np.random.randint(0,a)
-        for i,frame in enumerate(self.frame_extract(video_path)):
-            #if(i % a == first_frame):
-            faces = face_recognition.face_locations(frame)
-            try:
-              top,right,bottom,left = faces[0]
-              frame = frame[top:bottom,left:right,:]
-            except:
-              pass
-            frames.append(self.transform(frame))
-            if(len(frames) == self.count):
-                break
-        """
-        for i,frame in enumerate(self.frame_extract(video_path)):
-            if(i % a == first_frame):
-                frames.append(self.transform(frame))
-        """        
-        # if(len(frames)<self.count):
-        #   for i in range(self.count-len(frames)):
-        #         frames.append(self.transform(frame))
-        #print("no of frames", self.count)
-        frames = torch.stack(frames)
+        for frame, rgb_frame, face_location in iter_face_frames(video_path, self.count):
+            if self.transform is None:
+                frames.append(resize_crop(crop_face(frame, face_location), im_size))
+            else:
+                frames.append(self.transform(crop_face(frame, face_location)))
+        if self.transform is None:
+            # One vectorized conversion + normalization for the whole sequence
+            frames = preprocess_batch(np.stack(frames), im_size, mean, std)
+        else:
+            frames = torch.stack(frames)
         frames = frames[:self.count]
         return frames.unsqueeze(0)
-    
-    def frame_extract(self,path):
-      vidObj = cv2.VideoCapture(path) 
-      success = 1
-      while success:
-          success, image = vidObj.read()
-          if success:
-              yield image
+
+def iter_face_frames(path, count):
+    """
+    Decode at most `count` frames and detect the face in each one once.
+
+    Yields (BGR frame, RGB frame, face location or None); nothing beyond the
+    frames actually needed is decoded or kept in memory.
+    """
+    vidObj = cv2.VideoCapture(path)
+    try:
+        for _ in range(count):
+            success, frame = vidObj.read()
+            if not success:
+                break
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            faces = face_recognition.face_locations(rgb_frame)
+            yield frame, rgb_frame, (faces[0] if faces else None)
+    finally:
+        vidObj.release()
+
+def crop_face(frame, face_location, padding=0):
+    """Crop a (top, right, bottom, left) face location, whole frame if there is none"""
+    if face_location is None:
+        return frame
+    top, right, bottom, left = face_location
+    return frame[max(0, top - padding):bottom + padding, max(0, left - padding):right + padding]
+
+def resize_crop(image, size):
+    """A (size, size, 3) uint8 copy of one crop, so the decoded frame can be freed"""
+    crop = torch.from_numpy(np.ascontiguousarray(image)).permute(2, 0, 1).unsqueeze(0)
+    return resize_batch(crop, size)[0].permute(1, 2, 0).numpy().copy()
 
 def im_convert(tensor, video_file_name):
     """ Display a tensor as an image. """
@@ -136,8 +153,6 @@ def im_plot(tensor):
 def predict(model,img,path = './', video_file_name=""):
   fmap,logits = model(img.to(device))
   img = im_convert(img[:,-1,:,:,:], video_file_name)
-  params = list(model.parameters())
-  weight_softmax = model.linear1.weight.detach().cpu().numpy()
   logits = sm(logits)
   _,prediction = torch.max(logits,1)
   confidence = logits[:,int(prediction.item())].item()*100
@@ -204,6 +219,63 @@ def get_accurate_model(sequence_length):
 
     return final_model
 
+def build_model():
+    # ImageNet weights are overwritten by the checkpoint, so don't download them
+    model = Model(2, pretrained=False)
+    if(device == "gpu"):
+        return model.cuda()
+    return model.cpu()
+
+def load_model(model_path):
+    """Checkpoint -> model, served by the MODEL_ENGINE graph when an up-to-date export exists"""
+    if settings.MODEL_ENGINE != 'eager':
+        model = load_exported_model(model_path, settings.MODEL_ENGINE)
+        if model is not None:
+            return model
+    model = build_model()
+    model.load_state_dict(torch.load(model_path, map_location=torch.device('cpu')))
+    model.eval()
+    return model
+
+# One registry per worker process: checkpoints are loaded once and reused across requests
+model_registry = ModelRegistry(
+    build_model,
+    get_accurate_model,
+    os.path.join(settings.PROJECT_DIR, 'models'),
+    max_models=settings.MODEL_REGISTRY_MAX_MODELS,
+    min_free_mb=settings.MODEL_REGISTRY_MIN_FREE_MB,
+    model_loader=load_model,
+)
+
+# Results of videos already analyzed, shared by all workers
+result_cache = ResultCache(
+    settings.RESULT_CACHE_DIR,
+    max_bytes=settings.RESULT_CACHE_MAX_MB * 1024 * 1024,
+    ttl=settings.RESULT_CACHE_TTL,
+) if settings.RESULT_CACHE_MAX_MB > 0 else None
+
+# Preview images are written in the background while the model runs
+media_writer = MediaWriter(
+    max_workers=settings.MEDIA_WRITER_THREADS,
+    max_queued=settings.MEDIA_WRITER_QUEUE,
+    max_side=settings.PREVIEW_MAX_SIDE,
+    quality=settings.PREVIEW_QUALITY,
+)
+
+def save_upload(video_file, path):
+    """Write an uploaded file to path and return its SHA-256 (hashed while writing)"""
+    digest = hashlib.sha256()
+    with open(path, 'wb') as vFile:
+        for chunk in video_file.chunks():
+            digest.update(chunk)
+            vFile.write(chunk)
+    return digest.hexdigest()
+
+def result_cache_key(file_hash, model_path, sequence_length):
+    # The engine plus the checkpoint's name and mtime stand in for the model version
+    model_version = f"{settings.MODEL_ENGINE}:{os.path.basename(model_path)}:{os.stat(model_path).st_mtime_ns}"
+    return ResultCache.make_key(file_hash, model_version, sequence_length=sequence_length)
+
 ALLOWED_VIDEO_EXTENSIONS = set(['mp4','gif','webm','avi','3gp','wmv','flv','mkv'])
 
 def allowed_video_file(filename):
@@ -244,13 +316,11 @@ def index(request):
             
             saved_video_file = 'uploaded_file_'+str(int(time.time()))+"."+video_file_ext
             if settings.DEBUG:
-                with open(os.path.join(settings.PROJECT_DIR, 'uploaded_videos', saved_video_file), 'wb') as vFile:
-                    shutil.copyfileobj(video_file, vFile)
-                request.session['file_name'] = os.path.join(settings.PROJECT_DIR, 'uploaded_videos', saved_video_file)
+                saved_video_path = os.path.join(settings.PROJECT_DIR, 'uploaded_videos', saved_video_file)
             else:
-                with open(os.path.join(settings.PROJECT_DIR, 'uploaded_videos','app','uploaded_videos', saved_video_file), 'wb') as vFile:
-                    shutil.copyfileobj(video_file, vFile)
-                request.session['file_name'] = os.path.join(settings.PROJECT_DIR, 'uploaded_videos','app','uploaded_videos', saved_video_file)
+                saved_video_path = os.path.join(settings.PROJECT_DIR, 'uploaded_videos','app','uploaded_videos', saved_video_file)
+            request.session['file_hash'] = save_upload(video_file, saved_video_path)
+            request.session['file_name'] = saved_video_path
             request.session['sequence_length'] = sequence_length
             return redirect('ml_app:predict')
         else:
@@ -265,7 +335,6 @@ def predict_page(request):
             video_file = request.session['file_name']
         if 'sequence_length' in request.session:
             sequence_length = request.session['sequence_length']
-        path_to_videos = [video_file]
         video_file_name = os.path.basename(video_file)
         video_file_name_only = os.path.splitext(video_file_name)[0]
         # Production environment adjustments
@@ -275,20 +344,11 @@ def predict_page(request):
         else:
             production_video_name = video_file_name
 
-        # Load validation dataset
-        video_dataset = validation_dataset(path_to_videos, sequence_length=sequence_length, transform=train_transforms)
-
-        # Load model
-        if(device == "gpu"):
-            model = Model(2).cuda()  # Adjust the model instantiation according to your model structure
-        else:
-            model = Model(2).cpu()  # Adjust the model instantiation according to your model structure
-
-        # get_accurate_model may return either a filename or an absolute path; handle both.
-        model_path = get_accurate_model(sequence_length)
+        # Load model (cached per worker, reloaded if the checkpoint changes)
+        model, model_path = model_registry.get(sequence_length)
 
-        # If no model was found, get_accurate_model returns an empty string. Handle that case gracefully.
-        if not model_path:
+        # If no model was found, the registry returns an empty path. Handle that case gracefully.
+        if model is None:
             print(f"No model available for sequence length {sequence_length}. Searched in {os.path.join(settings.PROJECT_DIR, 'models')}")
             # Render the predict page with a helpful message (no models found)
             context = {
@@ -303,64 +363,54 @@ def predict_page(request):
             }
             return render(request, predict_template_name, context)
 
-        # If get_accurate_model returned a basename, build an absolute path
-        if not os.path.isabs(model_path):
-            model_path = os.path.join(settings.PROJECT_DIR, 'models', model_path)
+        # Same video, checkpoint and sequence length seen before: reuse the result
+        # (as long as its preview images are still on disk or being written)
+        cache_key = None
+        if result_cache is not None and 'file_hash' in request.session:
+            cache_key = result_cache_key(request.session['file_hash'], model_path, sequence_length)
+            cached = result_cache.get(cache_key)
+            if cached is not None and all(
+                media_writer.exists(os.path.join(settings.PROJECT_DIR, 'uploaded_images', image_name))
+                for image_name in cached['preprocessed_images'] + cached['faces_cropped_images']
+            ):
+                print("<=== | Result served from cache | ===>")
+                cached['original_video'] = production_video_name
+                cached['models_location'] = os.path.join(settings.PROJECT_DIR, 'models')
+                return render(request, predict_template_name, cached)
 
-        print(f"Loading model from: {model_path}")
-        model.load_state_dict(torch.load(model_path, map_location=torch.device('cpu')))
-        model.eval()
         start_time = time.time()
         # Display preprocessing images
         print("<=== | Started Videos Splitting | ===>")
         preprocessed_images = []
         faces_cropped_images = []
-        cap = cv2.VideoCapture(video_file)
-        frames = []
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if ret:
-                frames.append(frame)
-            else:
-                break
-        cap.release()
-
-        print(f"Number of frames: {len(frames)}")
-        # Process each frame for preprocessing and face cropping
+        # One streaming pass: decode only sequence_length frames and detect faces once per frame.
+        # The same detections feed the preview images and the model input.
         padding = 40
         faces_found = 0
-        for i in range(sequence_length):
-            if i >= len(frames):
-                break
-            frame = frames[i]
-
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Save preprocessed image
-            image_name = f"{video_file_name_only}_preprocessed_{i+1}.png"
+        sequence = []
+        for i, (frame, rgb_frame, face_location) in enumerate(iter_face_frames(video_file, sequence_length)):
+            # Queue the preview image (written by media_writer while the model runs)
+            image_name = f"{video_file_name_only}_preprocessed_{i+1}.jpg"
             image_path = os.path.join(settings.PROJECT_DIR, 'uploaded_images', image_name)
-            img_rgb = pImage.fromarray(rgb_frame, 'RGB')
-            img_rgb.save(image_path)
+            media_writer.submit(rgb_frame, image_path)
             preprocessed_images.append(image_name)
 
-            # Face detection and cropping
-            face_locations = face_recognition.face_locations(rgb_frame)
-            if len(face_locations) == 0:
-                continue
+            # Model input: unpadded face crop (whole frame when no face was found),
+            # resized now so the frame can be freed; normalized with the others below
+            sequence.append(resize_crop(crop_face(frame, face_location), im_size))
 
-            top, right, bottom, left = face_locations[0]
-            frame_face = frame[top - padding:bottom + padding, left - padding:right + padding]
+            if face_location is None:
+                continue
 
-            # Convert cropped face image to RGB and save
-            rgb_face = cv2.cvtColor(frame_face, cv2.COLOR_BGR2RGB)
-            img_face_rgb = pImage.fromarray(rgb_face, 'RGB')
-            image_name = f"{video_file_name_only}_cropped_faces_{i+1}.png"
+            # Queue the padded RGB face crop
+            rgb_face = crop_face(rgb_frame, face_location, padding)
+            image_name = f"{video_file_name_only}_cropped_faces_{i+1}.jpg"
             image_path = os.path.join(settings.PROJECT_DIR, 'uploaded_images', image_name)
-            img_face_rgb.save(image_path)
+            media_writer.submit(rgb_face, image_path)
             faces_found += 1
             faces_cropped_images.append(image_name)
 
+        print(f"Number of frames: {len(sequence)}")
         print("<=== | Videos Splitting and Face Cropping Done | ===>")
         print("--- %s seconds ---" % (time.time() - start_time))
 
@@ -374,18 +424,20 @@ def predict_page(request):
             output = ""
             confidence = 0.0
 
-            for i in range(len(path_to_videos)):
-                print("<=== | Started Prediction | ===>")
-                prediction = predict(model, video_dataset[i], './', video_file_name_only)
-                confidence = round(prediction[1], 1)
-                output = "REAL" if prediction[0] == 1 else "FAKE"
-                print("Prediction:", prediction[0], "==", output, "Confidence:", confidence)
-                print("<=== | Prediction Done | ===>")
-                print("--- %s seconds ---" % (time.time() - start_time))
+            sequence = preprocess_batch(np.stack(sequence), im_size, mean, std).unsqueeze(0)  # (1, T, C, H, W)
+
+            print("<=== | Started Prediction | ===>")
+            with torch.no_grad():
+                prediction = predict(model, sequence, './', video_file_name_only)
+            confidence = round(prediction[1], 1)
+            output = "REAL" if prediction[0] == 1 else "FAKE"
+            print("Prediction:", prediction[0], "==", output, "Confidence:", confidence)
+            print("<=== | Prediction Done | ===>")
+            print("--- %s seconds ---" % (time.time() - start_time))
 
-                # Uncomment if you want to create heat map images
-                # for j in range(sequence_length):
-                #     heatmap_images.append(plot_heat_map(j, model, video_dataset[i], './', video_file_name_only))
+            # Uncomment if you want to create heat map images
+            # for j in range(sequence_length):
+            #     heatmap_images.append(plot_heat_map(j, model, sequence, './', video_file_name_only))
 
             # Render results
             context = {
@@ -398,6 +450,15 @@ def predict_page(request):
                 'confidence': confidence
             }
 
+            if cache_key is not None:
+                result_cache.put(cache_key, {
+                    'preprocessed_images': preprocessed_images,
+                    'faces_cropped_images': faces_cropped_images,
+                    'heatmap_images': heatmap_images,
+                    'output': output,
+                    'confidence': confidence,
+                })
+
             if settings.DEBUG:
                 return render(request, predict_template_name, context)
             else:
@@ -107,6 +107,29 @@ STATICFILES_DIRS = [
 CONTENT_TYPES = ['video']
 MAX_UPLOAD_SIZE = "104857600"
 
+# Model registry: checkpoints kept in memory per worker (LRU), evicted early
+# when available memory drops below MODEL_REGISTRY_MIN_FREE_MB
+MODEL_REGISTRY_MAX_MODELS = int(os.getenv("MODEL_REGISTRY_MAX_MODELS", "2"))
+MODEL_REGISTRY_MIN_FREE_MB = int(os.getenv("MODEL_REGISTRY_MIN_FREE_MB", "1024"))
+# Comma-separated sequence lengths to load when a worker starts, e.g. "20,40"
+MODEL_REGISTRY_WARM = [int(n) for n in os.getenv("MODEL_REGISTRY_WARM", "").split(",") if n.strip()]
+# eager (PyTorch), torchscript or onnx (ONNX Runtime); exported graphs come from
+# `manage.py export_models`, checkpoints without an up-to-date export run eagerly
+MODEL_ENGINE = os.getenv("MODEL_ENGINE", "eager")
+
+# Prediction results cached by upload SHA-256 + checkpoint + sequence length
+# (RESULT_CACHE_MAX_MB=0 disables the cache)
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(PROJECT_DIR, 'result_cache'))
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "256"))
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Preview images of the predict page, written by a background thread pool
+# (downscaled JPEGs; submit blocks once MEDIA_WRITER_QUEUE images are waiting)
+MEDIA_WRITER_THREADS = int(os.getenv("MEDIA_WRITER_THREADS", "2"))
+MEDIA_WRITER_QUEUE = int(os.getenv("MEDIA_WRITER_QUEUE", "16"))
+PREVIEW_MAX_SIDE = int(os.getenv("PREVIEW_MAX_SIDE", "480"))
+PREVIEW_QUALITY = int(os.getenv("PREVIEW_QUALITY", "85"))
+
 MEDIA_URL = "/media/"
 
 MEDIA_ROOT = os.path.join(PROJECT_DIR, 'uploaded_videos')
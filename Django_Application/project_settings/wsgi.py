@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_settings.settings')
 
 application = get_wsgi_application()
+
+# Load checkpoints once per gunicorn worker instead of on the first request
+from django.conf import settings  # noqa: E402
+
+if settings.MODEL_REGISTRY_WARM:
+    from ml_app.views import model_registry  # noqa: E402
+
+    model_registry.warm(settings.MODEL_REGISTRY_WARM)
@@ -1,12 +1,14 @@
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, FileResponse
+from fastapi.concurrency import run_in_threadpool
 import os
-import tempfile
-import shutil
+from pathlib import Path
 from typing import List
 import uvicorn
 
+from upload_ingest import ingest_upload, UploadRejected, UploadSizeLimitMiddleware, MULTIPART_OVERHEAD
+
 # Import your existing Django ML logic here
 # from ml_app.views import process_video  # You'll need to adapt this
 
@@ -21,6 +23,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Largest accepted video; bigger request bodies are refused before they are parsed
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD)
+
 # Create necessary directories
 os.makedirs("temp_uploads", exist_ok=True)
 os.makedirs("processed_media", exist_ok=True)
@@ -42,10 +48,18 @@ async def predict_deepfake(
         if not upload_video_file.content_type.startswith('video/'):
             raise HTTPException(status_code=400, detail="File must be a video")
         
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_file:
-            shutil.copyfileobj(upload_video_file.file, temp_file)
-            temp_file_path = temp_file.name
+        # Stream the upload to disk (size cap, container check, hash)
+        try:
+            upload = await run_in_threadpool(
+                ingest_upload,
+                upload_video_file.file,
+                "temp_uploads",
+                suffix=Path(upload_video_file.filename or "").suffix or ".mp4",
+                max_bytes=MAX_UPLOAD_BYTES
+            )
+        except UploadRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        temp_file_path = upload.path
         
         try:
             # TODO: Integrate your existing Django ML processing logic here
@@ -58,6 +72,8 @@ async def predict_deepfake(
             # Clean up temporary file
             os.unlink(temp_file_path)
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
@@ -26,6 +26,23 @@ export async function GET(
     })
   }
 
-  // In production, this would serve actual files from the Django backend
+  // Face crop thumbnails (content-addressed .webp files) live on the FastAPI backend
+  if (/^[0-9a-f]{32}\.webp$/.test(path)) {
+    const backendUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
+    try {
+      const response = await fetch(`${backendUrl}/api/static/${path}`)
+      if (response.ok) {
+        return new NextResponse(await response.arrayBuffer(), {
+          headers: {
+            'Content-Type': 'image/webp',
+            'Cache-Control': response.headers.get('cache-control') || 'public, max-age=3600',
+          },
+        })
+      }
+    } catch (error) {
+      console.error('Preview fetch error:', error)
+    }
+  }
+
   return NextResponse.json({ error: 'Image not found' }, { status: 404 })
-}
\ No newline at end of file
+}
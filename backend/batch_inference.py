@@ -0,0 +1,166 @@
+"""
+Cross-Request Micro-Batching for ViT Inference
+Pipelines running concurrently in one process share a single model.
+
+Includes:
+1. Per-request futures: each pipeline submits its face sequence and waits
+2. Batch collection: up to max_batch_size sequences or max_wait_ms, whichever first
+3. Padding + frame mask for sequences with different numbers of frames
+4. Batch size metrics
+5. Shutdown: queued and later requests fail instead of waiting forever
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from vit_model import ViTDeepfakeDetector, preprocess_faces, prediction_from_probabilities
+
+class InferenceBatcher:
+    """
+    Background thread running the model on batches of pending sequences
+
+    Args:
+        model: Loaded ViT model or ExportedViT (shared, eval mode)
+        max_batch_size: Sequences per forward pass
+        max_wait_ms: How long the first request of a batch waits for company
+        device: Device the model is on
+    """
+
+    def __init__(
+        self,
+        model: ViTDeepfakeDetector,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        device: Optional[torch.device] = None
+    ):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        # Exported graphs (ExportedViT) have no parameters but name their device
+        self.device = device or getattr(model, 'device', None) or next(model.parameters()).device
+
+        self._pending = queue.Queue()
+        self._thread = None
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._sequences = 0
+        self._largest_batch = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve, name='vit-batcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving: the batch being run finishes, queued requests fail with RuntimeError"""
+        with self._lock:
+            self._stopped = True
+
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("Inference batcher stopped"))
+        self._pending.put(None)
+
+    def submit(self, sequence: torch.Tensor) -> Future:
+        """
+        Queue one (T, C, H, W) sequence, the future resolves to its prediction dict
+
+        Raises:
+            RuntimeError: The batcher was stopped
+        """
+        future = Future()
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("Inference batcher stopped")
+            self._pending.put((sequence, future))
+        return future
+
+    def predict(self, face_images: List[np.ndarray]) -> Dict:
+        """Drop-in for predict_with_vit(model, face_images): preprocess here, infer batched"""
+        return self.submit(preprocess_faces(face_images)).result()
+
+    def _collect(self) -> Optional[List]:
+        """Block for the first request, then gather more until the batch is full or the wait is over"""
+        first = self._pending.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this batch, then stop
+                self._pending.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _serve(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                break
+            self._run(batch)
+
+    def _run(self, batch: List):
+        sequences = [sequence for sequence, _ in batch]
+        futures = [future for _, future in batch]
+
+        try:
+            lengths = [len(sequence) for sequence in sequences]
+            max_len = max(lengths)
+
+            # Pad to the longest sequence; the mask keeps padding out of attention and pooling
+            x = sequences[0].new_zeros((len(sequences), max_len) + tuple(sequences[0].shape[1:]))
+            frame_mask = torch.zeros(len(sequences), max_len, dtype=torch.bool)
+            for i, sequence in enumerate(sequences):
+                x[i, :len(sequence)] = sequence
+                frame_mask[i, :len(sequence)] = True
+
+            with torch.no_grad():
+                if min(lengths) == max_len:
+                    logits = self.model(x.to(self.device))
+                else:
+                    logits = self.model(x.to(self.device), frame_mask=frame_mask.to(self.device))
+                probabilities = torch.softmax(logits, dim=1).cpu()
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self._batches += 1
+            self._sequences += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+
+        for future, probs in zip(futures, probabilities):
+            future.set_result(prediction_from_probabilities(probs))
+
+    def stats(self) -> Dict:
+        """Batch size metrics"""
+        with self._lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self._batches,
+                'sequences': self._sequences,
+                'avg_batch_size': round(self._sequences / self._batches, 2) if self._batches else None,
+                'largest_batch': self._largest_batch
+            }
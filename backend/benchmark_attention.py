@@ -0,0 +1,92 @@
+"""
+Benchmark + parity check: explicit vs fused (scaled_dot_product_attention) spatial attention
+
+Times one MultiHeadAttention layer and a full ViTDeepfakeDetector forward on
+the explicit path (return_attention=True, materializes the attention matrix)
+and the fused path, and checks the outputs match.
+
+Usage:
+    python benchmark_attention.py --num_frames 20
+"""
+
+import argparse
+import sys
+import time
+
+import torch
+
+from vit_model import MultiHeadAttention, ViTDeepfakeDetector
+
+def timed(fn, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(args):
+    torch.manual_seed(0)
+    ok = True
+
+    # One spatial attention layer over all frames of a sequence (197 tokens each)
+    attention = MultiHeadAttention(embed_dim=384, num_heads=6).eval()
+    tokens = torch.randn(args.num_frames, 197, 384)
+
+    with torch.no_grad():
+        explicit, attn = attention(tokens, return_attention=True)
+        fused, _ = attention(tokens)
+        explicit_time = timed(lambda: attention(tokens, return_attention=True), args.repeats)
+        fused_time = timed(lambda: attention(tokens), args.repeats)
+
+    diff = (explicit - fused).abs().max().item()
+    ok = ok and diff < args.atol
+    print(f"MultiHeadAttention, {args.num_frames} frames x 197 tokens "
+          f"(attention matrix {attn.numel() * attn.element_size() / 1e6:.1f} MB)")
+    print(f"  explicit : {explicit_time * 1000:7.2f} ms")
+    print(f"  fused    : {fused_time * 1000:7.2f} ms ({explicit_time / fused_time:.2f}x), "
+          f"max |Δ| {diff:.2e} {'✓' if diff < args.atol else '✗'}")
+
+    model = ViTDeepfakeDetector(
+        img_size=224,
+        patch_size=16,
+        embed_dim=384,
+        depth=6,
+        num_heads=6,
+        dropout=0.1
+    )
+    model.eval()
+    x = torch.randn(1, args.num_frames, 3, 224, 224)
+
+    with torch.no_grad():
+        explicit_logits, _ = model(x, return_attention=True)
+        fused_logits = model(x)
+        explicit_time = timed(lambda: model(x, return_attention=True), args.repeats)
+        fused_time = timed(lambda: model(x), args.repeats)
+
+    diff = (explicit_logits - fused_logits).abs().max().item()
+    ok = ok and diff < args.atol
+    print(f"\nViTDeepfakeDetector, {args.num_frames} frames")
+    print(f"  return_attention=True  : {explicit_time * 1000:7.1f} ms")
+    print(f"  return_attention=False : {fused_time * 1000:7.1f} ms ({explicit_time / fused_time:.2f}x), "
+          f"max |Δlogit| {diff:.2e} {'✓' if diff < args.atol else '✗'}")
+
+    if not ok:
+        print("✗ Fused attention differs from the explicit path")
+        sys.exit(1)
+
+    print("✓ Fused attention matches the explicit path")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark fused spatial attention')
+
+    parser.add_argument('--num_frames', type=int, default=20,
+                        help='Frames per sequence')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='Timing repeats (best is reported)')
+    parser.add_argument('--atol', type=float, default=1e-4,
+                        help='Absolute tolerance for the parity check')
+
+    args = parser.parse_args()
+
+    main(args)
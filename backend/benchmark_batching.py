@@ -0,0 +1,89 @@
+"""
+Benchmark + parity check: one-sequence inference vs cross-request micro-batching
+
+Simulates concurrent requests with different frame counts. Each is run alone
+(batch of one, like predict_with_vit) and through InferenceBatcher from
+parallel threads; checks the probabilities match and reports throughput.
+
+Usage:
+    python benchmark_batching.py --requests 16 --max_batch_size 8
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from batch_inference import InferenceBatcher
+from vit_model import ViTDeepfakeDetector
+
+def main(args):
+    torch.manual_seed(0)
+
+    model = ViTDeepfakeDetector(
+        img_size=224,
+        patch_size=16,
+        embed_dim=384,
+        depth=6,
+        num_heads=6,
+        dropout=0.1
+    )
+    model.eval()
+
+    # Mixed sequence lengths, as produced by different videos
+    lengths = [args.num_frames - (i % 3) * 4 for i in range(args.requests)]
+    sequences = [torch.randn(length, 3, 224, 224) for length in lengths]
+
+    with torch.no_grad():
+        start = time.perf_counter()
+        reference = [torch.softmax(model(seq.unsqueeze(0)), dim=1)[0] for seq in sequences]
+        single_time = time.perf_counter() - start
+
+    batcher = InferenceBatcher(model, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    batcher.start()
+
+    with ThreadPoolExecutor(max_workers=args.requests) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda seq: batcher.submit(seq).result(), sequences))
+        batched_time = time.perf_counter() - start
+
+    batcher.stop()
+
+    max_diff = max(
+        abs(result['probabilities']['fake'] - ref[1].item())
+        for result, ref in zip(results, reference)
+    )
+    ok = max_diff < args.atol
+
+    stats = batcher.stats()
+    print(f"{args.requests} requests, {min(lengths)}-{max(lengths)} frames each")
+    print(f"one at a time : {single_time:.3f}s ({args.requests / single_time:.2f} req/s)")
+    print(f"micro-batched : {batched_time:.3f}s ({args.requests / batched_time:.2f} req/s, "
+          f"{single_time / batched_time:.1f}x), avg batch {stats['avg_batch_size']}")
+    print(f"max |Δp(fake)| {max_diff:.2e} {'✓' if ok else '✗'}")
+
+    if not ok:
+        print("✗ Batched predictions differ from single-sequence inference")
+        sys.exit(1)
+
+    print("✓ Batched predictions match single-sequence inference")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark cross-request micro-batching')
+
+    parser.add_argument('--requests', type=int, default=16,
+                        help='Concurrent requests')
+    parser.add_argument('--num_frames', type=int, default=20,
+                        help='Frames of the longest sequence')
+    parser.add_argument('--max_batch_size', type=int, default=8,
+                        help='Sequences per forward pass')
+    parser.add_argument('--max_wait_ms', type=float, default=5.0,
+                        help='Max wait for a batch to fill')
+    parser.add_argument('--atol', type=float, default=1e-5,
+                        help='Absolute tolerance for the parity check')
+
+    args = parser.parse_args()
+
+    main(args)
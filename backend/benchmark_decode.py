@@ -0,0 +1,148 @@
+"""
+Benchmark: per-index seeking vs single-pass frame decoding
+
+Generates synthetic H.264 clips locally and compares the old
+extract_frames_smart decode loop (cap.set + cap.read per index) with the
+decode engine in video_decoder.py.
+
+Usage:
+    python benchmark_decode.py --durations 10 60 --num_frames 30
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from video_decoder import get_codec_fourcc, iter_decoded_frames, select_decode_strategy
+
+def make_synthetic_clip(path: str, duration: float, fps: int, width: int, height: int) -> str:
+    """
+    Write a synthetic clip with moving content and a frame counter
+
+    Tries H.264 first and falls back to MPEG-4 Part 2 when the local
+    OpenCV build has no H.264 encoder.
+
+    Returns:
+        Codec fourcc that was used
+    """
+    num_frames = int(duration * fps)
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 32, size=(height, width, 3), dtype=np.uint8)
+    xx, yy = np.meshgrid(np.arange(width), np.arange(height))
+
+    for fourcc in ('avc1', 'H264', 'mp4v'):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+        if writer.isOpened():
+            break
+    else:
+        raise RuntimeError("No usable video encoder found in this OpenCV build")
+
+    for i in range(num_frames):
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[..., 0] = (xx + i * 4) % 256
+        frame[..., 1] = (yy + i * 2) % 256
+        frame[..., 2] = (xx + yy + i) % 256
+        frame = cv2.add(frame, noise)
+        cv2.circle(frame, ((i * 7) % width, height // 2), 40, (255, 255, 255), -1)
+        cv2.putText(frame, str(i), (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 4)
+        writer.write(frame)
+
+    writer.release()
+
+    if fourcc != 'avc1':
+        print(f"⚠ H.264 encoder unavailable, clip written with '{fourcc}'")
+
+    return fourcc
+
+def decode_with_seeks(video_path: str, frame_indices: np.ndarray) -> dict:
+    """Old extract_frames_smart loop: one seek + read per index"""
+    cap = cv2.VideoCapture(video_path)
+    frames = {}
+
+    for idx in frame_indices:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ret, frame = cap.read()
+
+        if ret:
+            frames[int(idx)] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    cap.release()
+    return frames
+
+def decode_with_engine(video_path: str, frame_indices: np.ndarray, strategy: str) -> dict:
+    """New decode engine"""
+    cap = cv2.VideoCapture(video_path)
+    frames = dict(iter_decoded_frames(cap, frame_indices, strategy, video_path))
+    cap.release()
+    return frames
+
+def timed(fn, *args, repeats: int = 3):
+    """Run fn several times and return (best time, last result)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def compare_frames(reference: dict, candidate: dict) -> float:
+    """Mean absolute pixel difference over the frames both paths returned"""
+    common = sorted(set(reference) & set(candidate))
+    if not common:
+        return float('nan')
+    return float(np.mean([
+        np.abs(reference[i].astype(np.int16) - candidate[i].astype(np.int16)).mean()
+        for i in common
+    ]))
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for duration in args.durations:
+            clip_path = str(Path(tmp_dir) / f"clip_{duration}s.mp4")
+            make_synthetic_clip(clip_path, duration, args.fps, args.width, args.height)
+
+            cap = cv2.VideoCapture(clip_path)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            sample_size = min(total_frames, args.num_frames * 3)
+            frame_indices = np.linspace(0, total_frames - 1, sample_size, dtype=int)
+            auto_strategy = select_decode_strategy(cap, frame_indices, clip_path)
+            codec = get_codec_fourcc(cap)
+            cap.release()
+
+            print(f"\n{'='*60}")
+            print(f"Clip: {duration}s, {total_frames} frames, codec {codec}, {sample_size} indices")
+            print(f"{'='*60}")
+
+            seek_time, reference = timed(decode_with_seeks, clip_path, frame_indices, repeats=args.repeats)
+            print(f"  per-index seek : {seek_time:7.3f}s ({len(reference)} frames)")
+
+            for strategy in ('scan', 'seek', 'auto'):
+                elapsed, frames = timed(decode_with_engine, clip_path, frame_indices, strategy, repeats=args.repeats)
+                label = f"{strategy} ({auto_strategy})" if strategy == 'auto' else strategy
+                print(f"  engine {label:<14}: {elapsed:7.3f}s ({len(frames)} frames, "
+                      f"{seek_time / elapsed:5.1f}x, mean abs diff {compare_frames(reference, frames):.3f})")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark frame decoding strategies')
+
+    parser.add_argument('--durations', type=float, nargs='+', default=[10, 60],
+                        help='Clip durations in seconds')
+    parser.add_argument('--fps', type=int, default=30,
+                        help='Clip frame rate')
+    parser.add_argument('--width', type=int, default=1280,
+                        help='Clip width')
+    parser.add_argument('--height', type=int, default=720,
+                        help='Clip height')
+    parser.add_argument('--num_frames', type=int, default=30,
+                        help='num_frames passed to extract_frames_smart')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='Timing repeats (best is reported)')
+
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,75 @@
+"""
+Benchmark: startup and per-request latency of each VIT_ENGINE
+
+Loads the checkpoint with every engine (exported graphs must exist, see
+export_vit.py), times load_vit_model and single-sequence inference, and
+checks each engine's probabilities against eager fp32.
+
+Usage:
+    python benchmark_engines.py --model_path models/model_best.pt
+"""
+
+import argparse
+import sys
+import time
+
+import torch
+
+from vit_model import load_vit_model, exported_model_path
+
+def main(args):
+    torch.manual_seed(0)
+    sequences = [torch.rand(1, args.num_frames, 3, 224, 224) for _ in range(args.requests)]
+
+    reference = None
+    ok = True
+    print(f"{args.requests} requests of {args.num_frames} frames, {torch.get_num_threads()} thread(s)\n")
+
+    for engine in args.engines:
+        start = time.perf_counter()
+        model = load_vit_model(args.model_path, device='cpu', engine=engine)
+        load_time = time.perf_counter() - start
+
+        if engine in ('torchscript', 'onnx') and not hasattr(model, 'run'):
+            print(f"  {engine:<11} skipped, no graph at {exported_model_path(args.model_path, engine)}\n")
+            continue
+
+        with torch.no_grad():
+            model(sequences[0])  # warm-up
+            start = time.perf_counter()
+            probabilities = torch.cat([torch.softmax(model(seq), dim=1) for seq in sequences])
+            latency = (time.perf_counter() - start) / len(sequences)
+
+        if reference is None:
+            reference = probabilities
+        diff = (probabilities - reference).abs().max().item()
+        # int8 is approximate by design, only the lossless engines must match
+        passed = engine == 'int8' or diff < args.atol
+        ok = ok and passed
+
+        print(f"  {engine:<11} startup {load_time * 1000:7.1f} ms  "
+              f"latency {latency * 1000:7.1f} ms/request  max |Δp| {diff:.2e} {'✓' if passed else '✗'}\n")
+
+    if not ok:
+        print("✗ An engine's predictions differ from eager fp32")
+        sys.exit(1)
+
+    print("✓ Engines match eager fp32")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark ViT inference engines')
+
+    parser.add_argument('--model_path', type=str, required=True,
+                        help='Checkpoint (exported with export_vit.py)')
+    parser.add_argument('--engines', type=str, nargs='+', default=['fp32', 'int8', 'torchscript', 'onnx'],
+                        help='Engines to compare, the first is the reference')
+    parser.add_argument('--requests', type=int, default=8,
+                        help='Sequences timed per engine')
+    parser.add_argument('--num_frames', type=int, default=20,
+                        help='Frames per sequence')
+    parser.add_argument('--atol', type=float, default=1e-5,
+                        help='Absolute tolerance for the parity check')
+
+    args = parser.parse_args()
+
+    main(args)
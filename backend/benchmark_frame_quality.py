@@ -0,0 +1,103 @@
+"""
+Benchmark + ranking check: per-frame vs batched, row-sampled frame quality
+
+Scores the candidate frames extract_frames_smart looks at (num_frames * 3,
+nested sampling) with assess_frame_quality (full gray frame, CV_64F
+Laplacian) and assess_frame_quality_batch, and checks that the frames each
+scorer ranks highest and the threshold decisions agree.
+
+Usage:
+    python benchmark_frame_quality.py --videos clip1.mp4 clip2.mp4
+"""
+
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from enhanced_processor import (
+    QUALITY_BATCH_SIZE,
+    assess_frame_quality,
+    assess_frame_quality_batch,
+    nested_frame_indices
+)
+from video_decoder import read_frames
+
+def load_candidates(video_path: str, num_frames: int) -> list:
+    """The frames extract_frames_smart scores for num_frames"""
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    frame_indices = nested_frame_indices(total_frames, min(total_frames, num_frames * 3))
+    return [frame for _, frame in read_frames(video_path, frame_indices)]
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    if len(a) < 2:
+        return 1.0
+    return float(np.corrcoef(np.argsort(np.argsort(a)), np.argsort(np.argsort(b)))[0, 1])
+
+def main(args):
+    ok = True
+
+    print(f"{'video':<24} {'size':>9} {'per-frame':>10} {'batched':>9} {'speedup':>8} "
+          f"{'rho':>6} {'top-k':>6} {'thresh':>7}")
+    for video_path in args.videos:
+        frames = load_candidates(video_path, args.num_frames)
+        if not frames:
+            print(f"{video_path[-24:]:<24} no frames")
+            ok = False
+            continue
+
+        start = time.perf_counter()
+        reference = np.array([assess_frame_quality(frame) for frame in frames])
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batched = np.array([
+            quality
+            for i in range(0, len(frames), QUALITY_BATCH_SIZE)
+            for quality in assess_frame_quality_batch(frames[i:i + QUALITY_BATCH_SIZE], args.sample_rows or None)
+        ])
+        batched_time = time.perf_counter() - start
+
+        # The num_frames best candidates (extract_frames_smart also drops those below the threshold)
+        top_k = min(args.num_frames, len(frames))
+        reference_selection = set(np.argsort(-reference, kind='stable')[:top_k])
+        batched_selection = set(np.argsort(-batched, kind='stable')[:top_k])
+        overlap = len(reference_selection & batched_selection) / top_k
+        rho = spearman(reference, batched)
+        threshold_agreement = float(np.mean((reference >= args.quality_threshold) == (batched >= args.quality_threshold)))
+
+        same = overlap >= args.min_overlap and threshold_agreement >= args.min_overlap
+        ok = ok and same
+        size = f"{frames[0].shape[1]}x{frames[0].shape[0]}"
+        print(f"{video_path[-24:]:<24} {size:>9} {reference_time * 1000:>8.1f}ms {batched_time * 1000:>7.1f}ms "
+              f"{reference_time / batched_time:>7.2f}x {rho:>6.3f} {overlap:>6.2f} {threshold_agreement:>7.2f} "
+              f"{'✓' if same else '✗'}")
+
+    if not ok:
+        print("✗ Batched frame quality selects different frames")
+        sys.exit(1)
+
+    print("✓ Batched frame quality selects the same frames")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark batched frame quality scoring')
+
+    parser.add_argument('--videos', type=str, nargs='+', required=True,
+                        help='Videos to score')
+    parser.add_argument('--num_frames', type=int, default=30,
+                        help='Frames to extract (num_frames * 3 candidates are scored)')
+    parser.add_argument('--sample_rows', type=int, default=128,
+                        help='Rows scored per frame (0 = every row)')
+    parser.add_argument('--quality_threshold', type=float, default=10.0,
+                        help='Minimum quality score, as in extract_frames_smart')
+    parser.add_argument('--min_overlap', type=float, default=0.9,
+                        help='Required share of the same selected frames and threshold decisions')
+
+    args = parser.parse_args()
+
+    main(args)
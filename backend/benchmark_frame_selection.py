@@ -0,0 +1,149 @@
+"""
+Benchmark + check: full sort vs temporal-bucket frame selection
+
+Runs the old extract_frames_smart selection (every candidate above the
+threshold kept at full resolution, sorted by quality) and the current one
+(TemporalFrameSelector) on the same videos. Reports peak traced memory,
+time and how the selected frames spread over the video. Checks that the
+new selection returns as many frames, in temporal order, all above the
+threshold, and that the selector never holds more than num_frames frames.
+
+Usage:
+    python benchmark_frame_selection.py --videos clip1.mp4 clip2.mp4
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from enhanced_processor import (
+    QUALITY_BATCH_SIZE,
+    TemporalFrameSelector,
+    assess_frame_quality_batch,
+    extract_frames_smart,
+    nested_frame_indices
+)
+from video_decoder import iter_decoded_frames
+
+def extract_frames_sorted(video_path: str, num_frames: int, quality_threshold: float = 10.0):
+    """Old extract_frames_smart selection: keep every candidate, sort by quality"""
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frame_indices = nested_frame_indices(total_frames, min(total_frames, num_frames * 3))
+
+    frames_with_quality = []
+    batch = []
+
+    def score(batch):
+        for (idx, frame), quality in zip(batch, assess_frame_quality_batch([frame for _, frame in batch])):
+            if quality >= quality_threshold:
+                frames_with_quality.append((frame, quality, idx))
+
+    try:
+        for idx, frame in iter_decoded_frames(cap, frame_indices, 'auto', video_path):
+            batch.append((idx, frame))
+            if len(batch) == QUALITY_BATCH_SIZE:
+                score(batch)
+                batch = []
+        score(batch)
+    finally:
+        cap.release()
+
+    frames_with_quality.sort(key=lambda x: x[1], reverse=True)
+    return [f[0] for f in frames_with_quality[:num_frames]], [int(f[2]) for f in frames_with_quality[:num_frames]]
+
+def max_frames_held(video_path: str, num_frames: int, quality_threshold: float) -> int:
+    """Most frames TemporalFrameSelector holds at once over the candidates"""
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frame_indices = nested_frame_indices(total_frames, min(total_frames, num_frames * 3))
+    selector = TemporalFrameSelector(min(num_frames, len(frame_indices)), total_frames)
+
+    held = 0
+    try:
+        for idx, frame in iter_decoded_frames(cap, frame_indices, 'auto', video_path):
+            quality = assess_frame_quality_batch([frame])[0]
+            if quality >= quality_threshold:
+                selector.add(idx, frame, quality)
+                held = max(held, len(selector.winners) + len(selector.runners_up))
+    finally:
+        cap.release()
+    return held
+
+def measure(fn):
+    """(result, seconds, peak traced MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+def coverage(indices, total_frames: int, num_frames: int) -> int:
+    """Temporal buckets (of num_frames) the selected frames fall in"""
+    return len({min(num_frames - 1, i * num_frames // max(1, total_frames)) for i in indices})
+
+def main(args):
+    ok = True
+
+    # Peak memory also counts the QUALITY_BATCH_SIZE frames being scored
+    print(f"{'video':<24} {'frames':>6} {'':<8} {'time':>8} {'peak':>9} {'buckets':>8} {'largest gap':>12}")
+    for video_path in args.videos:
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        (old_frames, old_indices), old_time, old_peak = measure(
+            lambda: extract_frames_sorted(video_path, args.num_frames, args.quality_threshold)
+        )
+        (new_frames, metadata), new_time, new_peak = measure(
+            lambda: extract_frames_smart(video_path, args.num_frames, args.quality_threshold)
+        )
+        new_indices = metadata['frame_indices']
+        qualities = assess_frame_quality_batch(new_frames) if new_frames else []
+        held = max_frames_held(video_path, args.num_frames, args.quality_threshold)
+
+        good = (
+            len(new_frames) == len(old_frames)
+            and new_indices == sorted(new_indices)
+            and all(quality >= args.quality_threshold for quality in qualities)
+            and held <= args.num_frames
+        )
+        ok = ok and good
+
+        for label, indices, elapsed, peak in [
+            ('sorted', old_indices, old_time, old_peak),
+            ('buckets', new_indices, new_time, new_peak)
+        ]:
+            gap = np.diff([0] + sorted(indices) + [total_frames]).max() if indices else total_frames
+            mark = '' if label == 'sorted' else f"(held <= {held}) {'✓' if good else '✗'}"
+            print(f"{video_path[-24:]:<24} {len(indices):>6} {label:<8} {elapsed:>7.2f}s {peak:>7.1f}MB "
+                  f"{coverage(indices, total_frames, args.num_frames):>8} {gap:>12} {mark}")
+
+    if not ok:
+        print("✗ Temporal-bucket selection is missing frames, out of order or held too many frames")
+        sys.exit(1)
+
+    print("✓ Temporal-bucket selection returns every frame in order, holding at most num_frames")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark frame selection')
+
+    parser.add_argument('--videos', type=str, nargs='+', required=True,
+                        help='Videos to select frames from')
+    parser.add_argument('--num_frames', type=int, default=30,
+                        help='Frames to select')
+    parser.add_argument('--quality_threshold', type=float, default=10.0,
+                        help='Minimum quality score')
+
+    args = parser.parse_args()
+
+    main(args)
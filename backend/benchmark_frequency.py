@@ -0,0 +1,118 @@
+"""
+Benchmark + parity check: scipy DCT loop vs torch-native FrequencyAnalyzer
+
+Compares the 128-d DCT features of the old per-frame implementation
+(NumPy -> cv2 grayscale -> scipy.fftpack.dct -> nested block loops) with the
+batched torch implementation, then times both.
+
+Requires scipy and opencv-python (benchmark only, not needed at runtime).
+
+Usage:
+    python benchmark_frequency.py --batch_size 2 --num_frames 20
+"""
+
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+import torch
+from scipy import fftpack
+
+from vit_model import FrequencyAnalyzer
+
+def reference_features(images: torch.Tensor) -> torch.Tensor:
+    """The original per-frame DCT feature extraction (before the fc layers)"""
+    B, T, C, H, W = images.shape
+    freq_features = []
+
+    for b in range(B):
+        frame_features = []
+        for t in range(T):
+            img = images[b, t].cpu().numpy().transpose(1, 2, 0)
+
+            if img.shape[2] == 3:
+                gray = cv2.cvtColor((img * 255).astype(np.uint8), cv2.COLOR_RGB2GRAY)
+            else:
+                gray = (img[:, :, 0] * 255).astype(np.uint8)
+
+            dct = fftpack.dct(fftpack.dct(gray.T, norm='ortho').T, norm='ortho')
+
+            dct_features = []
+            for i in range(0, gray.shape[0], 32):
+                for j in range(0, gray.shape[1], 32):
+                    block = dct[i:i+8, j:j+8]
+                    if block.size > 0:
+                        dct_features.append(block.flatten()[:16])
+
+            dct_features = np.concatenate(dct_features)[:128]
+            if len(dct_features) < 128:
+                dct_features = np.pad(dct_features, (0, 128 - len(dct_features)))
+
+            frame_features.append(torch.tensor(dct_features, dtype=torch.float32))
+
+        freq_features.append(torch.stack(frame_features))
+
+    return torch.stack(freq_features)
+
+def torch_features(analyzer: FrequencyAnalyzer, images: torch.Tensor) -> torch.Tensor:
+    """FrequencyAnalyzer.forward without the fc layers"""
+    captured = {}
+    handle = analyzer.fc.register_forward_hook(lambda m, inp, out: captured.setdefault('x', inp[0]))
+    analyzer(images)
+    handle.remove()
+    return captured['x']
+
+def main(args):
+    torch.manual_seed(0)
+    analyzer = FrequencyAnalyzer(embed_dim=384, img_size=args.img_size).eval()
+
+    # Normalized inputs, as produced by get_vit_transform()
+    images = torch.randn(args.batch_size, args.num_frames, 3, args.img_size, args.img_size)
+
+    failed = False
+    with torch.no_grad():
+        start = time.perf_counter()
+        reference = reference_features(images)
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        features = torch_features(analyzer, images)
+        torch_time = time.perf_counter() - start
+
+        for size in args.other_sizes:
+            other = torch.randn(1, 2, 3, size, size)
+            ok = torch.allclose(torch_features(analyzer, other), reference_features(other), rtol=1e-4, atol=1e-2)
+            failed |= not ok
+            print(f"  {size}x{size} frames: {'✓' if ok else '✗'}")
+
+    max_diff = (features - reference).abs().max().item()
+    ok = torch.allclose(features, reference, rtol=1e-4, atol=1e-2)
+    failed |= not ok
+
+    print(f"scipy loop : {reference_time:.4f}s")
+    print(f"torch      : {torch_time:.4f}s ({reference_time / torch_time:.1f}x)")
+    print(f"max |Δfeature| {max_diff:.2e} {'✓' if ok else '✗'}")
+
+    if failed:
+        print("✗ Torch features differ from the scipy implementation")
+        sys.exit(1)
+
+    print("✓ Torch features match the scipy implementation")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the torch-native FrequencyAnalyzer')
+
+    parser.add_argument('--batch_size', type=int, default=2,
+                        help='Sequences per batch (B)')
+    parser.add_argument('--num_frames', type=int, default=20,
+                        help='Frames per sequence (T)')
+    parser.add_argument('--img_size', type=int, default=224,
+                        help='Frame size')
+    parser.add_argument('--other_sizes', type=int, nargs='*', default=[100, 60],
+                        help='Extra frame sizes to check (exercise partial edge blocks)')
+
+    args = parser.parse_args()
+
+    main(args)
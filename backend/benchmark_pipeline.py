@@ -0,0 +1,75 @@
+"""
+Benchmark + parity check: sequential vs staged analysis pipeline
+
+Runs process_with_vit on the same videos in 'sequential' and 'staged' mode,
+reports end-to-end latency and checks that both produce the same result.
+
+Usage:
+    python benchmark_pipeline.py --videos clip1.mp4 clip2.mp4 --model_path models/model_best.pt
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+from pipeline import process_with_vit
+from vit_model import load_vit_model
+
+def run(video_path: str, num_frames: int, model, mode: str):
+    # The pipeline prints every step; keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = process_with_vit(video_path, num_frames, model, mode=mode)
+        elapsed = time.perf_counter() - start
+    return result, elapsed
+
+def main(args):
+    model = load_vit_model(args.model_path)
+    ok = True
+
+    print(f"{'video':<30} {'frames':>6} {'sequential':>11} {'staged':>9} {'speedup':>8} {'Δ fake%':>8}")
+    for video_path in args.videos:
+        for num_frames in args.num_frames:
+            best = {}
+            results = {}
+            for mode in ('sequential', 'staged'):
+                for _ in range(args.repeats):
+                    results[mode], elapsed = run(video_path, num_frames, model, mode)
+                    best[mode] = min(best.get(mode, float('inf')), elapsed)
+
+            sequential, staged = results['sequential'], results['staged']
+            diff = abs(sequential['probabilities']['fake'] - staged['probabilities']['fake'])
+            same = (
+                sequential['output'] == staged['output']
+                and sequential['analysis'] == staged['analysis']
+                and diff <= args.tolerance
+            )
+            ok = ok and same
+            print(f"{video_path[-30:]:<30} {num_frames:>6} {best['sequential']:>10.2f}s {best['staged']:>8.2f}s "
+                  f"{best['sequential'] / best['staged']:>7.2f}x {diff:>8.3f} {'✓' if same else '✗'}")
+
+    if not ok:
+        print("✗ Staged pipeline result differs from the sequential one")
+        sys.exit(1)
+
+    print("✓ Staged pipeline matches the sequential one")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the staged analysis pipeline')
+
+    parser.add_argument('--videos', type=str, nargs='+', required=True,
+                        help='Videos to analyze')
+    parser.add_argument('--model_path', type=str, default=None,
+                        help='ViT checkpoint')
+    parser.add_argument('--num_frames', type=int, nargs='+', default=[20, 30],
+                        help='Frames to extract')
+    parser.add_argument('--repeats', type=int, default=2,
+                        help='Timing repeats per mode (best is reported)')
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help='Allowed fake probability difference (percentage points)')
+
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,70 @@
+"""
+Benchmark + parity check: per-image PIL transforms vs batched preprocessing
+
+Times get_vit_transform applied crop by crop against preprocessing.preprocess_batch
+on the same crops, for crops already at the model size (the inference path)
+and for crops that need resizing, and checks the outputs match.
+
+Usage:
+    python benchmark_preprocessing.py --num_frames 20
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import torch
+
+from preprocessing import preprocess_batch
+from vit_model import get_vit_transform
+
+def timed(fn, repeats: int) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main(args):
+    rng = np.random.default_rng(0)
+    transform = get_vit_transform()
+    ok = True
+
+    print(f"{'crops':<22} {'per-image':>10} {'batched':>9} {'speedup':>8} {'max |Δ| (levels)':>17}")
+    for height, width in [(224, 224), (300, 260), (160, 140)]:
+        crops = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(args.num_frames)]
+
+        reference = torch.stack([transform(crop) for crop in crops])
+        batched = preprocess_batch(crops)
+        # Difference in uint8 levels (std ~0.225 after normalization)
+        levels = ((reference - batched).abs() * 0.225 * 255).max().item()
+        ok = ok and levels <= args.max_levels
+
+        per_image_time = timed(lambda: torch.stack([transform(crop) for crop in crops]), args.repeats)
+        batched_time = timed(lambda: preprocess_batch(crops), args.repeats)
+
+        label = f"{args.num_frames} x {height}x{width}"
+        print(f"{label:<22} {per_image_time * 1000:>8.1f}ms {batched_time * 1000:>7.1f}ms "
+              f"{per_image_time / batched_time:>7.2f}x {levels:>13.2f} {'✓' if levels <= args.max_levels else '✗'}")
+
+    if not ok:
+        print("✗ Batched preprocessing differs from get_vit_transform")
+        sys.exit(1)
+
+    print("✓ Batched preprocessing matches get_vit_transform")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark batched frame preprocessing')
+
+    parser.add_argument('--num_frames', type=int, default=20,
+                        help='Crops per sequence')
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='Timing repeats (best is reported)')
+    parser.add_argument('--max_levels', type=float, default=2.5,
+                        help='Allowed difference in uint8 levels (resize rounding)')
+
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,95 @@
+"""
+Benchmark + check: inline base64 JPEG previews vs WebP thumbnail URLs
+
+Cuts face crops from a video, then compares the previous preview encoding
+(JPEG quality 85, base64 inlined in the response) with preview_store: the time
+spent on the request path, the size of the preview fields in the JSON response
+and the bytes written. Checks that every thumbnail is written and decodes.
+
+Usage:
+    python benchmark_previews.py --video clip.mp4
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from enhanced_processor import detect_and_crop_faces, extract_frames_smart
+from preview_store import PreviewStore
+
+def inline_jpeg(face_crops) -> list:
+    previews = []
+    for face in face_crops:
+        buffer = io.BytesIO()
+        Image.fromarray(face.astype('uint8')).save(buffer, format='JPEG', quality=85)
+        previews.append(f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode()}")
+    return previews
+
+def payload_size(previews: list) -> int:
+    return len(json.dumps({"preprocessed_images": previews, "faces_cropped_images": previews}))
+
+def main(args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        frames, _ = extract_frames_smart(args.video, args.num_frames)
+        face_crops, _ = detect_and_crop_faces(frames)
+    face_crops = face_crops[:args.num_previews]
+
+    start = time.perf_counter()
+    inline = inline_jpeg(face_crops)
+    inline_time = time.perf_counter() - start
+    jpeg_bytes = sum(len(base64.b64decode(preview.split(',', 1)[1])) for preview in inline)
+
+    with tempfile.TemporaryDirectory() as root_dir:
+        store = PreviewStore(root_dir, max_side=args.max_side, quality=args.quality)
+
+        start = time.perf_counter()
+        urls = store.save_async(face_crops)
+        request_time = time.perf_counter() - start
+        store.flush()
+        encode_time = time.perf_counter() - start
+
+        paths = [Path(root_dir) / url.rsplit('/', 1)[1] for url in urls]
+        ok = all(path.is_file() for path in paths)
+        if ok:
+            for path, face in zip(paths, face_crops):
+                with Image.open(path) as thumbnail:
+                    ok = ok and thumbnail.format == 'WEBP' and max(thumbnail.size) <= max(args.max_side, *face.shape[:2])
+        webp_bytes = sum(path.stat().st_size for path in paths if path.is_file())
+
+    print(f"{len(face_crops)} previews of {face_crops[0].shape[1]}x{face_crops[0].shape[0]} crops")
+    print(f"{'':<22} {'request path':>12} {'response':>10} {'stored':>9}")
+    print(f"{'inline base64 JPEG':<22} {inline_time * 1000:>10.1f}ms {payload_size(inline) / 1024:>8.1f}KB {jpeg_bytes / 1024:>7.1f}KB")
+    print(f"{'WebP thumbnail URLs':<22} {request_time * 1000:>10.1f}ms {payload_size(urls) / 1024:>8.1f}KB {webp_bytes / 1024:>7.1f}KB")
+    print(f"Background encoding: {encode_time * 1000:.1f}ms, response {payload_size(inline) / payload_size(urls):.0f}x smaller")
+
+    if not ok:
+        print("✗ Some thumbnails are missing or unreadable")
+        sys.exit(1)
+
+    print("✓ All thumbnails written")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark preview thumbnail encoding')
+
+    parser.add_argument('--video', type=str, required=True,
+                        help='Video to cut face crops from')
+    parser.add_argument('--num_frames', type=int, default=30,
+                        help='Frames to extract')
+    parser.add_argument('--num_previews', type=int, default=10,
+                        help='Previews per result')
+    parser.add_argument('--max_side', type=int, default=160,
+                        help='Longest thumbnail side')
+    parser.add_argument('--quality', type=int, default=80,
+                        help='WebP quality')
+
+    args = parser.parse_args()
+
+    main(args)
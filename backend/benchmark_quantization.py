@@ -0,0 +1,110 @@
+"""
+Accuracy vs latency report: fp32 vs dynamic int8 ViT inference
+
+Runs the same held-out face sequences through the fp32 model and its int8
+quantized copy (quantize_vit_model) and reports per-sequence latency, model
+size, logit drift and prediction agreement. With a face cache built by
+train_vit.py (e.g. data/face_cache/val) accuracy against the labels is
+reported too; without one, random sequences are used.
+
+Usage:
+    python benchmark_quantization.py --model_path models/model_best.pt --cache_dir data/face_cache/val
+"""
+
+import argparse
+import io
+import sys
+import time
+
+import torch
+
+from face_cache import FaceCropDataset
+from vit_model import load_vit_model, quantize_vit_model
+
+def model_size_mb(model: torch.nn.Module) -> float:
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 1e6
+
+def held_out_sequences(args):
+    """(sequence, label) pairs; label is None for random sequences"""
+    if args.cache_dir:
+        dataset = FaceCropDataset(args.cache_dir)
+        count = min(len(dataset), args.num_sequences)
+        return [dataset[i] for i in range(count)]
+
+    torch.manual_seed(0)
+    return [(torch.randn(args.num_frames, 3, 224, 224), None) for _ in range(args.num_sequences)]
+
+def run(model, sequences):
+    """Logits per sequence and mean seconds per sequence"""
+    logits = []
+    with torch.no_grad():
+        model(sequences[0][0].unsqueeze(0))  # warm-up
+        start = time.perf_counter()
+        for sequence, _ in sequences:
+            logits.append(model(sequence.unsqueeze(0))[0])
+        elapsed = time.perf_counter() - start
+    return torch.stack(logits), elapsed / len(sequences)
+
+def main(args):
+    torch.set_num_threads(args.threads)
+
+    model = load_vit_model(args.model_path, device='cpu', engine='fp32')
+    quantized = quantize_vit_model(model)
+
+    sequences = held_out_sequences(args)
+    if not sequences:
+        print("✗ No sequences to evaluate")
+        sys.exit(1)
+
+    fp32_logits, fp32_time = run(model, sequences)
+    int8_logits, int8_time = run(quantized, sequences)
+
+    drift = (fp32_logits - int8_logits).abs()
+    fp32_pred = fp32_logits.argmax(dim=1)
+    int8_pred = int8_logits.argmax(dim=1)
+    agreement = (fp32_pred == int8_pred).float().mean().item()
+    fake_diff = (torch.softmax(fp32_logits, dim=1)[:, 1] - torch.softmax(int8_logits, dim=1)[:, 1]).abs()
+
+    print(f"\n{len(sequences)} sequences, {args.threads} thread(s)")
+    print(f"fp32 : {fp32_time * 1000:8.1f} ms/sequence  {model_size_mb(model):6.1f} MB")
+    print(f"int8 : {int8_time * 1000:8.1f} ms/sequence  {model_size_mb(quantized):6.1f} MB  "
+          f"({fp32_time / int8_time:.2f}x)")
+    print(f"|Δlogit|   max {drift.max().item():.4f}  mean {drift.mean().item():.4f}")
+    print(f"|Δp(fake)| max {fake_diff.max().item():.4f}  mean {fake_diff.mean().item():.4f}")
+    print(f"prediction agreement {agreement * 100:.1f}%")
+
+    labels = [label for _, label in sequences]
+    if labels[0] is not None:
+        labels = torch.tensor(labels)
+        fp32_acc = (fp32_pred == labels).float().mean().item()
+        int8_acc = (int8_pred == labels).float().mean().item()
+        print(f"accuracy   fp32 {fp32_acc * 100:.1f}%  int8 {int8_acc * 100:.1f}%  "
+              f"(Δ {(int8_acc - fp32_acc) * 100:+.1f} pts)")
+
+    if agreement < args.min_agreement:
+        print(f"✗ int8 predictions agree on fewer than {args.min_agreement * 100:.0f}% of sequences")
+        sys.exit(1)
+
+    print("✓ int8 predictions agree with fp32")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare fp32 and dynamic int8 ViT inference')
+
+    parser.add_argument('--model_path', type=str, default=None,
+                        help='Checkpoint to evaluate (random init if unset)')
+    parser.add_argument('--cache_dir', type=str, default=None,
+                        help='Held-out face cache (e.g. data/face_cache/val), random sequences if unset')
+    parser.add_argument('--num_sequences', type=int, default=32,
+                        help='Max sequences to evaluate')
+    parser.add_argument('--num_frames', type=int, default=20,
+                        help='Frames per random sequence')
+    parser.add_argument('--threads', type=int, default=torch.get_num_threads(),
+                        help='torch threads for both runs')
+    parser.add_argument('--min_agreement', type=float, default=0.95,
+                        help='Fail if fewer predictions agree')
+
+    args = parser.parse_args()
+
+    main(args)
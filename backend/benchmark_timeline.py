@@ -0,0 +1,121 @@
+"""
+Benchmark + parity check: streaming sliding-window timeline
+
+Loops a sample video into longer and longer clips and runs process_timeline
+on each, reporting time and the process's peak resident memory (which should
+stay flat as the clips grow). Also checks that windows scored from the
+buffered per-frame features match re-encoding every window from scratch.
+
+Usage:
+    python benchmark_timeline.py --video sample.mp4 --model_path models/model_best.pt
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import cv2
+
+from streaming import process_timeline
+from vit_model import load_vit_model
+
+class FullWindowModel:
+    """Hides frame_features so every window is encoded from scratch"""
+
+    def __init__(self, model):
+        self.model = model
+        self.device = next(model.parameters()).device
+
+    def __call__(self, x):
+        return self.model(x)
+
+def write_looped_video(video_path: str, loops: int, output_path: str) -> int:
+    """Write `loops` copies of a video back to back (MJPG), returns the frame count"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    cap.release()
+
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    for _ in range(loops):
+        for frame in frames:
+            writer.write(frame)
+    writer.release()
+    return len(frames) * loops
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main(args):
+    model = load_vit_model(args.model_path)
+
+    def run(video_path, timeline_model):
+        return process_timeline(
+            video_path, timeline_model,
+            window=args.window, hop=args.hop, sample_fps=args.sample_fps
+        )
+
+    streamed = run(args.video, model)['timeline']
+    rescored = run(args.video, FullWindowModel(model))['timeline']
+    diff = max(
+        abs(a['fake_probability'] - b['fake_probability'])
+        for a, b in zip(streamed, rescored)
+    ) if len(streamed) == len(rescored) else float('inf')
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for loops in args.loops:
+            path = os.path.join(tmp, f"looped_{loops}.avi")
+            frames = write_looped_video(args.video, loops, path)
+
+            start = time.perf_counter()
+            result = run(path, model)
+            rows.append((loops, frames, result['analysis'], time.perf_counter() - start, peak_rss_mb()))
+            os.unlink(path)
+
+    print(f"\nWindow {args.window}, hop {args.hop}, {args.sample_fps} fps")
+    print(f"{'loops':>5} {'frames':>7} {'sampled':>8} {'faces':>6} {'segments':>9} {'time':>8} {'peak RSS':>10}")
+    for loops, frames, analysis, elapsed, rss in rows:
+        print(f"{loops:>5} {frames:>7} {analysis['frames_sampled']:>8} {analysis['faces_detected']:>6} "
+              f"{analysis['segments']:>9} {elapsed:>7.1f}s {rss:>8.0f} MB")
+
+    print(f"\nBuffered features vs re-encoded windows: max |Δ fake%| {diff:.3f}")
+    if diff > args.tolerance:
+        print("✗ Streaming timeline differs from re-encoding each window")
+        sys.exit(1)
+
+    print("✓ Streaming timeline matches re-encoding each window")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the streaming timeline mode')
+
+    parser.add_argument('--video', type=str, required=True,
+                        help='Sample video (looped to make longer clips)')
+    parser.add_argument('--model_path', type=str, default=None,
+                        help='ViT checkpoint')
+    parser.add_argument('--loops', type=int, nargs='+', default=[1, 4, 16],
+                        help='Clip lengths, in copies of the sample video')
+    parser.add_argument('--window', type=int, default=16,
+                        help='Face frames per segment')
+    parser.add_argument('--hop', type=int, default=8,
+                        help='New face frames between segments')
+    parser.add_argument('--sample_fps', type=float, default=5.0,
+                        help='Frames per second analyzed')
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help='Allowed fake probability difference (percentage points)')
+
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,101 @@
+"""
+Benchmark + parity check: per-timestep vs batched ViT frame encoding
+
+Runs the old forward path (one (B, C, H, W) slice per timestep through the
+spatial transformer) next to ViTDeepfakeDetector.forward, checks that the
+logits match within tolerance and reports the speedup.
+
+Usage:
+    python benchmark_vit.py --batch_size 1 --num_frames 20
+"""
+
+import argparse
+import sys
+import time
+
+import torch
+
+from vit_model import ViTDeepfakeDetector
+
+def forward_per_timestep(model: ViTDeepfakeDetector, x: torch.Tensor) -> torch.Tensor:
+    """Reference: the original per-timestep forward loop"""
+    B, T, C, H, W = x.shape
+    frame_features = []
+
+    for t in range(T):
+        cls_token, _ = model.encode_frames(x[:, t])
+        frame_features.append(cls_token)
+
+    frame_features = torch.stack(frame_features, dim=1)
+
+    temporal_features, _ = model.temporal_attn(frame_features)
+    freq_features = model.freq_analyzer(x)
+    fused = model.fusion(torch.cat([temporal_features, freq_features], dim=-1))
+    return model.head(model.norm(fused.mean(dim=1)))
+
+def timed(fn, repeats: int):
+    """Return (best time, last result) over several runs"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main(args):
+    torch.manual_seed(0)
+
+    model = ViTDeepfakeDetector(
+        img_size=224,
+        patch_size=16,
+        embed_dim=384,
+        depth=6,
+        num_heads=6,
+        dropout=0.1
+    )
+    model.eval()
+
+    x = torch.randn(args.batch_size, args.num_frames, 3, 224, 224)
+
+    with torch.no_grad():
+        loop_time, reference = timed(lambda: forward_per_timestep(model, x), args.repeats)
+        print(f"per-timestep loop : {loop_time:.3f}s")
+
+        failed = False
+        for frame_batch_size in [None] + args.frame_batch_sizes:
+            model.frame_batch_size = frame_batch_size
+            elapsed, logits = timed(lambda: model(x), args.repeats)
+            max_diff = (logits - reference).abs().max().item()
+            ok = torch.allclose(logits, reference, rtol=args.rtol, atol=args.atol)
+            failed |= not ok
+
+            label = f"batched (cap={frame_batch_size})"
+            print(f"{label:<18}: {elapsed:.3f}s ({loop_time / elapsed:4.1f}x), "
+                  f"max |Δlogit| {max_diff:.2e} {'✓' if ok else '✗'}")
+
+    if failed:
+        print("✗ Logits differ from the per-timestep loop")
+        sys.exit(1)
+
+    print("✓ Batched forward matches the per-timestep loop")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark batched ViT frame encoding')
+
+    parser.add_argument('--batch_size', type=int, default=1,
+                        help='Sequences per batch (B)')
+    parser.add_argument('--num_frames', type=int, default=20,
+                        help='Frames per sequence (T)')
+    parser.add_argument('--frame_batch_sizes', type=int, nargs='*', default=[8],
+                        help='Micro-batch caps to check besides the uncapped path')
+    parser.add_argument('--repeats', type=int, default=3,
+                        help='Timing repeats (best is reported)')
+    parser.add_argument('--rtol', type=float, default=1e-4,
+                        help='Relative tolerance for the parity check')
+    parser.add_argument('--atol', type=float, default=1e-5,
+                        help='Absolute tolerance for the parity check')
+
+    args = parser.parse_args()
+
+    main(args)
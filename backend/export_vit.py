@@ -0,0 +1,66 @@
+"""
+Export the ViT checkpoint to TorchScript and ONNX
+
+Writes <checkpoint>.torchscript and <checkpoint>.onnx next to the checkpoint
+(picked up by VIT_ENGINE=torchscript / onnx) and checks both against the
+eager model at two sequence lengths, since the frame axis is dynamic.
+
+Usage:
+    python export_vit.py --model_path models/model_best.pt
+"""
+
+import argparse
+import sys
+
+import torch
+
+from vit_model import load_vit_model, export_vit_model, TorchScriptViT, OnnxViT
+
+def main(args):
+    model = load_vit_model(args.model_path, device='cpu', engine='fp32')
+    paths = export_vit_model(model, args.model_path, tuple(args.engines), args.num_frames, args.opset)
+
+    runners = {}
+    for engine, path in paths.items():
+        print(f"✓ Exported {engine}: {path}")
+        try:
+            runners[engine] = TorchScriptViT(path) if engine == 'torchscript' else OnnxViT(path)
+        except ImportError as e:
+            print(f"⚠ {e}, {path} not checked")
+
+    torch.manual_seed(0)
+    ok = True
+    for batch, frames in ((1, args.num_frames), (2, max(1, args.num_frames // 2))):
+        x = torch.rand(batch, frames, 3, 224, 224)
+        with torch.no_grad():
+            reference = model(x)
+            for engine, runner in runners.items():
+                diff = (runner(x) - reference).abs().max().item()
+                passed = diff < args.atol
+                ok = ok and passed
+                print(f"  {engine:<11} batch {batch}, {frames:>2} frames: max |Δlogit| {diff:.2e} {'✓' if passed else '✗'}")
+
+    if not ok:
+        print("✗ Exported graphs differ from the eager model")
+        sys.exit(1)
+
+    print("✓ Exported graphs match the eager model")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export ViT checkpoint to TorchScript / ONNX')
+
+    parser.add_argument('--model_path', type=str, required=True,
+                        help='Checkpoint to export')
+    parser.add_argument('--engines', type=str, nargs='+', default=['torchscript', 'onnx'],
+                        choices=['torchscript', 'onnx'],
+                        help='Formats to write')
+    parser.add_argument('--num_frames', type=int, default=20,
+                        help='Frames of the example sequence used for tracing')
+    parser.add_argument('--opset', type=int, default=17,
+                        help='ONNX opset version')
+    parser.add_argument('--atol', type=float, default=1e-4,
+                        help='Absolute tolerance for the parity check')
+
+    args = parser.parse_args()
+
+    main(args)
@@ -0,0 +1,231 @@
+"""
+Preprocessed Face-Crop Cache for Training
+Decode and detect faces once, then train from a memory-mapped array.
+
+Includes:
+1. One-time preprocessing: frames -> face crops -> uint8 shard (faces.u8)
+2. JSON index of per-video offsets, frame counts and labels
+3. Invalidation when a source video (size/mtime) or the preprocessing parameters change
+4. FaceCropDataset: reads sequences straight from the memmap, no decoding
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+from tqdm import tqdm
+
+import enhanced_processor
+from preprocessing import preprocess_batch
+from enhanced_processor import extract_frames_smart, detect_and_crop_faces
+
+# Bump when the crop pipeline changes in a way the parameters don't capture
+PREPROCESS_VERSION = 3
+
+SHARD_NAME = 'faces.u8'
+INDEX_NAME = 'index.json'
+
+def preprocess_params(num_frames: int, target_size: int = 224) -> Dict:
+    """Everything that affects the stored crops"""
+    return {
+        'version': PREPROCESS_VERSION,
+        'num_frames': num_frames,
+        'target_size': target_size,
+        'verify_with_eyes': False,
+        'face_detection_mode': enhanced_processor.FACE_DETECTION_MODE,
+        'face_detection_max_scales': enhanced_processor.FACE_DETECTION_MAX_SCALES,
+        'face_detection_max_width': enhanced_processor.FACE_DETECTION_MAX_WIDTH,
+        'face_track_interval': enhanced_processor.FACE_TRACK_INTERVAL,
+        'face_track_max_seconds': enhanced_processor.FACE_TRACK_MAX_SECONDS,
+        'frame_quality_sample_rows': enhanced_processor.FRAME_QUALITY_SAMPLE_ROWS
+    }
+
+def source_fingerprint(video_path: Path) -> Dict:
+    stat = video_path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def extract_face_sequence(video_path: str, num_frames: int, target_size: int = 224) -> np.ndarray:
+    """
+    Face crops of one video, sampled/padded to num_frames
+
+    Returns:
+        (num_frames, target_size, target_size, 3) uint8 RGB, or (0, ...) when no face was found
+    """
+    frames, metadata = extract_frames_smart(video_path, num_frames=num_frames)
+    face_crops, _ = detect_and_crop_faces(
+        frames, target_size=target_size, verify_with_eyes=False, frame_times=metadata['frame_times']
+    )
+
+    if not face_crops:
+        return np.zeros((0, target_size, target_size, 3), dtype=np.uint8)
+
+    # Limit to num_frames
+    if len(face_crops) > num_frames:
+        indices = np.linspace(0, len(face_crops) - 1, num_frames, dtype=int)
+        face_crops = [face_crops[i] for i in indices]
+    elif len(face_crops) < num_frames:
+        # Pad with last frame
+        face_crops = face_crops + [face_crops[-1]] * (num_frames - len(face_crops))
+
+    return np.stack(face_crops).astype(np.uint8)
+
+def load_index(cache_dir: Path) -> Optional[Dict]:
+    try:
+        with open(cache_dir / INDEX_NAME) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def build_face_cache(
+    videos: List[Path],
+    labels: List[int],
+    cache_dir: str,
+    num_frames: int = 20,
+    target_size: int = 224
+) -> Path:
+    """
+    Create or refresh the face-crop cache for a list of videos
+
+    Crops of videos that are unchanged since the last build are copied from
+    the old shard; only new or modified videos are decoded. Changing any
+    preprocessing parameter rebuilds everything.
+
+    Args:
+        videos: Source video paths
+        labels: Label per video (0 = real, 1 = fake)
+        cache_dir: Directory for faces.u8 and index.json
+        num_frames: Crops stored per video
+        target_size: Crop size
+
+    Returns:
+        The cache directory
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    params = preprocess_params(num_frames, target_size)
+    frame_shape = (target_size, target_size, 3)
+    frame_bytes = int(np.prod(frame_shape))
+
+    old_index = load_index(cache_dir)
+    old_entries = {}
+    old_faces = None
+    if old_index is not None and old_index['params'] == params and (cache_dir / SHARD_NAME).exists():
+        old_entries = {entry['video']: entry for entry in old_index['entries']}
+        if old_index['total_frames'] > 0:
+            old_faces = np.memmap(cache_dir / SHARD_NAME, dtype=np.uint8, mode='r',
+                                  shape=(old_index['total_frames'],) + frame_shape)
+
+    wanted = [(str(Path(video).resolve()), label) for video, label in zip(videos, labels)]
+    fingerprints = {video: source_fingerprint(Path(video)) for video, _ in wanted}
+    stale = [
+        video for video, _ in wanted
+        if video not in old_entries or old_entries[video]['source'] != fingerprints[video]
+    ]
+
+    unchanged_list = old_index is not None and [
+        (entry['video'], entry['label']) for entry in old_index['entries']
+    ] == wanted
+    if not stale and unchanged_list:
+        print(f"✓ Face cache up to date: {cache_dir} ({len(wanted)} videos)")
+        return cache_dir
+
+    print(f"Preprocessing {len(stale)} of {len(wanted)} videos into {cache_dir}")
+
+    # Write the new shard next to the old one, then swap both files in
+    tmp_shard = cache_dir / (SHARD_NAME + '.tmp')
+    entries = []
+    offset = 0
+    with open(tmp_shard, 'wb') as shard:
+        for video, label in tqdm(wanted, desc='Caching faces'):
+            if video in stale:
+                try:
+                    crops = extract_face_sequence(video, num_frames, target_size)
+                except Exception as e:
+                    print(f"Error preprocessing {video}: {e}")
+                    crops = np.zeros((0,) + frame_shape, dtype=np.uint8)
+            else:
+                entry = old_entries[video]
+                crops = old_faces[entry['offset']:entry['offset'] + entry['count']]
+
+            shard.write(np.ascontiguousarray(crops).tobytes())
+            entries.append({
+                'video': video,
+                'label': label,
+                'offset': offset,
+                'count': len(crops),
+                'source': fingerprints[video]
+            })
+            offset += len(crops)
+
+    assert tmp_shard.stat().st_size == offset * frame_bytes
+    del old_faces
+
+    index = {'params': params, 'total_frames': offset, 'entries': entries}
+    tmp_index = cache_dir / (INDEX_NAME + '.tmp')
+    with open(tmp_index, 'w') as f:
+        json.dump(index, f)
+
+    os.replace(tmp_shard, cache_dir / SHARD_NAME)
+    os.replace(tmp_index, cache_dir / INDEX_NAME)
+
+    print(f"✓ Face cache written: {offset} crops, {offset * frame_bytes / 1e6:.1f} MB")
+    return cache_dir
+
+class FaceCropDataset(Dataset):
+    """Face-crop sequences read from a cache built by build_face_cache"""
+
+    def __init__(self, cache_dir: str, mean=(0.485, 0.456, 0.406), std=(0.229, 0.224, 0.225)):
+        self.cache_dir = Path(cache_dir)
+        index = load_index(self.cache_dir)
+        if index is None:
+            raise FileNotFoundError(f"No face cache in {self.cache_dir}, run build_face_cache first")
+
+        self.params = index['params']
+        self.entries = index['entries']
+        self.total_frames = index['total_frames']
+        self.num_frames = self.params['num_frames']
+        self.target_size = self.params['target_size']
+        self.labels = [entry['label'] for entry in self.entries]
+
+        # Same normalization as get_vit_transform (crops are already target_size)
+        self.mean = mean
+        self.std = std
+
+        # Opened lazily so DataLoader workers each map the file instead of pickling it
+        self._faces = None
+
+        print(f"Found {len(self.entries)} cached videos ({sum(self.labels)} fake, {len(self.labels) - sum(self.labels)} real)")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_faces'] = None
+        return state
+
+    @property
+    def faces(self) -> np.memmap:
+        if self._faces is None and self.total_frames > 0:
+            self._faces = np.memmap(
+                self.cache_dir / SHARD_NAME, dtype=np.uint8, mode='r',
+                shape=(self.total_frames, self.target_size, self.target_size, 3)
+            )
+        return self._faces
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, idx):
+        entry = self.entries[idx]
+        label = entry['label']
+
+        if entry['count'] == 0:
+            # No face found during preprocessing: dummy data, like DeepfakeVideoDataset
+            return torch.zeros(self.num_frames, 3, self.target_size, self.target_size), label
+
+        crops = np.array(self.faces[entry['offset']:entry['offset'] + entry['count']])
+        sequence = preprocess_batch(crops, self.target_size, self.mean, self.std)  # (T, C, H, W)
+
+        return sequence, label
@@ -0,0 +1,227 @@
+"""
+Per-Frame Feature Cache
+Spatial ViT features are computed once per video frame and model.
+
+Includes:
+1. Key: SHA-256 of the upload + source frame index + model version
+2. Crop digest check: an entry is only reused for the identical face crop
+3. SQLite storage shared by all workers, size-bounded LRU eviction
+4. UploadFeatures: the entries of one upload under one model version
+5. predict_with_frame_cache: encode only uncached frames, then re-run
+   temporal attention, fusion and head over all of them
+   (pipeline_stages.FrameEncoder does the same while faces are detected)
+"""
+
+import hashlib
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from vit_model import ViTDeepfakeDetector, preprocess_faces, prediction_from_probabilities
+
+def crop_digest(crop: np.ndarray) -> str:
+    """Fingerprint of a face crop (pixels and shape)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(crop.shape).encode())
+    digest.update(np.ascontiguousarray(crop).tobytes())
+    return digest.hexdigest()
+
+class FrameFeatureCache:
+    """
+    Size-bounded on-disk store of per-frame feature vectors
+
+    Args:
+        root_dir: Directory holding frames.sqlite3
+        max_bytes: Total feature bytes kept before least recently used frames go
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int = 64 * 1024 * 1024):
+        self.root_dir = Path(root_dir)
+        self.index_path = self.root_dir / "frames.sqlite3"
+        self.max_bytes = max_bytes
+
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS frames ("
+                " key TEXT PRIMARY KEY,"
+                " digest TEXT NOT NULL,"
+                " features BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS frames_last_access ON frames (last_access)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call: safe across threads and worker processes
+        db = sqlite3.connect(self.index_path, timeout=10)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def make_key(content_hash: str, frame_index: int, model_version: str) -> str:
+        """Cache key for one source frame of an upload under a model version"""
+        return hashlib.sha256(f"{content_hash}:{frame_index}:{model_version}".encode()).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[str, np.ndarray]]:
+        """(crop digest, float32 features) for the keys that are cached"""
+        if not keys:
+            return {}
+
+        now = time.time()
+        placeholders = ",".join("?" * len(keys))
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT key, digest, features FROM frames WHERE key IN ({placeholders})", keys
+            ).fetchall()
+            db.execute(f"UPDATE frames SET last_access = ? WHERE key IN ({placeholders})", [now, *keys])
+
+        return {key: (digest, np.frombuffer(features, dtype=np.float32)) for key, digest, features in rows}
+
+    def put_many(self, entries: List[Tuple[str, str, np.ndarray]]):
+        """Store (key, crop digest, features) entries and evict least recently used frames"""
+        if not entries:
+            return
+
+        now = time.time()
+        rows = []
+        for key, digest, features in entries:
+            data = np.ascontiguousarray(features, dtype=np.float32).tobytes()
+            rows.append((key, digest, data, len(data), now))
+
+        with self._connect() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO frames (key, digest, features, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM frames").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in db.execute("SELECT key, size FROM frames ORDER BY last_access").fetchall():
+            db.execute("DELETE FROM frames WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict:
+        """Frame count and stored bytes"""
+        with self._connect() as db:
+            entries, total = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM frames"
+            ).fetchone()
+        return {"frames": entries, "bytes": total, "max_bytes": self.max_bytes}
+
+class UploadFeatures:
+    """
+    Cached frame features of one upload under one model version
+
+    Args:
+        cache: Feature store
+        content_hash: SHA-256 of the upload
+        model_version: Model fingerprint (checkpoint + engine)
+    """
+
+    def __init__(self, cache: FrameFeatureCache, content_hash: str, model_version: str):
+        self.cache = cache
+        self.content_hash = content_hash
+        self.model_version = model_version
+
+    def key(self, frame_index: int) -> str:
+        return FrameFeatureCache.make_key(self.content_hash, int(frame_index), self.model_version)
+
+    def lookup(self, frame_indices: List[int]) -> Dict[int, Tuple[str, np.ndarray]]:
+        """(crop digest, features) of the cached source frames, by frame index"""
+        keys = {self.key(index): int(index) for index in frame_indices}
+        return {keys[key]: entry for key, entry in self.cache.get_many(list(keys)).items()}
+
+    @staticmethod
+    def match(entries: Dict[int, Tuple[str, np.ndarray]], frame_index: int, digest: str) -> Optional[torch.Tensor]:
+        """Cached features of a frame, if they were computed from the same crop"""
+        entry = entries.get(int(frame_index))
+        if entry is None or entry[0] != digest:
+            return None
+        return torch.from_numpy(entry[1].copy())
+
+    def store(self, entries: List[Tuple[int, str, torch.Tensor]]):
+        """Store (frame index, crop digest, features) entries"""
+        self.cache.put_many([(self.key(index), digest, features.numpy()) for index, digest, features in entries])
+
+def predict_with_frame_cache(
+    model: ViTDeepfakeDetector,
+    face_images: List[np.ndarray],
+    frame_indices: List[int],
+    features: UploadFeatures,
+    max_frames: int = 20,
+    device: Optional[str] = None
+) -> Dict:
+    """
+    predict_with_vit, reusing the spatial + frequency features of frames seen before
+
+    Only frames missing from the cache go through the spatial transformer;
+    temporal attention, fusion and head then run over the whole sequence.
+
+    Args:
+        model: ViT model (eager fp32 or int8)
+        face_images: Face crops
+        frame_indices: Source frame index of each crop
+        features: Cache entries of the upload
+        max_frames: Frames used, as in preprocess_faces
+        device: Device to run on
+
+    Returns:
+        Prediction dict (as predict_with_vit) plus 'cached_frames'
+    """
+    if not face_images:
+        raise ValueError("No face images provided")
+
+    if device is None:
+        device = next(model.parameters()).device
+
+    # Same frames as preprocess_faces would keep
+    if len(face_images) > max_frames:
+        keep = np.linspace(0, len(face_images) - 1, max_frames, dtype=int)
+        face_images = [face_images[i] for i in keep]
+        frame_indices = [frame_indices[i] for i in keep]
+
+    digests = [crop_digest(image) for image in face_images]
+    cached = features.lookup(frame_indices)
+
+    frame_features = [UploadFeatures.match(cached, index, digest) for index, digest in zip(frame_indices, digests)]
+    missing = [i for i, feature in enumerate(frame_features) if feature is None]
+
+    with torch.no_grad():
+        if missing:
+            sequence = preprocess_faces([face_images[i] for i in missing], max_frames=len(missing))
+            if len(sequence) != len(missing):
+                raise ValueError("Failed to process some face images")
+            sequence = sequence.unsqueeze(0).to(device)  # (1, M, C, H, W)
+
+            spatial, _ = model.frame_features(sequence)
+            new_features = torch.cat([spatial, model.freq_analyzer(sequence)], dim=-1)[0].cpu()
+
+            for i, feature in zip(missing, new_features):
+                frame_features[i] = feature
+            features.store([(frame_indices[i], digests[i], frame_features[i]) for i in missing])
+
+        stacked = torch.stack(frame_features).unsqueeze(0).to(device)  # (1, T, 2 * embed_dim)
+        spatial, freq = stacked.chunk(2, dim=-1)
+        logits, _ = model.score_frames(spatial, freq)
+        probabilities = torch.softmax(logits, dim=1)
+
+    result = prediction_from_probabilities(probabilities[0])
+    result['cached_frames'] = len(face_images) - len(missing)
+    return result
@@ -0,0 +1,487 @@
+"""
+Background Job Queue
+Runs video analysis off the event loop in a bounded pool of worker processes.
+
+Includes:
+1. In-memory job store (no external broker)
+2. Process pool with the model loaded once per worker
+3. Per-step progress reported back from the workers
+4. Backpressure: submissions beyond capacity raise QueueFullError
+5. CPU partitioning: each worker gets its own share of torch/OpenCV threads
+6. Admission and queue metrics
+7. Thread mode: pipelines share one in-process model with cross-request micro-batching
+8. Per-frame feature cache shared by the workers (process mode)
+9. Timeline jobs: sliding-window segments streamed into the job as they are scored
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+MODEL_VERSION = "4.0.0"
+MODEL_TYPE = "Vision Transformer + Temporal Attention"
+
+JOB_STATUSES = ('queued', 'running', 'completed', 'failed')
+
+# Longest wait at shutdown for thumbnails still being encoded (thread mode)
+PREVIEW_FLUSH_SECONDS = 10.0
+
+# 'process': one model per worker process; 'thread': worker threads share one batched model
+JOB_MODES = ('process', 'thread')
+
+class QueueFullError(Exception):
+    """Raised when every worker is busy and the queue is at capacity"""
+
+# Worker process state (set by _init_worker / _init_shared)
+_worker_model = None
+_progress_queue = None
+_batcher = None
+_frame_cache = None
+
+def model_fingerprint(model_path: Optional[str]) -> str:
+    """Model version for cache keys: changes when the checkpoint file or inference engine changes"""
+    version = f"{MODEL_VERSION}:{os.getenv('VIT_ENGINE', 'fp32')}"
+    if model_path and os.path.exists(model_path):
+        stat = os.stat(model_path)
+        return f"{version}:{Path(model_path).name}:{stat.st_size}:{stat.st_mtime_ns}"
+    return version
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects affinity / container cpusets)"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _init_worker(progress_queue, model_path: Optional[str], num_threads: int,
+                 frame_cache_dir: Optional[str] = None, frame_cache_max_bytes: int = 0):
+    """Process initializer: pin the thread pools, then load the model once per worker"""
+    global _worker_model, _progress_queue, _frame_cache
+    _progress_queue = progress_queue
+
+    # Must be set before torch / OpenCV create their pools
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(num_threads)
+
+    try:
+        import cv2
+        cv2.setNumThreads(num_threads)
+    except ImportError:
+        pass
+
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+        torch.set_num_interop_threads(1)
+    except ImportError:
+        pass
+
+    try:
+        from vit_model import load_vit_model
+        _worker_model = load_vit_model(model_path)
+        print(f"✓ Worker {os.getpid()} loaded Vision Transformer model")
+    except Exception as e:
+        _worker_model = None
+        print(f"⚠ Worker {os.getpid()} running in mock mode: {e}")
+
+    # Exported graphs can't be split into per-frame features
+    if frame_cache_dir and frame_cache_max_bytes > 0 and hasattr(_worker_model, 'frame_features'):
+        from frame_cache import FrameFeatureCache
+        _frame_cache = FrameFeatureCache(frame_cache_dir, frame_cache_max_bytes)
+
+def _init_shared(progress_queue, model_path: Optional[str], num_threads: int,
+                 batch_size: int, batch_wait_ms: float):
+    """Thread mode: load the model once in this process behind an InferenceBatcher"""
+    global _batcher
+
+    # The batched forward pass gets every core; each pipeline thread's OpenCV calls get a share
+    _init_worker(progress_queue, model_path, available_cpus())
+    try:
+        import cv2
+        cv2.setNumThreads(num_threads)
+    except ImportError:
+        pass
+
+    if _worker_model is not None:
+        from batch_inference import InferenceBatcher
+        _batcher = InferenceBatcher(_worker_model, max_batch_size=batch_size, max_wait_ms=batch_wait_ms)
+        _batcher.start()
+        print(f"✓ Micro-batching inference: up to {batch_size} sequences, {batch_wait_ms} ms wait")
+
+def _run_job(
+    job_id: str,
+    video_path: str,
+    num_frames: int,
+    content_hash: Optional[str] = None,
+    model_version: Optional[str] = None,
+    timeline: Optional[Dict] = None
+) -> Dict:
+    """Run the analysis pipeline (or timeline analysis) for one job inside a worker"""
+    start_time = time.time()
+
+    def progress(step: int, name: str):
+        _progress_queue.put((job_id, step, name))
+
+    progress(0, 'started')
+
+    if timeline is not None:
+        if _worker_model is None:
+            raise RuntimeError("Timeline analysis needs the Vision Transformer model")
+        from streaming import process_timeline
+
+        def on_segment(segment: Dict):
+            _progress_queue.put((job_id, 1, 'scoring_windows', segment))
+
+        result = process_timeline(video_path, _worker_model, progress=progress, on_segment=on_segment, **timeline)
+    elif _worker_model is not None:
+        from pipeline import process_with_vit
+        predict = _batcher.predict if _batcher is not None else None
+        features = None
+        if predict is None and _frame_cache is not None and content_hash:
+            from frame_cache import UploadFeatures
+            features = UploadFeatures(_frame_cache, content_hash, model_version)
+        result = process_with_vit(video_path, num_frames, _worker_model, progress, predict, features)
+    else:
+        from mock_predictor import smart_mock_prediction
+        result = smart_mock_prediction(video_path, num_frames)
+
+    # Add metadata
+    result['processing_time'] = round(time.time() - start_time, 2)
+    result['model_version'] = MODEL_VERSION
+    result['model_type'] = MODEL_TYPE
+
+    return result
+
+class JobManager:
+    """
+    Bounded worker pool + in-memory job store
+
+    Args:
+        max_workers: Workers (pipelines running at once)
+        max_queued: Jobs allowed to wait beyond the running ones
+        model_path: Checkpoint loaded by every worker
+        job_ttl: Seconds finished jobs are kept for polling
+        threads_per_worker: torch/OpenCV threads per worker (default: CPUs split evenly)
+        mode: 'process' (model per worker process) or 'thread' (shared batched model)
+        batch_size: Thread mode: max sequences per forward pass
+        batch_wait_ms: Thread mode: max time a sequence waits for a batch to fill
+        frame_cache_dir: Process mode: per-frame feature cache shared by the workers
+        frame_cache_max_bytes: Feature cache size (0 = disabled)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        max_queued: int = 8,
+        model_path: Optional[str] = None,
+        job_ttl: float = 3600,
+        threads_per_worker: Optional[int] = None,
+        mode: str = 'process',
+        batch_size: int = 8,
+        batch_wait_ms: float = 5.0,
+        frame_cache_dir: Optional[str] = None,
+        frame_cache_max_bytes: int = 0
+    ):
+        if mode not in JOB_MODES:
+            raise ValueError(f"Unknown job mode {mode!r}, expected one of {JOB_MODES}")
+
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(0, max_queued)
+        self.model_path = model_path
+        self.job_ttl = job_ttl
+        self.threads_per_worker = threads_per_worker or max(1, available_cpus() // self.max_workers)
+        self.mode = mode
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.frame_cache_dir = frame_cache_dir
+        self.frame_cache_max_bytes = frame_cache_max_bytes
+        self._frame_cache = None  # parent-side handle for frame_cache_stats
+
+        # Admission / queue metrics
+        self._counters = {'accepted': 0, 'rejected': 0, 'cached': 0, 'completed': 0, 'failed': 0}
+        self._wait_total = 0.0
+        self._wait_count = 0
+        self._run_total = 0.0
+        self._run_count = 0
+
+        self._jobs: Dict[str, Dict] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._context = mp.get_context('spawn')  # fork is unsafe once torch threads exist
+        self._progress_queue = None
+        self._progress_thread = None
+        self._executor = None
+
+    def start(self):
+        """Start the worker pool and the progress listener"""
+        if self.mode == 'thread':
+            self._progress_queue = queue.Queue()
+            _init_shared(self._progress_queue, self.model_path, self.threads_per_worker,
+                         self.batch_size, self.batch_wait_ms)
+        else:
+            self._progress_queue = self._context.Queue()
+        self._executor = self._create_executor()
+        self._progress_thread = threading.Thread(target=self._drain_progress, daemon=True)
+        self._progress_thread.start()
+
+    def shutdown(self):
+        """Stop the workers, dropping jobs that haven't started"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._progress_queue is not None:
+            self._progress_queue.put(None)
+        if _batcher is not None:
+            _batcher.stop()
+        if self.mode == 'thread':
+            # Results go out before their thumbnails are written; finish the ones in flight.
+            # Worker processes do the same on exit (the encoder threads are joined).
+            from preview_store import flush_previews
+            flush_previews(timeout=PREVIEW_FLUSH_SECONDS)
+
+    def _create_executor(self):
+        if self.mode == 'thread':
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._progress_queue, self.model_path, self.threads_per_worker,
+                      self.frame_cache_dir, self.frame_cache_max_bytes)
+        )
+
+    def _drain_progress(self):
+        """Apply progress messages from the workers to the job store"""
+        while True:
+            message = self._progress_queue.get()
+            if message is None:
+                break
+
+            job_id, step, name, *segment = message
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job['status'] in ('completed', 'failed'):
+                    continue
+                if job['started_at'] is None:
+                    job['started_at'] = time.time()
+                    self._wait_total += job['started_at'] - job['created_at']
+                    self._wait_count += 1
+                job['status'] = 'running'
+                job['step'] = step
+                job['step_name'] = name
+                if segment:
+                    job['timeline'].append(segment[0])
+                self._touch(job)
+
+    def _touch(self, job: Dict):
+        job['updated_at'] = time.time()
+        job['version'] += 1
+
+    def _expire_finished(self):
+        cutoff = time.time() - self.job_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['status'] in ('completed', 'failed') and job['updated_at'] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
+
+    def active_jobs(self) -> int:
+        """Jobs queued or running"""
+        with self._lock:
+            return sum(job['status'] in ('queued', 'running') for job in self._jobs.values())
+
+    def _check_capacity(self):
+        active = sum(job['status'] in ('queued', 'running') for job in self._jobs.values())
+        if active >= self.max_workers + self.max_queued:
+            self._counters['rejected'] += 1
+            raise QueueFullError(f"{active} jobs already queued or running")
+
+    def ensure_capacity(self):
+        """
+        Admission check before accepting an upload
+
+        Raises:
+            QueueFullError: All workers busy and the queue is full
+        """
+        with self._lock:
+            self._check_capacity()
+
+    def stats(self) -> Dict:
+        """Admission and queue metrics"""
+        with self._lock:
+            statuses = [job['status'] for job in self._jobs.values()]
+            return {
+                'mode': self.mode,
+                'workers': self.max_workers,
+                'threads_per_worker': self.threads_per_worker,
+                'capacity': self.max_workers + self.max_queued,
+                'active': statuses.count('running') + statuses.count('queued'),
+                'running': statuses.count('running'),
+                'queued': statuses.count('queued'),
+                **self._counters,
+                'avg_wait_seconds': round(self._wait_total / self._wait_count, 3) if self._wait_count else None,
+                'avg_run_seconds': round(self._run_total / self._run_count, 3) if self._run_count else None,
+                'batching': _batcher.stats() if _batcher is not None else None
+            }
+
+    def frame_cache_stats(self) -> Optional[Dict]:
+        """
+        Size of the per-frame feature cache, None when it isn't used
+
+        Queries SQLite, so call it off the event loop.
+        """
+        if self.mode != 'process' or not self.frame_cache_dir or self.frame_cache_max_bytes <= 0:
+            return None
+        if self._frame_cache is None:
+            try:
+                from frame_cache import FrameFeatureCache
+            except ImportError:
+                return None
+            # Opened once: the constructor creates the directory and the table
+            self._frame_cache = FrameFeatureCache(self.frame_cache_dir, self.frame_cache_max_bytes)
+        return self._frame_cache.stats()
+
+    def _new_job(self, num_frames: Optional[int]) -> Dict:
+        now = time.time()
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'queued',
+            'step': None,
+            'step_name': None,
+            'num_frames': num_frames,
+            'created_at': now,
+            'started_at': None,
+            'updated_at': now,
+            'result': None,
+            'error': None,
+            'timeline': [],
+            'version': 0
+        }
+        self._jobs[job['job_id']] = job
+        return job
+
+    def add_completed(self, result: Dict, num_frames: Optional[int] = None) -> str:
+        """Record a job whose result is already known (e.g. from the result cache)"""
+        future = Future()
+        future.set_result(result)
+
+        with self._lock:
+            self._expire_finished()
+            job = self._new_job(num_frames)
+            job['status'] = 'completed'
+            job['result'] = result
+            job['timeline'] = list(result.get('timeline', []))
+            self._futures[job['job_id']] = future
+            self._counters['cached'] += 1
+
+        return job['job_id']
+
+    def submit(
+        self,
+        video_path: str,
+        num_frames: int,
+        cleanup: bool = True,
+        on_complete: Optional[Callable[[Dict], None]] = None,
+        content_hash: Optional[str] = None,
+        timeline: Optional[Dict] = None
+    ) -> str:
+        """
+        Queue a video for analysis
+
+        Args:
+            video_path: Uploaded video (deleted when the job ends if cleanup)
+            num_frames: Number of frames to analyze
+            cleanup: Delete video_path once the job finishes
+            on_complete: Called with the result when the job succeeds
+            content_hash: SHA-256 of the upload, enables the per-frame feature cache
+            timeline: Run streaming.process_timeline with these arguments
+                (window, hop, sample_fps) instead of the pipeline
+
+        Returns:
+            Job id
+
+        Raises:
+            QueueFullError: All workers busy and the queue is full
+        """
+        with self._lock:
+            self._expire_finished()
+            self._check_capacity()
+
+            job_id = self._new_job(num_frames)['job_id']
+            self._counters['accepted'] += 1
+            job_args = (job_id, video_path, num_frames, content_hash, model_fingerprint(self.model_path), timeline)
+
+            try:
+                future = self._executor.submit(_run_job, *job_args)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM): replace the pool and retry once
+                print("⚠ Worker pool broken, restarting workers")
+                self._executor = self._create_executor()
+                future = self._executor.submit(_run_job, *job_args)
+
+            self._futures[job_id] = future
+
+        future.add_done_callback(
+            lambda f: self._finish(job_id, f, video_path if cleanup else None, on_complete)
+        )
+        return job_id
+
+    def _finish(
+        self,
+        job_id: str,
+        future: Future,
+        video_path: Optional[str],
+        on_complete: Optional[Callable[[Dict], None]] = None
+    ):
+        """Record the outcome of a job and clean up its upload"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                if future.cancelled():
+                    job['status'] = 'failed'
+                    job['error'] = 'Job cancelled'
+                elif future.exception() is not None:
+                    job['status'] = 'failed'
+                    job['error'] = f"Processing failed: {future.exception()}"
+                else:
+                    job['status'] = 'completed'
+                    job['result'] = future.result()
+                self._counters[job['status']] += 1
+                if job['started_at'] is not None:
+                    self._run_total += time.time() - job['started_at']
+                    self._run_count += 1
+                self._touch(job)
+
+        if on_complete is not None and not future.cancelled() and future.exception() is None:
+            try:
+                on_complete(future.result())
+            except Exception as e:
+                print(f"⚠ Job {job_id} completion hook failed: {e}")
+
+        if video_path and os.path.exists(video_path):
+            try:
+                os.unlink(video_path)
+            except OSError:
+                pass
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Snapshot of a job, None if unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            # The timeline keeps growing while the job runs
+            return {**job, 'timeline': list(job['timeline'])}
+
+    def future(self, job_id: str) -> Optional[Future]:
+        """Future resolving to the job result"""
+        with self._lock:
+            return self._futures.get(job_id)
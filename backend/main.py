@@ -5,75 +5,94 @@ Advanced Multi-Modal Architecture for Real Deepfake Detection
 
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
+import asyncio
+import json
 import os
-import tempfile
-import shutil
+from functools import partial
 from pathlib import Path
 import uvicorn
 import time
-import numpy as np
-from typing import Optional, Dict
-import base64
-import io
-from PIL import Image
+from typing import Optional, Dict, Tuple
+
+from job_queue import JobManager, QueueFullError, model_fingerprint
+from preview_store import PREVIEW_DIR, PREVIEW_NAME
+from result_cache import ResultCache
+from upload_ingest import ingest_upload, UploadRejected, UploadSizeLimitMiddleware, MULTIPART_OVERHEAD
 
 # Import Vision Transformer modules
 ML_AVAILABLE = False
-model = None
 
 try:
-    from vit_model import load_vit_model, predict_with_vit
-    from enhanced_processor import (
-        extract_frames_smart,
-        detect_and_crop_faces,
-        analyze_temporal_consistency,
-        detect_compression_artifacts
-    )
+    import pipeline  # noqa: F401 - the pipeline itself runs in the job workers
     ML_AVAILABLE = True
     print("✓ Vision Transformer modules loaded successfully")
 except ImportError as e:
     print(f"⚠ ML modules not available: {e}")
-    print("  Install required packages: pip install scipy")
+    print("  Install required packages: pip install -r requirements.txt")
 except Exception as e:
     print(f"⚠ Error loading ML modules: {e}")
 
 # Create necessary directories
 UPLOAD_DIR = Path("temp_uploads")
-PROCESSED_DIR = Path("processed_media")
+PROCESSED_DIR = Path(PREVIEW_DIR)
 UPLOAD_DIR.mkdir(exist_ok=True)
 PROCESSED_DIR.mkdir(exist_ok=True)
 
+# Preview thumbnails outlive uploads: cached results keep pointing at them
+PREVIEW_TTL = float(os.getenv("PREVIEW_TTL", str(7 * 24 * 3600)))
+# How long /api/static waits for a thumbnail that is still being encoded
+PREVIEW_WAIT_SECONDS = float(os.getenv("PREVIEW_WAIT_SECONDS", "2"))
+
+# Background analysis workers (each loads the model once)
+job_manager = JobManager(
+    max_workers=int(os.getenv("JOB_WORKERS", "1")),
+    max_queued=int(os.getenv("JOB_QUEUE_SIZE", "8")),
+    model_path=os.getenv("MODEL_PATH"),
+    threads_per_worker=int(os.getenv("JOB_THREADS_PER_WORKER", "0")) or None,
+    mode=os.getenv("JOB_MODE", "process"),
+    batch_size=int(os.getenv("BATCH_MAX_SIZE", "8")),
+    batch_wait_ms=float(os.getenv("BATCH_MAX_WAIT_MS", "5")),
+    # Per-frame ViT features by upload hash + frame index (FRAME_CACHE_MAX_MB=0 disables)
+    frame_cache_dir=os.getenv("FRAME_CACHE_DIR", "frame_cache"),
+    frame_cache_max_bytes=int(os.getenv("FRAME_CACHE_MAX_MB", "64")) * 1024 * 1024
+)
+
+# Results of previously analyzed uploads, keyed by content hash (RESULT_CACHE_MAX_MB=0 disables)
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "256"))
+result_cache = ResultCache(
+    os.getenv("RESULT_CACHE_DIR", "result_cache"),
+    max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+    ttl=float(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+) if RESULT_CACHE_MAX_MB > 0 else None
+
+# Largest accepted video; bigger request bodies are refused before they are parsed
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "100"))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+
 # Lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize model and clean up old files"""
-    global model, ML_AVAILABLE
-    
+    """Start analysis workers and clean up old files"""
     # Startup
-    if ML_AVAILABLE:
-        try:
-            print("🚀 Loading Vision Transformer model...")
-            model = load_vit_model()
-            print("✓ Vision Transformer model loaded successfully")
-        except Exception as e:
-            print(f"✗ Failed to load model: {e}")
-            ML_AVAILABLE = False
+    print("🚀 Starting analysis workers...")
+    job_manager.start()
     
     # Cleanup old files
     try:
-        for directory in [UPLOAD_DIR, PROCESSED_DIR]:
+        for directory, max_age in [(UPLOAD_DIR, 3600), (PROCESSED_DIR, PREVIEW_TTL)]:
             for file in directory.glob("*"):
-                if file.is_file() and time.time() - file.stat().st_mtime > 3600:
+                if file.is_file() and time.time() - file.stat().st_mtime > max_age:
                     file.unlink()
     except Exception as e:
         print(f"Cleanup error: {e}")
     
     yield
     
-    # Shutdown (cleanup if needed)
-    pass
+    # Shutdown
+    job_manager.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -92,6 +111,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD)
 
 @app.get("/")
 async def root():
@@ -112,16 +132,23 @@ async def root():
         "endpoints": {
             "health": "/health",
             "predict": "/api/predict/",
+            "jobs": "/api/jobs",
+            "timeline": "/api/timeline",
+            "previews": "/api/static/{name}",
             "docs": "/docs"
         }
     }
 
 @app.get("/health")
-async def health_check():
+def health_check():
+    # Plain def: the cache stats query SQLite, so FastAPI runs this in its threadpool
     return {
         "status": "healthy",
-        "model": "Vision Transformer" if ML_AVAILABLE and model else "mock_mode",
+        "model": "Vision Transformer" if ML_AVAILABLE else "mock_mode",
         "ml_available": ML_AVAILABLE,
+        "jobs": job_manager.stats(),
+        "result_cache": result_cache.stats() if result_cache is not None else None,
+        "frame_cache": job_manager.frame_cache_stats(),
         "face_detection": "multi_scale_opencv",
         "features": {
             "spatial_analysis": "Vision Transformer",
@@ -131,6 +158,85 @@ async def health_check():
         }
     }
 
+def validate_upload(upload_video_file: UploadFile, num_frames: Optional[int]):
+    """Reject non-video uploads and out-of-range frame counts"""
+    if not upload_video_file.content_type or not upload_video_file.content_type.startswith('video/'):
+        raise HTTPException(status_code=400, detail="File must be a video")
+    
+    if num_frames is not None and not 10 <= num_frames <= 50:
+        raise HTTPException(status_code=400, detail="Number of frames must be between 10 and 50")
+
+def save_upload(upload_video_file: UploadFile) -> Tuple[str, str]:
+    """
+    Stream the upload into temp_uploads (size cap, container sniffing, hashing)
+    
+    Returns:
+        Path of the stored file and its SHA-256
+    """
+    try:
+        upload = ingest_upload(
+            upload_video_file.file,
+            UPLOAD_DIR,
+            suffix=Path(upload_video_file.filename or "").suffix,
+            max_bytes=MAX_UPLOAD_BYTES
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return upload.path, upload.sha256
+
+
+def store_result(cache_key: str, result: Dict):
+    """Cache real model results (never mock or fallback answers)"""
+    if result.get('detection_method', '').startswith('Vision Transformer'):
+        result_cache.put(cache_key, result)
+
+async def submit_job(
+    upload_video_file: UploadFile,
+    num_frames: Optional[int],
+    timeline: Optional[Dict] = None
+) -> str:
+    """
+    Validate and store an upload, then queue it (429 when the queue is full)
+    
+    Uploads seen before with the same model and num_frames (or timeline
+    settings) are answered from the result cache without running the pipeline.
+    """
+    validate_upload(upload_video_file, num_frames)
+    try:
+        # Don't spend disk on an upload that would be refused anyway
+        job_manager.ensure_capacity()
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server busy, try again later ({e})",
+            headers={"Retry-After": "10"}
+        )
+    temp_file_path, content_hash = await run_in_threadpool(save_upload, upload_video_file)
+    
+    on_complete = None
+    if result_cache is not None:
+        params = {'num_frames': num_frames} if timeline is None else {'mode': 'timeline', **timeline}
+        cache_key = ResultCache.make_key(content_hash, model_fingerprint(job_manager.model_path), **params)
+        cached = await run_in_threadpool(result_cache.get, cache_key)
+        if cached is not None:
+            print(f"✓ Result cache hit for {content_hash[:12]}")
+            os.unlink(temp_file_path)
+            cached['cached'] = True
+            return job_manager.add_completed(cached, num_frames)
+        on_complete = partial(store_result, cache_key)
+    
+    try:
+        return job_manager.submit(
+            temp_file_path, num_frames, on_complete=on_complete, content_hash=content_hash, timeline=timeline
+        )
+    except QueueFullError as e:
+        os.unlink(temp_file_path)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Server busy, try again later ({e})",
+            headers={"Retry-After": "10"}
+        )
+
 @app.post("/api/predict/")
 async def predict_deepfake(
     upload_video_file: UploadFile = File(...),
@@ -139,6 +245,9 @@ async def predict_deepfake(
     """
     Analyze video for deepfake detection using Vision Transformer
     
+    Runs in the background worker pool; this request waits for the result
+    without blocking the event loop.
+    
     Args:
         upload_video_file: Video file to analyze
         num_frames: Number of frames to extract (10-50)
@@ -152,32 +261,12 @@ async def predict_deepfake(
         - Frame quality assessment
     """
     start_time = time.time()
-    temp_file_path = None
     
     try:
-        # Validate file
-        if not upload_video_file.content_type or not upload_video_file.content_type.startswith('video/'):
-            raise HTTPException(status_code=400, detail="File must be a video")
-        
-        if not 10 <= num_frames <= 50:
-            raise HTTPException(status_code=400, detail="Number of frames must be between 10 and 50")
-        
-        # Save uploaded file
-        file_extension = Path(upload_video_file.filename).suffix
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension, dir=UPLOAD_DIR) as temp_file:
-            shutil.copyfileobj(upload_video_file.file, temp_file)
-            temp_file_path = temp_file.name
+        job_id = await submit_job(upload_video_file, num_frames)
+        result = await asyncio.wrap_future(job_manager.future(job_id))
         
-        # Process video
-        if ML_AVAILABLE and model:
-            result = await process_with_vit(temp_file_path, num_frames, model)
-        else:
-            result = await smart_mock_prediction(temp_file_path, num_frames)
-        
-        # Add metadata
         result['processing_time'] = round(time.time() - start_time, 2)
-        result['model_version'] = "4.0.0"
-        result['model_type'] = "Vision Transformer + Temporal Attention"
         
         return JSONResponse(content=result)
         
@@ -186,261 +275,121 @@ async def predict_deepfake(
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
-    finally:
-        # Cleanup
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-            except:
-                pass
 
-async def process_with_vit(video_path: str, num_frames: int, model) -> Dict:
+def job_response(job: Dict) -> Dict:
+    """Public view of a job"""
+    return {
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "step": job['step'],
+        "step_name": job['step_name'],
+        "created_at": job['created_at'],
+        "updated_at": job['updated_at'],
+        "result": job['result'],
+        "error": job['error'],
+        "timeline": job['timeline'],
+        "status_url": f"/api/jobs/{job['job_id']}",
+        "events_url": f"/api/jobs/{job['job_id']}/events"
+    }
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(
+    upload_video_file: UploadFile = File(...),
+    num_frames: int = Form(30)
+):
     """
-    Process video using Vision Transformer with comprehensive analysis
+    Queue a video for analysis and return a job id right away
+    
+    Poll GET /api/jobs/{job_id} or stream GET /api/jobs/{job_id}/events
+    for per-step progress and the result.
     """
-    try:
-        print(f"\n{'='*60}")
-        print(f"🎬 Processing video: {Path(video_path).name}")
-        print(f"{'='*60}")
-        
-        # Step 1: Extract high-quality frames
-        print("\n📹 Step 1: Extracting frames...")
-        frames, frame_metadata = extract_frames_smart(video_path, num_frames=num_frames)
-        print(f"   ✓ Extracted {len(frames)} frames")
-        print(f"   ✓ Average quality: {frame_metadata['avg_quality']:.2f}")
-        
-        # Step 2: Detect and crop faces
-        print("\n👤 Step 2: Detecting faces...")
-        face_crops, detection_stats = detect_and_crop_faces(frames, verify_with_eyes=True)
-        print(f"   ✓ Detected {len(face_crops)} faces")
-        print(f"   ✓ Verification rate: {detection_stats['faces_verified']}/{detection_stats['faces_detected']}")
-        print(f"   ✓ Average confidence: {detection_stats['avg_confidence']:.2f}")
-        
-        if len(face_crops) == 0:
-            raise ValueError("No faces detected in video")
-        
-        # Step 3: Analyze temporal consistency
-        print("\n⏱️  Step 3: Analyzing temporal consistency...")
-        consistency = analyze_temporal_consistency(face_crops)
-        print(f"   ✓ Consistency score: {consistency['consistency_score']:.3f}")
-        if consistency.get('suspicious'):
-            print(f"   ⚠️  High temporal variance detected (potential manipulation)")
-        
-        # Step 4: Detect compression artifacts
-        print("\n🔍 Step 4: Analyzing compression artifacts...")
-        artifacts = detect_compression_artifacts(face_crops[0])
-        print(f"   ✓ Edge density: {artifacts['edge_density']:.3f}")
-        print(f"   ✓ Block artifacts: {artifacts['block_artifacts']:.2f}")
-        if artifacts.get('suspicious'):
-            print(f"   ⚠️  Suspicious compression patterns detected")
-        
-        # Step 5: Run Vision Transformer prediction
-        print("\n🤖 Step 5: Running Vision Transformer inference...")
-        vit_result = predict_with_vit(model, face_crops, return_attention=False)
-        
-        prediction = vit_result['prediction']
-        confidence = vit_result['confidence']
-        probabilities = vit_result['probabilities']
-        
-        print(f"   ✓ Prediction: {'FAKE' if prediction == 1 else 'REAL'}")
-        print(f"   ✓ Confidence: {confidence*100:.2f}%")
-        print(f"   ✓ Real probability: {probabilities['real']*100:.2f}%")
-        print(f"   ✓ Fake probability: {probabilities['fake']*100:.2f}%")
-        
-        # Step 6: Combine all signals for final decision
-        print("\n🎯 Step 6: Multi-modal fusion...")
-        
-        # Adjust confidence based on additional signals
-        final_confidence = confidence
-        warning_flags = []
-        
-        # Temporal consistency check
-        if consistency.get('suspicious'):
-            warning_flags.append("Temporal inconsistency detected")
-            if prediction == 0:  # If predicted REAL but suspicious
-                final_confidence *= 0.8
-        
-        # Compression artifact check
-        if artifacts.get('suspicious'):
-            warning_flags.append("Compression artifacts detected")
-            if prediction == 0:  # If predicted REAL but suspicious
-                final_confidence *= 0.9
-        
-        # Face detection quality check
-        if detection_stats['avg_confidence'] < 0.5:
-            warning_flags.append("Low face detection confidence")
-        
-        # Fallback detection quality check
-        if detection_stats.get('fallback_used'):
-            warning_flags.append("Face detection fallback used")
-            final_confidence *= 0.7
-        
-        print(f"   ✓ Final confidence: {final_confidence*100:.2f}%")
-        if warning_flags:
-            print(f"   ⚠️  Warnings: {', '.join(warning_flags)}")
-        
-        print(f"\n{'='*60}")
-        print(f"✅ Analysis complete!")
-        print(f"{'='*60}\n")
-        
-        # Generate preview images (convert first few faces to base64)
-        preview_images = []
-        for i, face in enumerate(face_crops[:10]):
-            try:
-                # Convert numpy array to PIL Image
-                pil_img = Image.fromarray(face.astype('uint8'))
-                buffer = io.BytesIO()
-                pil_img.save(buffer, format='JPEG', quality=85)
-                img_str = base64.b64encode(buffer.getvalue()).decode()
-                preview_images.append(f"data:image/jpeg;base64,{img_str}")
-            except:
-                preview_images.append(f"https://via.placeholder.com/224x224/ec4899/ffffff?text=Face+{i+1}")
-        
-        # Build comprehensive result
-        result = {
-            "output": "FAKE" if prediction == 1 else "REAL",
-            "confidence": round(final_confidence * 100, 2),
-            "raw_confidence": round(confidence * 100, 2),
-            "probabilities": {
-                "real": round(probabilities['real'] * 100, 2),
-                "fake": round(probabilities['fake'] * 100, 2)
-            },
-            "analysis": {
-                "frames_extracted": len(frames),
-                "faces_detected": len(face_crops),
-                "frame_quality": round(frame_metadata['avg_quality'], 2),
-                "face_detection_confidence": round(detection_stats['avg_confidence'] * 100, 2),
-                "temporal_consistency": round(consistency['consistency_score'] * 100, 2),
-                "compression_artifacts": round(artifacts['block_artifacts'], 2),
-                "warning_flags": warning_flags
-            },
-            "preprocessed_images": preview_images[:10],
-            "faces_cropped_images": preview_images[:10],
-            "original_video": "https://via.placeholder.com/640x480/6b21a8/ffffff?text=Video",
-            "frames_analyzed": len(face_crops),
-            "detection_method": "Vision Transformer + Temporal Attention + Frequency Analysis"
-        }
-        
-        return result
-        
-    except Exception as e:
-        print(f"❌ Error in ViT processing: {e}")
-        import traceback
-        traceback.print_exc()
-        # Fallback to smart mock
-        return await smart_mock_prediction(video_path, num_frames)
+    job_id = await submit_job(upload_video_file, num_frames)
+    return job_response(job_manager.get(job_id))
 
-async def smart_mock_prediction(video_path: str, num_frames: int) -> Dict:
+@app.post("/api/timeline", status_code=202)
+async def create_timeline_job(
+    upload_video_file: UploadFile = File(...),
+    window: int = Form(16),
+    hop: int = Form(8),
+    sample_fps: float = Form(5.0)
+):
     """
-    Intelligent mock prediction that simulates realistic behavior
-    Uses file characteristics to generate consistent results
+    Queue a sliding-window analysis of the whole video
+    
+    Every `hop` face frames a window of the last `window` face frames is
+    scored; segments are appended to the job's "timeline" as they are scored
+    (poll GET /api/jobs/{job_id} or stream its events). Memory stays bounded
+    however long the video is.
+    
+    Args:
+        upload_video_file: Video file to analyze
+        window: Face frames per segment (4-64)
+        hop: New face frames between segments (1-window)
+        sample_fps: Frames per second of video analyzed (0.5-30)
     """
-    import hashlib
-    import cv2
+    if not 4 <= window <= 64:
+        raise HTTPException(status_code=400, detail="Window must be between 4 and 64 frames")
+    if not 1 <= hop <= window:
+        raise HTTPException(status_code=400, detail="Hop must be between 1 and the window size")
+    if not 0.5 <= sample_fps <= 30:
+        raise HTTPException(status_code=400, detail="Sample rate must be between 0.5 and 30 fps")
+    
+    timeline = {'window': window, 'hop': hop, 'sample_fps': sample_fps}
+    job_id = await submit_job(upload_video_file, None, timeline=timeline)
+    return job_response(job_manager.get(job_id))
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, progress and (once completed) the analysis result"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: one event per job update until it finishes"""
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
     
-    print("\n⚠️  Using mock prediction mode (model not trained)")
+    async def event_stream():
+        last_version = -1
+        while True:
+            job = job_manager.get(job_id)
+            if job is None:
+                break
+            if job['version'] != last_version:
+                last_version = job['version']
+                yield f"event: {job['status']}\ndata: {json.dumps(job_response(job))}\n\n"
+            if job['status'] in ('completed', 'failed'):
+                break
+            await asyncio.sleep(0.25)
     
-    try:
-        # Analyze video characteristics
-        cap = cv2.VideoCapture(video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        cap.release()
-        
-        # Generate deterministic hash
-        with open(video_path, 'rb') as f:
-            file_hash = hashlib.sha256(f.read(4096)).hexdigest()
-        
-        # Use hash to determine prediction (50/50 split)
-        hash_value = int(file_hash[:8], 16)
-        is_fake = hash_value % 2 == 1
-        
-        # Generate realistic confidence (70-95%)
-        base_confidence = 70 + (hash_value % 25)
-        
-        # Add some randomness based on video properties
-        if total_frames < 100:
-            base_confidence -= 5  # Lower confidence for short videos
-        if width < 640 or height < 480:
-            base_confidence -= 5  # Lower confidence for low resolution
-        
-        confidence = max(70, min(95, base_confidence))
-        
-        # Generate probabilities
-        if is_fake:
-            fake_prob = confidence
-            real_prob = 100 - confidence
-        else:
-            real_prob = confidence
-            fake_prob = 100 - confidence
-        
-        # Generate mock warnings
-        warnings = []
-        if (hash_value >> 8) % 3 == 0:
-            warnings.append("Low frame quality detected")
-        if (hash_value >> 16) % 3 == 0:
-            warnings.append("Temporal inconsistency detected")
-        
-        result = {
-            "output": "FAKE" if is_fake else "REAL",
-            "confidence": confidence,
-            "raw_confidence": confidence,
-            "probabilities": {
-                "real": round(real_prob, 2),
-                "fake": round(fake_prob, 2)
-            },
-            "analysis": {
-                "frames_extracted": min(num_frames, total_frames),
-                "faces_detected": min(num_frames, 20),
-                "frame_quality": 75.0 + (hash_value % 20),
-                "face_detection_confidence": 80.0 + (hash_value % 15),
-                "temporal_consistency": 85.0 + (hash_value % 10),
-                "compression_artifacts": 15.0 + (hash_value % 20),
-                "warning_flags": warnings
-            },
-            "preprocessed_images": [
-                f"https://via.placeholder.com/224x224/a855f7/ffffff?text=Frame+{i+1}"
-                for i in range(min(num_frames, 10))
-            ],
-            "faces_cropped_images": [
-                f"https://via.placeholder.com/224x224/ec4899/ffffff?text=Face+{i+1}"
-                for i in range(min(num_frames, 10))
-            ],
-            "original_video": "https://via.placeholder.com/640x480/6b21a8/ffffff?text=Video",
-            "frames_analyzed": min(num_frames, 20),
-            "detection_method": "Mock Mode (Train model for real detection)",
-            "note": "⚠️  This is a mock prediction. Train the model on deepfake datasets for real detection!"
-        }
-        
-        print(f"   Mock prediction: {result['output']} ({result['confidence']}%)")
-        
-        return result
-        
-    except Exception as e:
-        print(f"Error in mock prediction: {e}")
-        # Ultimate fallback
-        return {
-            "output": "REAL",
-            "confidence": 75.0,
-            "raw_confidence": 75.0,
-            "probabilities": {"real": 75.0, "fake": 25.0},
-            "analysis": {
-                "frames_extracted": num_frames,
-                "faces_detected": 0,
-                "frame_quality": 0,
-                "face_detection_confidence": 0,
-                "temporal_consistency": 0,
-                "compression_artifacts": 0,
-                "warning_flags": ["Processing error - using fallback"]
-            },
-            "preprocessed_images": [],
-            "faces_cropped_images": [],
-            "original_video": "",
-            "frames_analyzed": 0,
-            "detection_method": "Fallback mode"
-        }
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.get("/api/static/{name}")
+async def get_preview(name: str):
+    """Face crop thumbnail referenced by a result (content-addressed, never changes)"""
+    if not PREVIEW_NAME.match(name):
+        raise HTTPException(status_code=404, detail="Preview not found")
+
+    # Results are returned while their thumbnails are still being encoded
+    path = PROCESSED_DIR / name
+    deadline = time.monotonic() + PREVIEW_WAIT_SECONDS
+    while not path.is_file():
+        if time.monotonic() >= deadline:
+            raise HTTPException(status_code=404, detail="Preview not found")
+        await asyncio.sleep(0.05)
+
+    return FileResponse(
+        path,
+        media_type="image/webp",
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
@@ -0,0 +1,119 @@
+"""
+Mock Predictor
+Deterministic stand-in result used when the model is unavailable or the
+Vision Transformer pipeline fails.
+"""
+
+from typing import Dict
+import hashlib
+
+def smart_mock_prediction(video_path: str, num_frames: int) -> Dict:
+    """
+    Intelligent mock prediction that simulates realistic behavior
+    Uses file characteristics to generate consistent results
+    """
+    import cv2
+    
+    print("\n⚠️  Using mock prediction mode (model not trained)")
+    
+    try:
+        # Analyze video characteristics
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        cap.release()
+        
+        # Generate deterministic hash
+        with open(video_path, 'rb') as f:
+            file_hash = hashlib.sha256(f.read(4096)).hexdigest()
+        
+        # Use hash to determine prediction (50/50 split)
+        hash_value = int(file_hash[:8], 16)
+        is_fake = hash_value % 2 == 1
+        
+        # Generate realistic confidence (70-95%)
+        base_confidence = 70 + (hash_value % 25)
+        
+        # Add some randomness based on video properties
+        if total_frames < 100:
+            base_confidence -= 5  # Lower confidence for short videos
+        if width < 640 or height < 480:
+            base_confidence -= 5  # Lower confidence for low resolution
+        
+        confidence = max(70, min(95, base_confidence))
+        
+        # Generate probabilities
+        if is_fake:
+            fake_prob = confidence
+            real_prob = 100 - confidence
+        else:
+            real_prob = confidence
+            fake_prob = 100 - confidence
+        
+        # Generate mock warnings
+        warnings = []
+        if (hash_value >> 8) % 3 == 0:
+            warnings.append("Low frame quality detected")
+        if (hash_value >> 16) % 3 == 0:
+            warnings.append("Temporal inconsistency detected")
+        
+        result = {
+            "output": "FAKE" if is_fake else "REAL",
+            "confidence": confidence,
+            "raw_confidence": confidence,
+            "probabilities": {
+                "real": round(real_prob, 2),
+                "fake": round(fake_prob, 2)
+            },
+            "analysis": {
+                "frames_extracted": min(num_frames, total_frames),
+                "faces_detected": min(num_frames, 20),
+                "frame_quality": 75.0 + (hash_value % 20),
+                "face_detection_confidence": 80.0 + (hash_value % 15),
+                "temporal_consistency": 85.0 + (hash_value % 10),
+                "compression_artifacts": 15.0 + (hash_value % 20),
+                "warning_flags": warnings
+            },
+            "preprocessed_images": [
+                f"https://via.placeholder.com/224x224/a855f7/ffffff?text=Frame+{i+1}"
+                for i in range(min(num_frames, 10))
+            ],
+            "faces_cropped_images": [
+                f"https://via.placeholder.com/224x224/ec4899/ffffff?text=Face+{i+1}"
+                for i in range(min(num_frames, 10))
+            ],
+            "original_video": "https://via.placeholder.com/640x480/6b21a8/ffffff?text=Video",
+            "frames_analyzed": min(num_frames, 20),
+            "detection_method": "Mock Mode (Train model for real detection)",
+            "note": "⚠️  This is a mock prediction. Train the model on deepfake datasets for real detection!"
+        }
+        
+        print(f"   Mock prediction: {result['output']} ({result['confidence']}%)")
+        
+        return result
+        
+    except Exception as e:
+        print(f"Error in mock prediction: {e}")
+        # Ultimate fallback
+        return {
+            "output": "REAL",
+            "confidence": 75.0,
+            "raw_confidence": 75.0,
+            "probabilities": {"real": 75.0, "fake": 25.0},
+            "analysis": {
+                "frames_extracted": num_frames,
+                "faces_detected": 0,
+                "frame_quality": 0,
+                "face_detection_confidence": 0,
+                "temporal_consistency": 0,
+                "compression_artifacts": 0,
+                "warning_flags": ["Processing error - using fallback"]
+            },
+            "preprocessed_images": [],
+            "faces_cropped_images": [],
+            "original_video": "",
+            "frames_analyzed": 0,
+            "detection_method": "Fallback mode"
+        }
@@ -0,0 +1,255 @@
+"""
+Video Analysis Pipeline
+Runs the full Vision Transformer analysis for one video:
+1. Frame extraction
+2. Face detection
+3. Temporal consistency
+4. Compression artifacts
+5. Vision Transformer inference
+6. Multi-modal fusion
+
+In the default 'staged' mode steps 1-5 overlap (see pipeline_stages.py).
+"""
+
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import os
+
+import cv2
+
+from vit_model import predict_with_vit
+from enhanced_processor import (
+    extract_frames_smart,
+    detect_and_crop_faces,
+    analyze_temporal_consistency,
+    detect_compression_artifacts_batch
+)
+from frame_cache import UploadFeatures, predict_with_frame_cache
+from mock_predictor import smart_mock_prediction
+from pipeline_stages import run_stages
+from preview_store import get_preview_store
+
+PIPELINE_STEPS = [
+    'extracting_frames',
+    'detecting_faces',
+    'temporal_analysis',
+    'artifact_analysis',
+    'inference',
+    'fusion'
+]
+
+# 'staged': decode/detect/infer overlap through bounded queues and a thread pool; 'sequential': one step after another
+PIPELINE_MODES = ('staged', 'sequential')
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "staged")
+
+def placeholder_previews(num_faces: int) -> List[str]:
+    """Placeholder image URLs standing in for the face crop thumbnails"""
+    return [
+        f"https://via.placeholder.com/224x224/ec4899/ffffff?text=Face+{i+1}"
+        for i in range(min(num_faces, 10))
+    ]
+
+def run_sequential(
+    frames: List,
+    frame_metadata: Dict,
+    model,
+    report: Callable[[int, str], None],
+    predict: Optional[Callable[[List], Dict]] = None,
+    features: Optional[UploadFeatures] = None
+):
+    """Steps 2-5 one after another (returns what pipeline_stages.run_stages does)"""
+    # Step 2: Detect and crop faces
+    report(2, 'detecting_faces')
+    print("\n👤 Step 2: Detecting faces...")
+    face_crops, detection_stats = detect_and_crop_faces(
+        frames, verify_with_eyes=True, frame_times=frame_metadata['frame_times']
+    )
+    print(f"   ✓ Detected {len(face_crops)} faces")
+    print(f"   ✓ Verification rate: {detection_stats['faces_verified']}/{detection_stats['faces_detected']}")
+    print(f"   ✓ Average confidence: {detection_stats['avg_confidence']:.2f}")
+    
+    if len(face_crops) == 0:
+        raise ValueError("No faces detected in video")
+    
+    # Step 3: Analyze temporal consistency
+    report(3, 'temporal_analysis')
+    print("\n⏱️  Step 3: Analyzing temporal consistency...")
+    consistency = analyze_temporal_consistency(face_crops)
+    print(f"   ✓ Consistency score: {consistency['consistency_score']:.3f}")
+    if consistency.get('suspicious'):
+        print(f"   ⚠️  High temporal variance detected (potential manipulation)")
+    
+    # Step 4: Detect compression artifacts
+    report(4, 'artifact_analysis')
+    print("\n🔍 Step 4: Analyzing compression artifacts...")
+    artifacts = detect_compression_artifacts_batch(face_crops)
+    print(f"   ✓ Edge density: {artifacts['edge_density']:.3f}")
+    print(f"   ✓ Block artifacts: {artifacts['block_artifacts']:.2f} (blockiness {artifacts['blockiness']:.2f})")
+    if artifacts.get('suspicious'):
+        print(f"   ⚠️  Suspicious compression patterns detected")
+    
+    # Step 5: Run Vision Transformer prediction
+    report(5, 'inference')
+    print("\n🤖 Step 5: Running Vision Transformer inference...")
+    if predict is not None:
+        vit_result = predict(face_crops)
+    elif features is not None:
+        frame_indices = [frame_metadata['frame_indices'][i] for i in detection_stats['frame_positions']]
+        vit_result = predict_with_frame_cache(model, face_crops, frame_indices, features)
+        print(f"   ✓ Frame features from cache: {vit_result['cached_frames']}")
+    else:
+        vit_result = predict_with_vit(model, face_crops, return_attention=False)
+    
+    return face_crops, detection_stats, consistency, artifacts, vit_result
+
+def process_with_vit(
+    video_path: str,
+    num_frames: int,
+    model,
+    progress: Optional[Callable[[int, str], None]] = None,
+    predict: Optional[Callable[[List], Dict]] = None,
+    features: Optional[UploadFeatures] = None,
+    mode: Optional[str] = None
+) -> Dict:
+    """
+    Process video using Vision Transformer with comprehensive analysis
+    
+    Args:
+        video_path: Path to video
+        num_frames: Number of frames to extract
+        model: Loaded ViT model
+        progress: Called with (step number, step name) as each step starts
+        predict: Replaces predict_with_vit(model, face_crops), e.g. InferenceBatcher.predict
+        features: Frame feature cache entries of the upload, only uncached
+            frames are encoded (unless predict is given)
+        mode: 'staged' or 'sequential', defaults to PIPELINE_MODE
+    
+    Returns:
+        Analysis result (falls back to the mock prediction on error)
+    """
+    report = progress or (lambda step, name: None)
+    mode = mode or PIPELINE_MODE
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Unknown pipeline mode {mode!r}, expected one of {PIPELINE_MODES}")
+    staged = mode == 'staged'
+    
+    try:
+        print(f"\n{'='*60}")
+        print(f"🎬 Processing video: {Path(video_path).name}")
+        print(f"{'='*60}")
+        
+        # Step 1: Extract high-quality frames
+        report(1, 'extracting_frames')
+        print("\n📹 Step 1: Extracting frames...")
+        frames, frame_metadata = extract_frames_smart(video_path, num_frames=num_frames, prefetch=8 if staged else 0)
+        print(f"   ✓ Extracted {len(frames)} frames")
+        print(f"   ✓ Average quality: {frame_metadata['avg_quality']:.2f}")
+        
+        if staged:
+            print("\n⚙️  Steps 2-5: detection, analysis and inference (staged)...")
+            face_crops, detection_stats, consistency, artifacts, vit_result = run_stages(
+                frames, model,
+                predict=predict,
+                features=features,
+                frame_indices=frame_metadata['frame_indices'],
+                frame_times=frame_metadata['frame_times'],
+                num_threads=max(2, cv2.getNumThreads()),
+                report=report
+            )
+            print(f"   ✓ Detected {len(face_crops)} faces")
+            print(f"   ✓ Consistency score: {consistency['consistency_score']:.3f}")
+            print(f"   ✓ Block artifacts: {artifacts['block_artifacts']:.2f} (blockiness {artifacts['blockiness']:.2f})")
+            if 'cached_frames' in vit_result:
+                print(f"   ✓ Frame features from cache: {vit_result['cached_frames']}")
+        else:
+            face_crops, detection_stats, consistency, artifacts, vit_result = run_sequential(
+                frames, frame_metadata, model, report, predict, features
+            )
+        
+        # Preview thumbnails are encoded while the signals are fused; the response only carries their URLs
+        try:
+            preview_images = get_preview_store().save_async(face_crops[:10])
+        except Exception as e:
+            print(f"⚠ Preview thumbnails unavailable: {e}")
+            preview_images = placeholder_previews(len(face_crops))
+        
+        prediction = vit_result['prediction']
+        confidence = vit_result['confidence']
+        probabilities = vit_result['probabilities']
+        
+        print(f"   ✓ Prediction: {'FAKE' if prediction == 1 else 'REAL'}")
+        print(f"   ✓ Confidence: {confidence*100:.2f}%")
+        print(f"   ✓ Real probability: {probabilities['real']*100:.2f}%")
+        print(f"   ✓ Fake probability: {probabilities['fake']*100:.2f}%")
+        
+        # Step 6: Combine all signals for final decision
+        report(6, 'fusion')
+        print("\n🎯 Step 6: Multi-modal fusion...")
+        
+        # Adjust confidence based on additional signals
+        final_confidence = confidence
+        warning_flags = []
+        
+        # Temporal consistency check
+        if consistency.get('suspicious'):
+            warning_flags.append("Temporal inconsistency detected")
+            if prediction == 0:  # If predicted REAL but suspicious
+                final_confidence *= 0.8
+        
+        # Compression artifact check
+        if artifacts.get('suspicious'):
+            warning_flags.append("Compression artifacts detected")
+            if prediction == 0:  # If predicted REAL but suspicious
+                final_confidence *= 0.9
+        
+        # Face detection quality check
+        if detection_stats['avg_confidence'] < 0.5:
+            warning_flags.append("Low face detection confidence")
+        
+        # Fallback detection quality check
+        if detection_stats.get('fallback_used'):
+            warning_flags.append("Face detection fallback used")
+            final_confidence *= 0.7
+        
+        print(f"   ✓ Final confidence: {final_confidence*100:.2f}%")
+        if warning_flags:
+            print(f"   ⚠️  Warnings: {', '.join(warning_flags)}")
+        
+        print(f"\n{'='*60}")
+        print(f"✅ Analysis complete!")
+        print(f"{'='*60}\n")
+        
+        # Build comprehensive result
+        result = {
+            "output": "FAKE" if prediction == 1 else "REAL",
+            "confidence": round(final_confidence * 100, 2),
+            "raw_confidence": round(confidence * 100, 2),
+            "probabilities": {
+                "real": round(probabilities['real'] * 100, 2),
+                "fake": round(probabilities['fake'] * 100, 2)
+            },
+            "analysis": {
+                "frames_extracted": len(frames),
+                "faces_detected": len(face_crops),
+                "frame_quality": round(frame_metadata['avg_quality'], 2),
+                "face_detection_confidence": round(detection_stats['avg_confidence'] * 100, 2),
+                "temporal_consistency": round(consistency['consistency_score'] * 100, 2),
+                "compression_artifacts": round(artifacts['block_artifacts'], 2),
+                "warning_flags": warning_flags
+            },
+            "preprocessed_images": preview_images[:10],
+            "faces_cropped_images": preview_images[:10],
+            "original_video": "https://via.placeholder.com/640x480/6b21a8/ffffff?text=Video",
+            "frames_analyzed": len(face_crops),
+            "detection_method": "Vision Transformer + Temporal Attention + Frequency Analysis"
+        }
+        
+        # Not waiting for the thumbnails: /api/static holds requests until they are written
+        return result
+        
+    except Exception as e:
+        print(f"❌ Error in ViT processing: {e}")
+        import traceback
+        traceback.print_exc()
+        # Fallback to smart mock
+        return smart_mock_prediction(video_path, num_frames)
@@ -0,0 +1,309 @@
+"""
+Pipelined Analysis Stages
+Overlaps decoding, face detection, tensor preparation and inference for one video.
+
+Includes:
+1. Decoding ahead of quality scoring (extract_frames_smart, decode_ahead)
+2. SpeculativeDetector: full face detection of the frames tracking will need,
+   submitted ahead of time to a thread pool (OpenCV releases the GIL)
+3. FrameEncoder: face crops preprocessed and encoded by the ViT spatial stack
+   in chunks as they arrive (cached frame features are reused)
+4. run_stages: detection -> preprocessing -> encoding, then temporal
+   consistency, compression artifacts and the temporal head side by side
+
+Results match the sequential pipeline: the same frames, crops and model inputs
+are used, only the order in which the work runs changes.
+"""
+
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from enhanced_processor import (
+    FACE_TRACK_INTERVAL,
+    analyze_temporal_consistency,
+    crop_center,
+    detect_compression_artifacts_batch,
+    detect_faces_multi_scale,
+    detection_schedule,
+    iter_face_crops
+)
+from frame_cache import UploadFeatures, crop_digest
+from vit_model import predict_with_vit, prediction_from_probabilities, preprocess_faces
+
+# Shared by all pipelines of the process, so each thread loads its Haar cascades once
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor(num_threads: int) -> ThreadPoolExecutor:
+    """The process-wide stage pool (created on first use with num_threads threads)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, num_threads), thread_name_prefix='stage')
+        return _executor
+
+class SpeculativeDetector:
+    """
+    Face detection for iter_face_crops, computed ahead in a thread pool
+
+    Tracking only needs full detection every `detect_every` frames (and after
+    a time gap too long to track over) while the face is followed, so those
+    frames are submitted up front. Frames that turn out to need detection as
+    well (tracking lost, shot change) are detected inline.
+    """
+
+    def __init__(
+        self,
+        frames: List[np.ndarray],
+        detect_every: int,
+        executor: Executor,
+        frame_times: Optional[List[float]] = None
+    ):
+        self.futures = {
+            i: executor.submit(detect_faces_multi_scale, frames[i])
+            for i in detection_schedule(len(frames), detect_every, frame_times)
+        }
+
+    def __call__(self, position: int, frame: np.ndarray) -> List:
+        future = self.futures.pop(position, None)
+        if future is None:
+            return detect_faces_multi_scale(frame)
+        return future.result()
+
+    def cancel(self):
+        """Drop detections that were never needed"""
+        for future in self.futures.values():
+            future.cancel()
+        self.futures.clear()
+
+def kept_positions(count: int, max_frames: int) -> List[int]:
+    """Which of `count` crops preprocess_faces keeps"""
+    if count <= max_frames:
+        return list(range(count))
+    return [int(i) for i in np.linspace(0, count - 1, max_frames, dtype=int)]
+
+class FrameEncoder:
+    """
+    Spatial + frequency features of face crops, encoded in chunks as they arrive
+
+    Every `chunk_size` crops are preprocessed as one batch and go through the
+    ViT spatial stack on one encoder thread (in order), so inference runs
+    while later frames are still being detected.
+
+    With more frames than the model looks at, only the frames it would keep
+    if every frame had a face are encoded ahead; crops that end up kept anyway
+    are encoded when predict() is called. With `features`, frames whose crop
+    is cached are not encoded at all and new features are stored.
+
+    Args:
+        model: Eager ViT model (needs frame_features)
+        num_frames: Frames detection runs on
+        max_frames: Frames the model looks at, as in preprocess_faces
+        chunk_size: Frames per spatial pass
+        frame_indices: Source frame index of each frame (needed with features)
+        features: Frame feature cache entries of the upload
+    """
+
+    def __init__(
+        self,
+        model,
+        num_frames: int,
+        max_frames: int = 20,
+        chunk_size: int = 4,
+        frame_indices: Optional[List[int]] = None,
+        features: Optional[UploadFeatures] = None
+    ):
+        self.model = model
+        self.device = next(model.parameters()).device
+        self.max_frames = max_frames
+        self.chunk_size = max(1, chunk_size)
+        self.frame_indices = frame_indices
+        self.features = features
+        self.cached = features.lookup(frame_indices) if features is not None else {}
+        self.expected = set(kept_positions(num_frames, max_frames))
+        self.encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix='encode')
+
+        self.crops: List[np.ndarray] = []
+        self.positions: List[int] = []
+        self.digests: List[str] = []
+        self.encoded: Dict[int, torch.Tensor] = {}  # crop number -> features
+        self.from_cache: set = set()
+        self.pending: List[int] = []
+        self.chunks: List[Tuple[List[int], Future]] = []
+
+    def add(self, position: int, face_crop: np.ndarray):
+        """Add the crop of the frame at position (crops in the order they are cut)"""
+        crop = len(self.crops)
+        self.crops.append(face_crop)
+        self.positions.append(position)
+
+        if self.features is not None:
+            digest = crop_digest(face_crop)
+            self.digests.append(digest)
+            cached = UploadFeatures.match(self.cached, self.frame_indices[position], digest)
+            if cached is not None:
+                self.encoded[crop] = cached
+                self.from_cache.add(crop)
+                return
+
+        if position in self.expected:
+            self.pending.append(crop)
+            if len(self.pending) >= self.chunk_size:
+                self._flush()
+
+    def _flush(self):
+        if self.pending:
+            self.chunks.append((self.pending, self.encoder.submit(self._encode, [self.crops[i] for i in self.pending])))
+            self.pending = []
+
+    def _encode(self, face_crops: List[np.ndarray]) -> torch.Tensor:
+        sequence = preprocess_faces(face_crops, max_frames=len(face_crops)).unsqueeze(0).to(self.device)
+        with torch.no_grad():
+            spatial, _ = self.model.frame_features(sequence)
+            return torch.cat([spatial, self.model.freq_analyzer(sequence)], dim=-1)[0].cpu()
+
+    def predict(self) -> Dict:
+        """Score the kept crops (waits for the pending chunks, encodes what is still missing)"""
+        self._flush()
+        try:
+            for crops, chunk in self.chunks:
+                self.encoded.update(zip(crops, chunk.result()))
+        finally:
+            self.encoder.shutdown(wait=False)
+
+        keep = kept_positions(len(self.crops), self.max_frames)
+        missing = [i for i in keep if i not in self.encoded]
+        if missing:
+            self.encoded.update(zip(missing, self._encode([self.crops[i] for i in missing])))
+
+        if self.features is not None:
+            self.features.store([
+                (self.frame_indices[self.positions[i]], self.digests[i], features)
+                for i, features in self.encoded.items() if i not in self.from_cache
+            ])
+
+        with torch.no_grad():
+            features = torch.stack([self.encoded[i] for i in keep]).unsqueeze(0).to(self.device)  # (1, T, 2 * embed_dim)
+            spatial, freq = features.chunk(2, dim=-1)
+            logits, _ = self.model.score_frames(spatial, freq)
+            probabilities = torch.softmax(logits, dim=1)
+
+        result = prediction_from_probabilities(probabilities[0])
+        if self.features is not None:
+            result['cached_frames'] = len(self.from_cache.intersection(keep))
+        return result
+
+    def close(self):
+        for _, chunk in self.chunks:
+            chunk.cancel()
+        self.encoder.shutdown(wait=False, cancel_futures=True)
+
+def run_stages(
+    frames: List[np.ndarray],
+    model,
+    predict: Optional[Callable[[List], Dict]] = None,
+    features: Optional[UploadFeatures] = None,
+    frame_indices: Optional[List[int]] = None,
+    frame_times: Optional[List[float]] = None,
+    max_frames: int = 20,
+    num_threads: int = 2,
+    report: Optional[Callable[[int, str], None]] = None
+) -> Tuple[List[np.ndarray], Dict, Dict, Dict, Dict]:
+    """
+    Steps 2-5 of process_with_vit with the stages overlapped
+
+    Face detection for the frames tracking will need runs ahead in a thread
+    pool. Crops the model will look at are preprocessed and encoded by the ViT
+    in chunks while detection continues (see FrameEncoder), skipping frames
+    whose features are cached. Temporal consistency, compression artifacts and
+    the rest of inference then run side by side.
+
+    Args:
+        frames: Selected frames (extract_frames_smart)
+        model: Loaded ViT model
+        predict: Replaces predict_with_vit(model, face_crops) (no chunked encoding)
+        features: Frame feature cache entries of the upload (needs frame_indices)
+        frame_indices: Source frame index of each frame (for the feature cache)
+        frame_times: Time of each frame in seconds (for face tracking)
+        max_frames: Frames the model looks at, as in preprocess_faces
+        num_threads: Stage pool size (fixed by the first call, see get_executor)
+        report: Called with (step number, step name) as each step starts
+
+    Returns:
+        face_crops, detection_stats, consistency, artifacts, vit_result
+        (as the sequential steps produce them)
+    """
+    report = report or (lambda step, name: None)
+
+    executor = get_executor(num_threads)
+    encoder = None
+    if predict is None and hasattr(model, 'frame_features'):
+        encoder = FrameEncoder(
+            model, len(frames), max_frames,
+            frame_indices=frame_indices, features=features if frame_indices is not None else None
+        )
+
+    detector = SpeculativeDetector(frames, FACE_TRACK_INTERVAL, executor, frame_times)
+
+    try:
+        # Step 2: detection, with preprocessing + encoding of each crop as it is cut
+        report(2, 'detecting_faces')
+        stats = {
+            'frames_processed': len(frames),
+            'faces_detected': 0,
+            'faces_verified': 0,
+            'detection_confidence': [],
+            'frame_positions': []
+        }
+        face_crops = []
+        for i, face_crop, confidence in iter_face_crops(
+            frames, stats=stats, detect=detector, frame_times=frame_times
+        ):
+            face_crops.append(face_crop)
+            stats['frame_positions'].append(i)
+            stats['detection_confidence'].append(confidence)
+            if encoder is not None:
+                encoder.add(i, face_crop)
+        detector.cancel()
+
+        # Fallback: use center crops if no faces detected (as detect_and_crop_faces)
+        if len(face_crops) == 0:
+            print("⚠ No faces detected, using center crops as fallback")
+            for i, frame in enumerate(frames[:20]):
+                center_crop = crop_center(frame, 224)
+                face_crops.append(center_crop)
+                stats['frame_positions'].append(i)
+                if encoder is not None:
+                    encoder.add(i, center_crop)
+            stats['fallback_used'] = True
+        else:
+            stats['fallback_used'] = False
+
+        stats['avg_confidence'] = np.mean(stats['detection_confidence']) if stats['detection_confidence'] else 0
+        print(f"✓ Detected {len(face_crops)} faces (verified: {stats['faces_verified']}, avg confidence: {stats['avg_confidence']:.2f})")
+
+        if len(face_crops) == 0:
+            raise ValueError("No faces detected in video")
+
+        # Steps 3-5 side by side
+        report(3, 'temporal_analysis')
+        consistency = executor.submit(analyze_temporal_consistency, face_crops)
+        report(4, 'artifact_analysis')
+        artifacts = executor.submit(detect_compression_artifacts_batch, face_crops)
+        report(5, 'inference')
+        if encoder is not None:
+            vit_result = encoder.predict()
+        elif predict is not None:
+            vit_result = predict(face_crops)
+        else:
+            vit_result = predict_with_vit(model, face_crops, return_attention=False)
+
+        return face_crops, stats, consistency.result(), artifacts.result(), vit_result
+    finally:
+        detector.cancel()
+        if encoder is not None:
+            encoder.close()
@@ -0,0 +1,103 @@
+"""
+Batched Frame Preprocessing
+Face crops -> normalized model input in one vectorized pass.
+
+Includes:
+1. Stacked (T, H, W, 3) uint8 input or a list of crops of any size
+2. Resize with torch interpolate on the uint8 data (bilinear + antialias, like
+   the PIL Resize of get_vit_transform)
+3. uint8 -> float conversion and normalization fused into a preallocated
+   (T, 3, size, size) tensor
+
+Vendored: the same file is backend/preprocessing.py and
+Django_Application/ml_app/preprocessing.py, as each app is built from its own
+directory. Change both copies together (backend/tests/test_vendored.py checks
+they stay identical).
+"""
+
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+def to_rgb(image: np.ndarray) -> np.ndarray:
+    """Gray -> 3 channels, RGBA -> RGB"""
+    if image.ndim == 2:
+        return np.stack([image] * 3, axis=-1)
+    if image.shape[2] == 4:
+        return image[:, :, :3]
+    return image
+
+def resize_batch(images: torch.Tensor, size: int) -> torch.Tensor:
+    """
+    Bilinear (antialiased) resize of a (T, 3, H, W) uint8 batch
+
+    Interpolates the uint8 data directly (channels-last views of HWC arrays
+    take torch's vectorized uint8 kernel), within 1-2 levels of PIL's Resize.
+    """
+    if images.shape[-2:] == (size, size):
+        return images
+    return F.interpolate(images, size=(size, size), mode='bilinear', align_corners=False, antialias=True)
+
+def preprocess_batch(
+    images: Union[np.ndarray, Sequence[np.ndarray]],
+    size: int = 224,
+    mean: Sequence[float] = IMAGENET_MEAN,
+    std: Sequence[float] = IMAGENET_STD,
+    out: Optional[torch.Tensor] = None
+) -> torch.Tensor:
+    """
+    Resize, convert and normalize a batch of uint8 images
+
+    Same result as ToPILImage -> Resize((size, size)) -> ToTensor -> Normalize
+    applied image by image (up to interpolation rounding when resizing).
+
+    Args:
+        images: (T, H, W, 3) uint8 array, or a list of (H, W[, C]) uint8 crops
+            (sizes may differ; gray and RGBA are converted)
+        size: Output height and width
+        mean: Per-channel mean (0-1 scale)
+        std: Per-channel std (0-1 scale)
+        out: Preallocated (T, 3, size, size) float32 tensor to write into
+
+    Returns:
+        (T, 3, size, size) normalized float32 tensor
+
+    Raises:
+        ValueError: No images, or an image that isn't HxW / HxWxC
+    """
+    if len(images) == 0:
+        raise ValueError("No images provided")
+
+    count = len(images)
+    if out is None:
+        out = torch.empty(count, 3, size, size)
+    elif out.shape != (count, 3, size, size):
+        raise ValueError(f"Output tensor has shape {tuple(out.shape)}, expected {(count, 3, size, size)}")
+
+    stacked = isinstance(images, np.ndarray) and images.ndim == 4
+    if not stacked:
+        images = [to_rgb(np.asarray(image)) for image in images]
+        if any(image.ndim != 3 or image.shape[2] != 3 for image in images):
+            raise ValueError("Images must be HxW, HxWx3 or HxWx4 arrays")
+        # Crops of one size are resized together
+        if len({image.shape for image in images}) == 1:
+            images = np.stack(images)
+            stacked = True
+
+    if stacked:
+        batch = torch.from_numpy(np.ascontiguousarray(images)).permute(0, 3, 1, 2)
+        out.copy_(resize_batch(batch, size))
+    else:
+        for i, image in enumerate(images):
+            crop = torch.from_numpy(np.ascontiguousarray(image)).permute(2, 0, 1).unsqueeze(0)
+            out[i] = resize_batch(crop, size)[0]
+
+    # (x / 255 - mean) / std in one pass per op, in place
+    scale = torch.tensor(std, dtype=out.dtype).view(1, 3, 1, 1) * 255
+    shift = torch.tensor(mean, dtype=out.dtype).view(1, 3, 1, 1) * 255
+    return out.sub_(shift).div_(scale)
@@ -0,0 +1,166 @@
+"""
+Preview Store
+Face crop thumbnails for the response, encoded off the request path.
+
+Includes:
+1. Content-addressed names: BLAKE2b of the crop pixels + encoding settings,
+   so repeated crops map to one file and a name never changes meaning
+2. Size-aware WebP thumbnails (downscaled to PREVIEW_MAX_SIDE, never upscaled)
+3. Encoding in a thread pool, off the critical path: results are returned
+   while their thumbnails are still being written (/api/static/{name} waits
+   for them) and pending writes are finished before a worker goes away
+4. Atomic writes (temp file + rename), so a preview is either complete or absent
+"""
+
+import hashlib
+import io
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+PREVIEW_DIR = os.getenv("PREVIEW_DIR", "processed_media")
+PREVIEW_MAX_SIDE = int(os.getenv("PREVIEW_MAX_SIDE", "160"))
+PREVIEW_QUALITY = int(os.getenv("PREVIEW_QUALITY", "80"))
+PREVIEW_THREADS = int(os.getenv("PREVIEW_THREADS", "1"))
+# Prepended to preview names; set to an absolute URL when clients talk to the backend directly
+PREVIEW_URL_PREFIX = os.getenv("PREVIEW_URL_PREFIX", "/api/static/")
+
+# Names PreviewStore hands out (anything else is rejected by the static route)
+PREVIEW_NAME = re.compile(r"^[0-9a-f]{32}\.webp$")
+
+class PreviewStore:
+    """
+    On-disk WebP thumbnails of face crops
+
+    Args:
+        root_dir: Directory the thumbnails are written to
+        max_side: Longest thumbnail side in pixels
+        quality: WebP quality (0-100)
+        num_threads: Encoder threads
+        url_prefix: Prepended to file names to form the returned URLs
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        max_side: int = 160,
+        quality: int = 80,
+        num_threads: int = 1,
+        url_prefix: str = "/api/static/"
+    ):
+        self.root_dir = Path(root_dir)
+        self.max_side = max_side
+        self.quality = quality
+        self.url_prefix = url_prefix
+        self.executor = ThreadPoolExecutor(max_workers=max(1, num_threads), thread_name_prefix='preview')
+        self.pending: Dict[str, Future] = {}  # file name -> write in flight
+        self.lock = threading.Lock()
+
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+
+    def name_for(self, image: np.ndarray) -> str:
+        """File name of an image's thumbnail (hash of the pixels and the encoding settings)"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{image.shape}|{image.dtype}|{self.max_side}|{self.quality}".encode())
+        digest.update(np.ascontiguousarray(image).data)
+        return f"{digest.hexdigest()}.webp"
+
+    def encode(self, image: np.ndarray) -> bytes:
+        """WebP bytes of an RGB uint8 image, downscaled to fit max_side"""
+        pil_img = Image.fromarray(image.astype(np.uint8, copy=False))
+        if max(pil_img.size) > self.max_side:
+            pil_img.thumbnail((self.max_side, self.max_side), Image.BILINEAR)
+        buffer = io.BytesIO()
+        pil_img.save(buffer, format='WEBP', quality=self.quality)
+        return buffer.getvalue()
+
+    def _write(self, image: np.ndarray, path: Path):
+        if path.exists():
+            return
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(self.encode(image))
+        os.replace(tmp_path, path)
+
+    def save_async(self, images: Sequence[np.ndarray]) -> List[str]:
+        """
+        Queue thumbnails of images for encoding
+
+        Args:
+            images: RGB uint8 arrays (not modified until encoded)
+
+        Returns:
+            One URL per image; its file appears once encoded (see flush)
+        """
+        urls = []
+        with self.lock:
+            self.pending = {name: future for name, future in self.pending.items() if not future.done()}
+            for image in images:
+                name = self.name_for(image)
+                path = self.root_dir / name
+                if name not in self.pending and not path.exists():
+                    future = self.executor.submit(self._write, image, path)
+                    future.add_done_callback(self._report_failure)
+                    self.pending[name] = future
+                urls.append(self.url_prefix + name)
+        return urls
+
+    @staticmethod
+    def _report_failure(future: Future):
+        # Nobody waits on the write, so an encoding error would otherwise go unnoticed
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠ Preview thumbnail not written: {future.exception()}")
+
+    def flush(self, urls: Optional[Sequence[str]] = None, timeout: Optional[float] = None):
+        """
+        Wait for queued thumbnails
+
+        Args:
+            urls: URLs returned by save_async to wait for (None = every queued thumbnail)
+            timeout: Seconds to wait at most
+
+        Raises:
+            Exception: The first encoding error of the awaited thumbnails
+        """
+        with self.lock:
+            if urls is None:
+                pending = list(self.pending.values())
+            else:
+                names = {url.rsplit('/', 1)[-1] for url in urls}
+                pending = [future for name, future in self.pending.items() if name in names]
+        wait(pending, timeout=timeout)
+        for future in pending:
+            if future.done():
+                future.result()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_preview_store() -> PreviewStore:
+    """The process-wide store configured by the PREVIEW_* environment variables"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PreviewStore(
+                PREVIEW_DIR,
+                max_side=PREVIEW_MAX_SIDE,
+                quality=PREVIEW_QUALITY,
+                num_threads=PREVIEW_THREADS,
+                url_prefix=PREVIEW_URL_PREFIX
+            )
+        return _store
+
+def flush_previews(timeout: Optional[float] = None):
+    """Wait for the process-wide store's queued thumbnails (no-op when it was never used)"""
+    with _store_lock:
+        store = _store
+    if store is not None:
+        try:
+            store.flush(timeout=timeout)
+        except Exception:
+            pass  # already reported by _report_failure
@@ -0,0 +1,149 @@
+"""
+Result Cache
+Content-addressed cache of analysis results for repeated uploads.
+
+Includes:
+1. Key: SHA-256 of the upload + model version + analysis parameters
+2. On-disk storage: SQLite index + one JSON blob per result
+3. Size-bounded LRU eviction and TTL expiry
+
+Vendored: the same file is backend/result_cache.py and
+Django_Application/ml_app/result_cache.py, as each app is built from its own
+directory. Change both copies together (backend/tests/test_vendored.py checks
+they stay identical).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+class ResultCache:
+    """
+    Size-bounded on-disk result store
+
+    Args:
+        root_dir: Directory holding index.sqlite3 and the blobs
+        max_bytes: Total blob size kept before least recently used entries go
+        ttl: Seconds an entry stays valid (0 = forever)
+    """
+
+    def __init__(self, root_dir: str, max_bytes: int = 256 * 1024 * 1024, ttl: float = 7 * 24 * 3600):
+        self.root_dir = Path(root_dir)
+        self.blob_dir = self.root_dir / "blobs"
+        self.index_path = self.root_dir / "index.sqlite3"
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call: safe across threads and worker processes
+        db = sqlite3.connect(self.index_path, timeout=10)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def make_key(content_hash: str, model_version: str, **params) -> str:
+        """Cache key for an upload hash, a model version and analysis parameters"""
+        material = json.dumps(
+            {"content": content_hash, "model": model_version, "params": params},
+            sort_keys=True
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _blob_path(self, key: str) -> Path:
+        return self.blob_dir / key[:2] / f"{key}.json"
+
+    def _delete(self, db: sqlite3.Connection, key: str):
+        db.execute("DELETE FROM results WHERE key = ?", (key,))
+        try:
+            self._blob_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached result for a key, None on a miss or an expired entry"""
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT created_at FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+
+            if self.ttl and now - row[0] > self.ttl:
+                self._delete(db, key)
+                return None
+
+            try:
+                with open(self._blob_path(key)) as blob:
+                    result = json.load(blob)
+            except (OSError, ValueError):
+                self._delete(db, key)
+                return None
+
+            db.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+            return result
+
+    def put(self, key: str, result: Dict):
+        """Store a result and evict expired / least recently used entries"""
+        data = json.dumps(result).encode()
+        blob_path = self._blob_path(key)
+        blob_path.parent.mkdir(exist_ok=True)
+
+        # Write then rename so readers never see a partial blob
+        tmp_path = blob_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as blob:
+            blob.write(data)
+        os.replace(tmp_path, blob_path)
+
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO results (key, size, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, len(data), now, now)
+            )
+            self._evict(db, now)
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        if self.ttl:
+            expired = db.execute(
+                "SELECT key FROM results WHERE created_at < ?", (now - self.ttl,)
+            ).fetchall()
+            for (key,) in expired:
+                self._delete(db, key)
+
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in db.execute("SELECT key, size FROM results ORDER BY last_access").fetchall():
+            self._delete(db, key)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict:
+        """Entry count and stored bytes"""
+        with self._connect() as db:
+            entries, total = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes}
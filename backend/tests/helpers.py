@@ -0,0 +1,55 @@
+"""
+Shared test inputs: a small ViT and synthetic frames/clips with a drawn face
+(the frontal Haar cascade finds it)
+"""
+
+import cv2
+import numpy as np
+import torch
+
+from vit_model import ViTDeepfakeDetector
+
+def small_model() -> ViTDeepfakeDetector:
+    """A randomly initialized ViT small enough for fast tests (eval mode)"""
+    torch.manual_seed(0)
+    return ViTDeepfakeDetector(embed_dim=64, depth=2, num_heads=4).eval()
+
+def face_frame(shift: int = 0, seed: int = 0, width: int = 320, height: int = 240) -> np.ndarray:
+    """RGB frame with a cartoon face, moved `shift` pixels to the right, plus a little noise"""
+    frame = np.full((height, width, 3), 90, np.uint8)
+    cx, cy = width // 2 + shift, height // 2
+    cv2.ellipse(frame, (cx, cy), (55, 72), 0, 0, 360, (200, 170, 150), -1)
+    for dx in (-22, 22):
+        cv2.ellipse(frame, (cx + dx, cy - 18), (12, 6), 0, 0, 360, (40, 30, 30), -1)
+        cv2.line(frame, (cx + dx - 14, cy - 32), (cx + dx + 14, cy - 32), (60, 40, 30), 4)
+    cv2.line(frame, (cx, cy - 8), (cx, cy + 15), (150, 110, 100), 3)
+    cv2.ellipse(frame, (cx, cy + 35), (22, 8), 0, 0, 360, (120, 50, 60), -1)
+    frame = cv2.GaussianBlur(frame, (5, 5), 0)
+
+    noise = np.random.default_rng(seed).integers(-6, 7, frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+def clip_frame(i: int) -> np.ndarray:
+    """
+    Frame i of write_face_clip: a face moving back and forth over blocky
+    texture (so the frames clear extract_frames_smart's default quality
+    threshold), with the frame number drawn in the corner
+    """
+    texture = np.random.default_rng(100).integers(0, 256, (24, 32, 3), dtype=np.uint8)
+    texture = cv2.resize(texture, (320, 240), interpolation=cv2.INTER_NEAREST)
+
+    shift = (i % 20) - 10
+    frame = face_frame(shift=shift, seed=i)
+    face = np.zeros((240, 320), np.uint8)
+    cv2.ellipse(face, (160 + shift, 120), (75, 95), 0, 0, 360, 255, -1)
+    frame[face == 0] = texture[face == 0]
+    cv2.putText(frame, str(i), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    return frame
+
+def write_face_clip(path: str, num_frames: int = 60, fps: float = 25.0) -> str:
+    """MJPG clip of clip_frame(0), clip_frame(1), ... (every frame is a keyframe)"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (320, 240))
+    for i in range(num_frames):
+        writer.write(cv2.cvtColor(clip_frame(i), cv2.COLOR_RGB2BGR))
+    writer.release()
+    return path
@@ -0,0 +1,60 @@
+"""
+Tests for cross-request micro-batching
+
+Run from backend/:
+    python -m unittest discover -s tests
+"""
+
+import unittest
+
+import torch
+
+from batch_inference import InferenceBatcher
+from tests.helpers import small_model
+from vit_model import prediction_from_probabilities
+
+class InferenceBatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.model = small_model()
+        torch.manual_seed(1)
+        self.sequences = [torch.randn(length, 3, 224, 224) for length in (3, 5, 2)]
+
+    def unbatched(self, sequence: torch.Tensor) -> dict:
+        with torch.no_grad():
+            return prediction_from_probabilities(torch.softmax(self.model(sequence.unsqueeze(0)), dim=1)[0])
+
+    def test_padded_batch_matches_single_sequences(self):
+        batcher = InferenceBatcher(self.model, max_batch_size=8, max_wait_ms=1000)
+        # Queued before the thread starts, so all three go in one padded batch
+        futures = [batcher.submit(sequence) for sequence in self.sequences]
+        batcher.start()
+        try:
+            results = [future.result(timeout=60) for future in futures]
+        finally:
+            batcher.stop()
+
+        self.assertEqual(batcher.stats()['largest_batch'], len(self.sequences))
+        for sequence, result in zip(self.sequences, results):
+            expected = self.unbatched(sequence)
+            self.assertEqual(result['prediction'], expected['prediction'])
+            self.assertAlmostEqual(result['probabilities']['fake'], expected['probabilities']['fake'], places=5)
+
+    def test_stop_fails_queued_requests(self):
+        batcher = InferenceBatcher(self.model)
+        futures = [batcher.submit(sequence) for sequence in self.sequences]
+        batcher.stop()
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=1)
+
+    def test_submit_after_stop_is_rejected(self):
+        batcher = InferenceBatcher(self.model)
+        batcher.start()
+        batcher.stop()
+        with self.assertRaises(RuntimeError):
+            batcher.submit(self.sequences[0])
+        batcher._thread.join(timeout=5)
+        self.assertFalse(batcher._thread.is_alive())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+"""
+Tests for the video/face processing helpers in enhanced_processor
+
+Run from backend/:
+    python -m unittest discover -s tests
+"""
+
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from enhanced_processor import (
+    TemporalFrameSelector,
+    assess_frame_quality,
+    assess_frame_quality_batch,
+    detect_compression_artifacts,
+    detect_compression_artifacts_batch,
+    detect_faces_multi_scale,
+    detect_frontal_faces_fused,
+    detection_schedule,
+    frame_histogram,
+    get_cascade,
+    is_shot_change,
+    iter_face_crops,
+    prepare_detection_image
+)
+from tests.helpers import clip_frame, face_frame
+
+def jpeg_crop(size: int, quality: int, seed: int = 0) -> np.ndarray:
+    """A smooth synthetic crop with real 8x8 JPEG blocking"""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size] / size
+    base = np.stack([
+        np.sin(xx * rng.uniform(2, 8) + yy * rng.uniform(2, 8) + rng.uniform(0, 6)) * 80 + 128
+        for _ in range(3)
+    ], axis=-1) + rng.normal(0, 4, (size, size, 3))
+    _, encoded = cv2.imencode('.jpg', np.clip(base, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+class CompressionArtifactsTest(unittest.TestCase):
+    def test_no_crops_gives_neutral_metrics(self):
+        artifacts = detect_compression_artifacts_batch([])
+        self.assertEqual(artifacts['edge_density'], 0.0)
+        self.assertEqual(artifacts['block_artifacts'], 0.0)
+        self.assertFalse(artifacts['suspicious'])
+
+    def test_single_crop_matches_wrapper(self):
+        crop = jpeg_crop(224, 30)
+        self.assertEqual(detect_compression_artifacts(crop), detect_compression_artifacts_batch([crop]))
+
+    def test_mixed_crop_sizes(self):
+        artifacts = detect_compression_artifacts_batch([jpeg_crop(224, 30), jpeg_crop(160, 30, seed=1)])
+        self.assertGreater(artifacts['block_artifacts'], 0)
+
+    def test_blockiness_rises_with_compression(self):
+        high = detect_compression_artifacts_batch([jpeg_crop(224, 95, seed) for seed in range(6)])
+        low = detect_compression_artifacts_batch([jpeg_crop(224, 30, seed) for seed in range(6)])
+        self.assertGreater(low['blockiness'], high['blockiness'])
+
+    def test_averages_every_crop(self):
+        crops = [jpeg_crop(224, 95, seed) for seed in range(9)] + [jpeg_crop(224, 5, 9)]
+        singles = [detect_compression_artifacts(crop) for crop in crops]
+        batch = detect_compression_artifacts_batch(crops)
+        for key in ('block_artifacts', 'edge_density'):
+            self.assertAlmostEqual(batch[key], np.mean([single[key] for single in singles]), places=6)
+
+    def test_threshold_keeps_corner_sample_decisions(self):
+        # The old check flagged a crop when the mean step at block corners
+        # exceeded 20; whole-edge means run ~0.9x that on compressed crops.
+        def corner_metric(image):
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY).astype(int)
+            h, w = gray.shape
+            return np.mean([
+                abs(gray[i, j] - gray[i - 1, j]) + abs(gray[i, j] - gray[i, j - 1])
+                for i in range(8, h - 8, 8) for j in range(8, w - 8, 8)
+            ])
+
+        faces = [cv2.resize(clip_frame(i)[10:230, 50:270], (224, 224)) for i in range(0, 40, 5)]
+        decisions = {}
+        for quality in (None, 90, 50, 30, 20, 10):
+            crops = faces if quality is None else [
+                cv2.imdecode(cv2.imencode('.jpg', face, [cv2.IMWRITE_JPEG_QUALITY, quality])[1], cv2.IMREAD_COLOR)
+                for face in faces
+            ]
+            old = np.mean([corner_metric(crop) for crop in crops]) > 20
+            decisions[quality] = detect_compression_artifacts_batch(crops)['suspicious']
+            self.assertEqual(decisions[quality], old, quality)
+        self.assertFalse(decisions[None])
+        self.assertTrue(decisions[10])
+
+class FusedDetectionTest(unittest.TestCase):
+    def detect(self, raw):
+        cascade = mock.Mock()
+        cascade.detectMultiScale.return_value = np.array(raw)
+        with mock.patch('enhanced_processor.get_cascade', return_value=cascade):
+            return detect_frontal_faces_fused(np.zeros((240, 320), np.uint8), 50)
+
+    def test_each_cluster_returned_once(self):
+        # A strong cluster (passes 3, 4 and 5 neighbors) and one that only passes 3
+        strong = [[100 + i, 80, 60, 60] for i in range(10)]
+        weak = [[200, 20 + i, 50, 50] for i in range(4)]
+        faces = self.detect(strong + weak)
+        self.assertEqual(len(faces), 2)
+        self.assertEqual(len({tuple(box) for box in faces}), 2)
+
+    def test_clusters_below_lowest_threshold_dropped(self):
+        self.assertEqual(self.detect([[100 + i, 80, 60, 60] for i in range(3)]), [])
+
+def cascade_pass(gray: np.ndarray, scale_factor: float, min_neighbors: int) -> set:
+    boxes = get_cascade('frontalface_default').detectMultiScale(
+        gray, scaleFactor=scale_factor, minNeighbors=min_neighbors, minSize=(50, 50), flags=cv2.CASCADE_SCALE_IMAGE
+    )
+    return {tuple(box) for box in np.asarray(boxes).reshape(-1, 4).tolist()}
+
+def iou(a, b) -> float:
+    (ax, ay, aw, ah), (bx, by, bw, bh) = a, b
+    w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    return w * h / (aw * ah + bw * bh - w * h)
+
+class FusedCascadeTest(unittest.TestCase):
+    def frames(self):
+        return [face_frame(shift=shift, seed=seed) for seed, shift in enumerate((-20, 0, 20))]
+
+    def test_matches_per_setting_loop(self):
+        # The minNeighbors 3/4/5 passes at the fused pass's scale factor, each box once
+        for frame in self.frames():
+            gray, _ = prepare_detection_image(frame)
+            loop = set().union(*(cascade_pass(gray, 1.05, k) for k in (3, 4, 5)))
+            fused = {tuple(box) for box in np.asarray(detect_frontal_faces_fused(gray, 50)).tolist()}
+            self.assertTrue(loop)
+            self.assertEqual(fused, loop)
+
+    def test_single_threshold_matches_cascade_pass(self):
+        gray, _ = prepare_detection_image(face_frame())
+        for min_neighbors in (3, 4, 5):
+            fused = detect_frontal_faces_fused(gray, 50, min_neighbors=min_neighbors)
+            self.assertEqual({tuple(box) for box in np.asarray(fused).tolist()}, cascade_pass(gray, 1.05, min_neighbors))
+
+    def test_finds_the_nine_pass_faces(self):
+        for frame in self.frames():
+            legacy = detect_faces_multi_scale(frame, mode='legacy', max_scales=0, max_detect_width=0)
+            fused = detect_faces_multi_scale(frame, mode='fused', max_scales=0, max_detect_width=0)
+            # The nine passes also run scale factors 1.1 and 1.2: same face, boxes within a pixel or two
+            self.assertEqual(len(legacy), 1)
+            self.assertEqual(len(fused), 1)
+            self.assertGreater(iou(fused[0], legacy[0]), 0.9)
+
+class FrameQualityTest(unittest.TestCase):
+    def frames(self):
+        sharp = [face_frame(seed=seed) for seed in range(3)]
+        return sharp + [cv2.GaussianBlur(frame, (9, 9), 0) for frame in sharp]
+
+    def test_every_row_matches_per_frame(self):
+        frames = self.frames()
+        expected = [assess_frame_quality(frame) for frame in frames]
+        np.testing.assert_allclose(assess_frame_quality_batch(frames, sample_rows=None), expected, rtol=1e-4)
+
+    def test_sampled_rows_rank_sharp_above_blurred(self):
+        scores = assess_frame_quality_batch(self.frames(), sample_rows=64)
+        self.assertGreater(min(scores[:3]), max(scores[3:]))
+
+    def test_mixed_sizes(self):
+        frames = [face_frame(), face_frame(width=256, height=192)]
+        scores = assess_frame_quality_batch(frames, sample_rows=None)
+        np.testing.assert_allclose(scores, [assess_frame_quality(frame) for frame in frames], rtol=1e-4)
+
+class TemporalFrameSelectorTest(unittest.TestCase):
+    def select(self, qualities, num_frames, total_frames=None):
+        selector = TemporalFrameSelector(num_frames, total_frames or len(qualities))
+        held = 0
+        for idx, quality in enumerate(qualities):
+            selector.add(idx, np.full((2, 2), idx), quality)
+            held = max(held, len(selector.winners) + len(selector.runners_up))
+        return selector.select(), held
+
+    def test_invariants(self):
+        qualities = np.random.default_rng(0).uniform(0, 100, 90)
+        selected, held = self.select(qualities, 30)
+        indices = [idx for idx, _, _ in selected]
+        self.assertEqual(len(selected), 30)
+        self.assertEqual(indices, sorted(indices))
+        self.assertLessEqual(held, 30)
+        # One frame per bucket, the best of it
+        for idx in indices:
+            bucket = range(idx // 3 * 3, idx // 3 * 3 + 3)
+            self.assertEqual(qualities[idx], max(qualities[i] for i in bucket))
+
+    def test_empty_buckets_go_to_best_runners_up(self):
+        # Candidates only in the first half of a 12-frame video: buckets 3-5 stay empty
+        selected, held = self.select([1, 5, 3, 4, 2, 6], 6, total_frames=12)
+        self.assertEqual([idx for idx, _, _ in selected], [0, 1, 2, 3, 4, 5])
+        self.assertLessEqual(held, 6)
+        # Bucket winners 1, 3, 5 (pairs of frames), the best beaten frame (2) takes the empty slot
+        selected, held = self.select([1, 5, 3, 4, 2, 6], 4, total_frames=8)
+        self.assertEqual([idx for idx, _, _ in selected], [1, 2, 3, 5])
+        self.assertLessEqual(held, 4)
+
+def scene(seed: int) -> np.ndarray:
+    """A textured 320x240 RGB frame (template matching locks onto it)"""
+    texture = np.random.default_rng(seed).integers(0, 256, (60, 80, 3), dtype=np.uint8)
+    return cv2.resize(texture, (320, 240), interpolation=cv2.INTER_LINEAR)
+
+class FaceTrackingTest(unittest.TestCase):
+    BOXES = [(100, 80, 64, 64), (20, 20, 32, 32)]
+    # Frames sampled at 5 fps, as in the timeline
+    TIMES = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+
+    def run_tracking(self, frames, frame_times=TIMES, detect_every=5):
+        detected = []
+
+        def detect(position, frame):
+            detected.append(position)
+            return self.BOXES
+
+        stats = {'faces_detected': 0, 'faces_verified': 0}
+        crops = list(iter_face_crops(
+            frames, verify_with_eyes=False, detect_every=detect_every, stats=stats,
+            verbose=False, detect=detect, frame_times=frame_times, max_track_seconds=0.5
+        ))
+        return detected, crops, stats
+
+    def test_tracks_between_nearby_frames(self):
+        detected, crops, stats = self.run_tracking([scene(0)] * 6)
+        self.assertEqual(detected, [0, 5])
+        self.assertEqual(len(crops), 6)
+        self.assertEqual(detected, detection_schedule(6, 5, self.TIMES, max_track_seconds=0.5))
+
+    def test_tracked_frames_count_like_detection(self):
+        _, _, tracked = self.run_tracking([scene(0)] * 6)
+        _, _, detected = self.run_tracking([scene(0)] * 6, detect_every=1)
+        self.assertEqual(tracked['faces_detected'], detected['faces_detected'])
+
+    def test_time_gap_falls_back_to_detection(self):
+        # Sampled frames seconds apart: the box is not carried over the gap
+        frame_times = [0.0, 0.2, 0.4, 3.0, 3.2, 3.4]
+        detected, _, _ = self.run_tracking([scene(0)] * 6, frame_times=frame_times)
+        self.assertEqual(detected, [0, 3])
+        self.assertEqual(detected, detection_schedule(6, 5, frame_times, max_track_seconds=0.5))
+
+    def test_scene_cut_falls_back_to_detection(self):
+        # Nearby frames, but the content changes: the template no longer matches
+        frames = [scene(0)] * 3 + [scene(1)] * 3
+        detected, crops, _ = self.run_tracking(frames)
+        self.assertEqual(detected, [0, 3])
+        self.assertEqual(len(crops), 6)
+
+    def test_shot_change_falls_back_to_detection(self):
+        # Same layout in other colors: the (normalized) template still matches, the histograms don't
+        recolored = (scene(0) // 2 + 128).astype(np.uint8)
+        self.assertTrue(is_shot_change(frame_histogram(scene(0)), frame_histogram(recolored)))
+        self.assertFalse(is_shot_change(frame_histogram(scene(0)), frame_histogram(scene(0))))
+        detected, _, _ = self.run_tracking([scene(0)] * 3 + [recolored] * 3)
+        self.assertEqual(detected, [0, 3])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Tests for the end-to-end analysis in pipeline and streaming
+
+Run from backend/:
+    python -m unittest discover -s tests
+"""
+
+import contextlib
+import io
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from pipeline import process_with_vit
+from preview_store import PreviewStore
+from streaming import process_timeline
+from tests.helpers import small_model, write_face_clip
+
+class FullWindowModel:
+    """Hides frame_features so every window is encoded from scratch"""
+
+    def __init__(self, model):
+        self.model = model
+        self.device = next(model.parameters()).device
+
+    def __call__(self, x):
+        return self.model(x)
+
+class PipelineTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.video_path = write_face_clip(str(Path(cls.tmp_dir) / 'clip.avi'))
+        cls.model = small_model()
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def quiet(self, fn, *args, **kwargs):
+        # The pipeline prints every step
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn(*args, **kwargs)
+
+    def analyze(self, mode):
+        preview_store = PreviewStore(str(Path(self.tmp_dir) / f'previews_{mode}'))
+        with mock.patch('pipeline.get_preview_store', return_value=preview_store):
+            result = self.quiet(process_with_vit, self.video_path, 10, self.model, mode=mode)
+        # Every returned URL resolves once the encodes finish
+        preview_store.flush(timeout=10)
+        for url in result['faces_cropped_images']:
+            self.assertTrue((preview_store.root_dir / url.rsplit('/', 1)[1]).is_file())
+        return result
+
+    def test_result_does_not_wait_for_thumbnails(self):
+        preview_store = PreviewStore(str(Path(self.tmp_dir) / 'previews_blocked'))
+        release = threading.Event()
+        write = preview_store._write
+
+        def blocked_write(image, path):
+            release.wait(10)
+            write(image, path)
+
+        preview_store._write = blocked_write
+        with mock.patch('pipeline.get_preview_store', return_value=preview_store):
+            result = self.quiet(process_with_vit, self.video_path, 10, self.model)
+        self.assertGreater(len(result['faces_cropped_images']), 0)
+        self.assertEqual(list(preview_store.root_dir.iterdir()), [])
+
+        release.set()
+        preview_store.flush(timeout=10)
+        for url in result['faces_cropped_images']:
+            self.assertTrue((preview_store.root_dir / url.rsplit('/', 1)[1]).is_file())
+
+    def test_staged_matches_sequential(self):
+        sequential = self.analyze('sequential')
+        staged = self.analyze('staged')
+
+        # A real analysis, not the mock fallback
+        self.assertIn('Vision Transformer', sequential['detection_method'])
+        self.assertGreater(sequential['analysis']['faces_detected'], 0)
+
+        self.assertEqual(staged['output'], sequential['output'])
+        self.assertEqual(staged['analysis'], sequential['analysis'])
+        self.assertEqual(staged['faces_cropped_images'], sequential['faces_cropped_images'])
+        self.assertAlmostEqual(staged['probabilities']['fake'], sequential['probabilities']['fake'], delta=0.01)
+
+    def test_streamed_windows_match_full_windows(self):
+        def timeline(model):
+            return self.quiet(process_timeline, self.video_path, model, window=8, hop=4, sample_fps=25)['timeline']
+
+        streamed = timeline(self.model)
+        full = timeline(FullWindowModel(self.model))
+        self.assertGreater(len(streamed), 1)
+        self.assertEqual(
+            [{k: v for k, v in segment.items() if k != 'fake_probability'} for segment in streamed],
+            [{k: v for k, v in segment.items() if k != 'fake_probability'} for segment in full]
+        )
+        for ours, reference in zip(streamed, full):
+            self.assertAlmostEqual(ours['fake_probability'], reference['fake_probability'], delta=0.01)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Tests for the staged pipeline's chunked frame encoder
+
+Run from backend/:
+    python -m unittest discover -s tests
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+
+from frame_cache import FrameFeatureCache, UploadFeatures, predict_with_frame_cache
+from pipeline_stages import FrameEncoder, kept_positions
+from tests.helpers import small_model
+from vit_model import predict_with_vit
+
+def random_crops(count: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (96, 96, 3), dtype=np.uint8) for _ in range(count)]
+
+class FrameEncoderTest(unittest.TestCase):
+    def setUp(self):
+        self.model = small_model()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def encode(self, positions, crops, num_frames, features=None, frame_indices=None):
+        encoder = FrameEncoder(self.model, num_frames, max_frames=20, frame_indices=frame_indices, features=features)
+        try:
+            for position, crop in zip(positions, crops):
+                encoder.add(position, crop)
+            return encoder.predict()
+        finally:
+            encoder.close()
+
+    def assertSamePrediction(self, result, reference):
+        self.assertEqual(result['prediction'], reference['prediction'])
+        self.assertAlmostEqual(result['probabilities']['fake'], reference['probabilities']['fake'], places=5)
+
+    def test_kept_positions_match_preprocess_faces(self):
+        self.assertEqual(kept_positions(12, 20), list(range(12)))
+        self.assertEqual(kept_positions(30, 20), [int(i) for i in np.linspace(0, 29, 20, dtype=int)])
+
+    def test_matches_predict_with_vit(self):
+        crops = random_crops(12)
+        self.assertSamePrediction(self.encode(range(12), crops, 12), predict_with_vit(self.model, crops, device='cpu'))
+
+    def test_more_frames_than_the_model_uses(self):
+        # 30 frames, some without a face: the kept crops differ from the ones encoded ahead
+        positions = [i for i in range(30) if i % 7 != 3]
+        crops = random_crops(len(positions))
+        self.assertSamePrediction(self.encode(positions, crops, 30), predict_with_vit(self.model, crops, device='cpu'))
+
+    def test_reuses_cached_features(self):
+        frame_indices = list(range(0, 300, 10))
+        positions = list(range(30))
+        crops = random_crops(30)
+        features = UploadFeatures(FrameFeatureCache(self.cache_dir.name), 'upload', 'model')
+        reference = predict_with_vit(self.model, crops, device='cpu')
+
+        cold = self.encode(positions, crops, 30, features, frame_indices)
+        warm = self.encode(positions, crops, 30, features, frame_indices)
+        self.assertEqual(cold['cached_frames'], 0)
+        self.assertEqual(warm['cached_frames'], 20)
+        self.assertSamePrediction(cold, reference)
+        self.assertSamePrediction(warm, reference)
+
+        # The sequential path reads the same entries
+        sequential = predict_with_frame_cache(self.model, crops, frame_indices, features)
+        self.assertEqual(sequential['cached_frames'], 20)
+        self.assertSamePrediction(sequential, reference)
+
+    def test_changed_crop_is_encoded_again(self):
+        frame_indices = list(range(12))
+        crops = random_crops(12)
+        features = UploadFeatures(FrameFeatureCache(self.cache_dir.name), 'upload', 'model')
+        self.encode(range(12), crops, 12, features, frame_indices)
+
+        crops[5] = random_crops(1, seed=1)[0]
+        result = self.encode(range(12), crops, 12, features, frame_indices)
+        self.assertEqual(result['cached_frames'], 11)
+        self.assertSamePrediction(result, predict_with_vit(self.model, crops, device='cpu'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+"""
+Tests for batched preprocessing against the per-image torchvision transform
+
+Run from backend/:
+    python -m unittest discover -s tests
+"""
+
+import unittest
+
+import numpy as np
+import torch
+
+from preprocessing import preprocess_batch
+from vit_model import get_vit_transform
+
+class PreprocessBatchTest(unittest.TestCase):
+    def test_matches_vit_transform(self):
+        rng = np.random.default_rng(0)
+        transform = get_vit_transform()
+        # At the model size (inference path), and resized up and down
+        for height, width, max_levels in [(224, 224, 1e-3), (300, 260, 2.5), (160, 140, 2.5)]:
+            crops = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+            reference = torch.stack([transform(crop) for crop in crops])
+            # Difference in uint8 levels (std ~0.225 after normalization)
+            levels = ((reference - preprocess_batch(crops)).abs() * 0.225 * 255).max().item()
+            self.assertLessEqual(levels, max_levels, f"{height}x{width}")
+
+    def test_mixed_sizes_and_gray(self):
+        rng = np.random.default_rng(1)
+        crops = [rng.integers(0, 256, (224, 224, 3), dtype=np.uint8), rng.integers(0, 256, (100, 120), dtype=np.uint8)]
+        self.assertEqual(tuple(preprocess_batch(crops).shape), (2, 3, 224, 224))
+
+    def test_no_images(self):
+        with self.assertRaises(ValueError):
+            preprocess_batch([])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Tests for the face crop thumbnails in preview_store
+
+Run from backend/:
+    python -m unittest discover -s tests
+"""
+
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from preview_store import PreviewStore
+
+def crop(seed: int, size: int = 224) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 256, (size, size, 3), dtype=np.uint8)
+
+class PreviewStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.store = PreviewStore(self.root_dir, max_side=64)
+
+    def tearDown(self):
+        self.store.executor.shutdown(wait=True)
+        shutil.rmtree(self.root_dir)
+
+    def path(self, url: str) -> Path:
+        return Path(self.root_dir) / url.rsplit('/', 1)[1]
+
+    def test_flushed_urls_exist(self):
+        urls = self.store.save_async([crop(0), crop(1, size=100)])
+        self.store.flush(urls)
+        for url in urls:
+            with Image.open(self.path(url)) as thumbnail:
+                self.assertEqual(thumbnail.format, 'WEBP')
+                self.assertLessEqual(max(thumbnail.size), 64)
+
+    def test_repeated_crop_written_once(self):
+        urls = self.store.save_async([crop(0), crop(0)])
+        self.assertEqual(urls[0], urls[1])
+        self.assertEqual(len(self.store.pending), 1)
+        self.store.flush(urls)
+        self.assertEqual(self.store.save_async([crop(0)]), urls[:1])
+        self.assertEqual(self.store.pending, {})
+
+    def test_flush_waits_for_its_own_urls(self):
+        # Another job's slow thumbnail must neither block this flush nor be lost by it
+        release = threading.Event()
+        slow = crop(1)
+        write = self.store._write
+
+        def slow_write(image, path):
+            if image is slow:
+                release.wait(5)
+            write(image, path)
+
+        self.store._write = slow_write
+        self.store.executor.shutdown()
+        self.store.executor = ThreadPoolExecutor(max_workers=2)
+
+        other = self.store.save_async([slow])
+        ours = self.store.save_async([crop(2)])
+        self.store.flush(ours, timeout=5)
+        self.assertTrue(self.path(ours[0]).is_file())
+        self.assertFalse(self.path(other[0]).is_file())
+
+        release.set()
+        self.store.flush(other, timeout=5)
+        self.assertTrue(self.path(other[0]).is_file())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+"""
+Checks that the modules vendored into the other apps match the backend copies
+
+Run from backend/:
+    python -m unittest discover -s tests
+"""
+
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# backend module -> copies in apps built from their own directory
+VENDORED = {
+    'upload_ingest.py': ['api/upload_ingest.py'],
+    'result_cache.py': ['Django_Application/ml_app/result_cache.py'],
+    'preprocessing.py': ['Django_Application/ml_app/preprocessing.py'],
+}
+
+class VendoredModulesTest(unittest.TestCase):
+    def test_copies_identical(self):
+        for name, copies in VENDORED.items():
+            source = (REPO_ROOT / 'backend' / name).read_bytes()
+            for copy in copies:
+                path = REPO_ROOT / copy
+                if not path.exists():
+                    continue  # app not checked out
+                with self.subTest(copy=copy):
+                    self.assertEqual(path.read_bytes(), source, f"{copy} differs from backend/{name}")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Tests for single-pass frame decoding against one seek + read per index
+
+Run from backend/:
+    python -m unittest discover -s tests
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from enhanced_processor import extract_frames_smart
+from tests.helpers import write_face_clip
+from video_decoder import decode_ahead, iter_decoded_frames, read_frames
+
+def decode_with_seeks(video_path: str, frame_indices) -> dict:
+    """The original extract_frames_smart loop: one seek + read per index"""
+    cap = cv2.VideoCapture(video_path)
+    frames = {}
+    for idx in frame_indices:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+        ret, frame = cap.read()
+        if ret:
+            frames[int(idx)] = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    cap.release()
+    return frames
+
+class DecodeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.video_path = write_face_clip(os.path.join(cls.tmp_dir.name, 'clip.avi'), num_frames=60)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_strategies_match_per_index_seeks(self):
+        frame_indices = [0, 3, 4, 17, 30, 31, 58, 59]
+        reference = decode_with_seeks(self.video_path, frame_indices)
+        self.assertEqual(sorted(reference), frame_indices)
+
+        for strategy in ('scan', 'seek', 'auto'):
+            cap = cv2.VideoCapture(self.video_path)
+            try:
+                frames = dict(iter_decoded_frames(cap, frame_indices, strategy, self.video_path, min_seek_gap=4))
+            finally:
+                cap.release()
+            self.assertEqual(sorted(frames), frame_indices, strategy)
+            for idx in frame_indices:
+                np.testing.assert_array_equal(frames[idx], reference[idx], err_msg=f"{strategy} frame {idx}")
+
+    def test_unordered_and_repeated_indices(self):
+        frames = read_frames(self.video_path, [40, 2, 40, 10])
+        self.assertEqual([idx for idx, _ in frames], [2, 10, 40])
+
+    def test_indices_past_the_end_are_skipped(self):
+        self.assertEqual([idx for idx, _ in read_frames(self.video_path, [59, 80])], [59])
+
+    def test_decode_ahead_keeps_order(self):
+        self.assertEqual(list(decode_ahead(iter(range(20)), max_items=3)), list(range(20)))
+
+    def test_failed_extraction_joins_the_producer(self):
+        threads = threading.active_count()
+        error = None
+        with mock.patch('enhanced_processor.assess_frame_quality_batch', side_effect=RuntimeError('scoring failed')):
+            try:
+                extract_frames_smart(self.video_path, 10, prefetch=2)
+            except RuntimeError as e:
+                error = e  # its traceback keeps the generator alive, only an explicit close stops the thread
+        self.assertIsNotNone(error)
+        self.assertEqual(threading.active_count(), threads)
+
+if __name__ == '__main__':
+    unittest.main()
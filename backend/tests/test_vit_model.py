@@ -0,0 +1,170 @@
+"""
+Parity tests for the ViT inference paths (batched frames, fused attention,
+torch DCT features, int8 and exported graphs) against their references
+
+Run from backend/:
+    python -m unittest discover -s tests
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+import torch
+
+from tests.helpers import small_model
+from vit_model import (
+    FrequencyAnalyzer,
+    MultiHeadAttention,
+    OnnxViT,
+    TorchScriptViT,
+    ViTDeepfakeDetector,
+    export_vit_model,
+    load_exported_vit,
+    quantize_vit_model
+)
+
+HAS_ONNX = importlib.util.find_spec('onnx') is not None and importlib.util.find_spec('onnxruntime') is not None
+
+def forward_per_timestep(model: ViTDeepfakeDetector, x: torch.Tensor) -> torch.Tensor:
+    """The original forward pass: one (B, C, H, W) slice per timestep through the spatial transformer"""
+    frame_features = torch.stack([model.encode_frames(x[:, t])[0] for t in range(x.shape[1])], dim=1)
+
+    temporal_features, _ = model.temporal_attn(frame_features)
+    freq_features = model.freq_analyzer(x)
+    fused = model.fusion(torch.cat([temporal_features, freq_features], dim=-1))
+    return model.head(model.norm(fused.mean(dim=1)))
+
+def dct_basis(n: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix (what scipy.fftpack.dct(norm='ortho') applies)"""
+    k, i = np.mgrid[0:n, 0:n]
+    basis = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+def reference_dct_features(images: torch.Tensor) -> torch.Tensor:
+    """The original per-frame DCT features (before the fc layers): cv2 gray, 2-D DCT, 16 coefficients per block"""
+    B, T = images.shape[:2]
+    features = torch.zeros(B, T, 128)
+    for b in range(B):
+        for t in range(T):
+            img = images[b, t].numpy().transpose(1, 2, 0)
+            gray = cv2.cvtColor((img * 255).astype(np.uint8), cv2.COLOR_RGB2GRAY).astype(np.float64)
+            dct = dct_basis(gray.shape[0]) @ gray @ dct_basis(gray.shape[1]).T
+
+            blocks = [
+                dct[i:i+8, j:j+8].flatten()[:16]
+                for i in range(0, gray.shape[0], 32)
+                for j in range(0, gray.shape[1], 32)
+            ]
+            frame = np.concatenate(blocks)[:128]
+            features[b, t, :len(frame)] = torch.from_numpy(frame.astype(np.float32))
+    return features
+
+def torch_dct_features(analyzer: FrequencyAnalyzer, images: torch.Tensor) -> torch.Tensor:
+    """FrequencyAnalyzer.forward without the fc layers"""
+    captured = {}
+    handle = analyzer.fc.register_forward_hook(lambda module, inputs, output: captured.setdefault('x', inputs[0]))
+    analyzer(images)
+    handle.remove()
+    return captured['x']
+
+class ViTParityTest(unittest.TestCase):
+    def setUp(self):
+        self.model = small_model()
+        torch.manual_seed(1)
+        self.x = torch.randn(2, 6, 3, 224, 224)
+
+    def test_batched_frames_match_per_timestep(self):
+        with torch.no_grad():
+            reference = forward_per_timestep(self.model, self.x)
+            for frame_batch_size in (None, 4):
+                self.model.frame_batch_size = frame_batch_size
+                torch.testing.assert_close(self.model(self.x), reference, rtol=1e-4, atol=1e-5)
+
+    def test_fused_attention_matches_explicit(self):
+        attention = MultiHeadAttention(embed_dim=64, num_heads=4).eval()
+        tokens = torch.randn(6, 197, 64)
+        with torch.no_grad():
+            explicit, _ = attention(tokens, return_attention=True)
+            fused, _ = attention(tokens)
+            torch.testing.assert_close(fused, explicit, rtol=1e-4, atol=1e-4)
+
+            explicit_logits, _ = self.model(self.x, return_attention=True)
+            torch.testing.assert_close(self.model(self.x), explicit_logits, rtol=1e-4, atol=1e-4)
+
+    def test_frequency_features_match_reference_dct(self):
+        analyzer = FrequencyAnalyzer(embed_dim=64).eval()
+        # 100x100 and 60x60 frames have partial edge blocks
+        for size in (224, 100, 60):
+            images = torch.randn(1, 3, 3, size, size)
+            with torch.no_grad():
+                torch.testing.assert_close(
+                    torch_dct_features(analyzer, images), reference_dct_features(images), rtol=1e-4, atol=1e-2
+                )
+
+class QuantizedViTTest(unittest.TestCase):
+    def test_int8_matches_fp32(self):
+        model = small_model()
+        quantized = quantize_vit_model(model)
+        self.assertTrue(any(
+            isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in quantized.modules()
+        ))
+
+        torch.manual_seed(2)
+        x = torch.randn(8, 4, 3, 224, 224)
+        with torch.no_grad():
+            reference = model(x)
+            logits = quantized(x)
+        # Measured drift is ~0.003 against a ~0.1 margin between the two logits
+        torch.testing.assert_close(logits, reference, rtol=0, atol=0.01)
+        self.assertTrue(torch.equal(logits.argmax(dim=1), reference.argmax(dim=1)))
+
+class ExportedViTTest(unittest.TestCase):
+    def setUp(self):
+        self.model = small_model()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.model_path = os.path.join(self.tmp_dir.name, 'model.pt')
+        torch.manual_seed(1)
+        self.x = torch.randn(2, 5, 3, 224, 224)
+        # Second sequence padded after 3 frames
+        self.frame_mask = torch.tensor([[True] * 5, [True] * 3 + [False] * 2])
+
+    def check_runner(self, runner):
+        with torch.no_grad():
+            torch.testing.assert_close(runner(self.x), self.model(self.x), rtol=1e-4, atol=1e-4)
+            torch.testing.assert_close(
+                runner(self.x, frame_mask=self.frame_mask),
+                self.model(self.x, frame_mask=self.frame_mask),
+                rtol=1e-4, atol=1e-4
+            )
+
+    def test_torchscript_matches_eager(self):
+        paths = export_vit_model(self.model, self.model_path, engines=('torchscript',), num_frames=4)
+        self.check_runner(TorchScriptViT(paths['torchscript']))
+
+    @unittest.skipUnless(HAS_ONNX, "needs onnx and onnxruntime")
+    def test_onnx_matches_eager(self):
+        paths = export_vit_model(self.model, self.model_path, engines=('onnx',), num_frames=4)
+        self.check_runner(OnnxViT(paths['onnx'], num_threads=1))
+
+    def test_onnx_without_onnxruntime_keeps_fp32(self):
+        torch.save(self.model.state_dict(), self.model_path)
+        with open(os.path.join(self.tmp_dir.name, 'model.onnx'), 'wb'):
+            pass
+        # A None entry makes `import onnxruntime` raise ImportError
+        with mock.patch.dict('sys.modules', {'onnxruntime': None}):
+            with self.assertRaisesRegex(ImportError, 'pip install onnxruntime'):
+                OnnxViT(os.path.join(self.tmp_dir.name, 'model.onnx'))
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertIsNone(load_exported_vit(self.model_path, 'onnx'))
+
+if __name__ == '__main__':
+    unittest.main()
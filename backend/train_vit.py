@@ -29,8 +29,9 @@ import numpy as np
 from tqdm import tqdm
 import argparse
 
-from vit_model import ViTDeepfakeDetector, get_vit_transform
-from enhanced_processor import extract_frames_smart, detect_and_crop_faces
+from vit_model import ViTDeepfakeDetector
+from preprocessing import preprocess_batch
+from face_cache import extract_face_sequence, build_face_cache, FaceCropDataset
 
 class DeepfakeVideoDataset(Dataset):
     """Dataset for loading deepfake videos"""
@@ -38,7 +39,8 @@ class DeepfakeVideoDataset(Dataset):
     def __init__(self, data_dir, num_frames=20, transform=None):
         self.data_dir = Path(data_dir)
         self.num_frames = num_frames
-        self.transform = transform or get_vit_transform()
+        # Per-image transform; None = batched preprocessing (as get_vit_transform)
+        self.transform = transform
         
         # Find all videos
         self.videos = []
@@ -68,29 +70,16 @@ class DeepfakeVideoDataset(Dataset):
         label = self.labels[idx]
         
         try:
-            # Extract frames
-            frames, _ = extract_frames_smart(video_path, num_frames=self.num_frames)
-            
-            # Detect faces
-            face_crops, _ = detect_and_crop_faces(frames, verify_with_eyes=False)
-            
-            # Limit to num_frames
-            if len(face_crops) > self.num_frames:
-                indices = np.linspace(0, len(face_crops) - 1, self.num_frames, dtype=int)
-                face_crops = [face_crops[i] for i in indices]
-            elif len(face_crops) < self.num_frames:
-                # Pad with last frame
-                while len(face_crops) < self.num_frames:
-                    face_crops.append(face_crops[-1])
+            # Extract frames and detect faces (sampled/padded to num_frames)
+            face_crops = extract_face_sequence(video_path, self.num_frames)
+            if len(face_crops) == 0:
+                raise ValueError("no face detected")
             
             # Transform
-            tensors = []
-            for face in face_crops:
-                tensor = self.transform(face)
-                tensors.append(tensor)
-            
-            # Stack into sequence
-            sequence = torch.stack(tensors)  # (T, C, H, W)
+            if self.transform is None:
+                sequence = preprocess_batch(face_crops, size=224)  # (T, C, H, W)
+            else:
+                sequence = torch.stack([self.transform(face) for face in face_crops])
             
             return sequence, label
             
@@ -189,6 +178,18 @@ def main(args):
         num_frames=args.num_frames
     )
     
+    # Decode + detect faces once, then train from the memory-mapped crops
+    if not args.no_cache:
+        print("\nBuilding face caches...")
+        train_dataset = FaceCropDataset(build_face_cache(
+            train_dataset.videos, train_dataset.labels,
+            Path(args.cache_dir) / 'train', num_frames=args.num_frames
+        ))
+        val_dataset = FaceCropDataset(build_face_cache(
+            val_dataset.videos, val_dataset.labels,
+            Path(args.cache_dir) / 'val', num_frames=args.num_frames
+        ))
+    
     # Create dataloaders
     train_loader = DataLoader(
         train_dataset,
@@ -297,6 +298,10 @@ if __name__ == '__main__':
                         help='Validation data directory')
     parser.add_argument('--num_frames', type=int, default=20,
                         help='Number of frames to extract per video')
+    parser.add_argument('--cache_dir', type=str, default='data/face_cache',
+                        help='Preprocessed face-crop cache (rebuilt when videos or parameters change)')
+    parser.add_argument('--no_cache', action='store_true',
+                        help='Decode and detect faces on the fly every epoch')
     
     # Training
     parser.add_argument('--epochs', type=int, default=50,
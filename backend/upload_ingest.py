@@ -0,0 +1,174 @@
+"""
+Streaming Upload Ingestion
+Moves an upload to disk in chunks and rejects bad files as early as possible.
+
+Includes:
+1. Container sniffing from the first chunk (magic bytes), before anything is written
+2. Size cap enforced while streaming (partial files are removed)
+3. SHA-256 computed on the way (no second read)
+4. ASGI middleware rejecting oversized request bodies before they are parsed
+
+Vendored: the same file is backend/upload_ingest.py and api/upload_ingest.py,
+as each app is built from its own directory. Change both copies together
+(backend/tests/test_vendored.py checks they stay identical).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import BinaryIO, NamedTuple, Optional
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Multipart boundaries and the other form fields on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadRejected(Exception):
+    """Upload refused; status_code is the HTTP status to answer with"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+class IngestedUpload(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    container: str
+
+def sniff_container(head: bytes) -> Optional[str]:
+    """
+    Identify a video container from its first bytes
+
+    Returns:
+        Container name, None if the bytes don't look like a supported video
+    """
+    if len(head) >= 12 and head[4:8] in (b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip'):
+        return 'mp4'  # ISO BMFF: mp4, mov, m4v, 3gp
+    if head.startswith(b'\x1a\x45\xdf\xa3'):
+        return 'matroska'  # mkv, webm
+    if head.startswith(b'RIFF') and head[8:12] == b'AVI ':
+        return 'avi'
+    if head.startswith(b'FLV'):
+        return 'flv'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if head.startswith(b'\x30\x26\xb2\x75\x8e\x66\xcf\x11'):
+        return 'asf'  # wmv
+    if head.startswith(b'\x00\x00\x01\xba'):
+        return 'mpeg-ps'
+    if len(head) > 188 and head[0] == 0x47 and head[188] == 0x47:
+        return 'mpeg-ts'
+    return None
+
+def ingest_upload(
+    fileobj: BinaryIO,
+    dest_dir: str,
+    suffix: str = '',
+    max_bytes: int = 100 * 1024 * 1024,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> IngestedUpload:
+    """
+    Stream an upload into dest_dir
+
+    Args:
+        fileobj: Readable binary file (e.g. UploadFile.file)
+        dest_dir: Directory for the stored file
+        suffix: File extension to keep (e.g. '.mp4')
+        max_bytes: Largest accepted upload
+        chunk_size: Bytes read per step
+
+    Returns:
+        IngestedUpload(path, sha256, size, container)
+
+    Raises:
+        UploadRejected: 400 empty, 413 too large, 415 not a recognized video container
+    """
+    head = fileobj.read(chunk_size)
+    if not head:
+        raise UploadRejected(400, "Uploaded file is empty")
+
+    container = sniff_container(head)
+    if container is None:
+        raise UploadRejected(415, "File is not a recognized video container")
+
+    digest = hashlib.sha256()
+    size = 0
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=dest_dir)
+    try:
+        with temp_file:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(413, f"File exceeds the {max_bytes // (1024 * 1024)} MB limit")
+                digest.update(chunk)
+                temp_file.write(chunk)
+                chunk = fileobj.read(chunk_size)
+    except BaseException:
+        os.unlink(temp_file.name)
+        raise
+
+    return IngestedUpload(temp_file.name, digest.hexdigest(), size, container)
+
+class UploadSizeLimitMiddleware:
+    """
+    Pure ASGI middleware: answer 413 as soon as a request body is too large
+
+    Requests announcing a larger Content-Length are refused before any body is
+    read; chunked bodies are cut off once they pass the limit, so the multipart
+    parser never spools them to disk.
+    """
+
+    def __init__(self, app, max_body_bytes: int):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"Request body exceeds {self.max_body_bytes} bytes"}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in ('POST', 'PUT', 'PATCH'):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope['headers']).get(b'content-length')
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {'type': 'http.disconnect'}
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_body_bytes:
+                    rejected = True
+                    if not response_started:
+                        await self._reject(send)
+                    return {'type': 'http.disconnect'}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # The app may still try to answer after we did; drop it
+            if rejected and not response_started:
+                return
+            response_started = True
+            await send(message)
+
+        await self.app(scope, limited_receive, guarded_send)
@@ -0,0 +1,225 @@
+"""
+Frame Decoding Engine
+Reads a sparse set of frame indices from a video without per-index seeking.
+
+Includes:
+1. Forward scan - one pass with grab(), retrieve() only on requested frames
+2. Keyframe-aligned seeks - seek only across large gaps, grab() forward otherwise
+3. Per-container strategy selection
+4. Decoding ahead of the consumer in a background thread (bounded queue)
+"""
+
+import cv2
+import numpy as np
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+import os
+import queue
+import threading
+
+# Codecs where every frame is a keyframe, so seeking never decodes extra frames
+INTRA_ONLY_CODECS = {'MJPG', 'MJPA', 'JPEG', 'PNG ', 'RAWV', 'I420', 'IYUV', 'YUY2', 'FFV1', 'HFYU'}
+
+# Containers whose seek index is missing or unreliable in the FFmpeg backend
+SCAN_ONLY_CONTAINERS = {'.webm', '.mkv', '.flv', '.gif', '.wmv', '.3gp'}
+
+DECODE_STRATEGIES = ('auto', 'scan', 'seek')
+
+# End-of-stream marker passed through decode_ahead's queue
+_END = object()
+
+def get_codec_fourcc(cap: cv2.VideoCapture) -> str:
+    """Return the stream codec as a four character string (upper case)"""
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    return ''.join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).upper()
+
+def estimate_seek_gap(cap: cv2.VideoCapture) -> int:
+    """
+    Estimate the frame gap above which a seek is cheaper than grabbing forward
+
+    A seek makes the decoder restart at the previous keyframe, so it only pays
+    off when the gap is larger than a typical GOP (about two seconds of video).
+
+    Args:
+        cap: Opened video capture
+
+    Returns:
+        Minimum gap (in frames) that justifies a seek
+    """
+    if get_codec_fourcc(cap) in INTRA_ONLY_CODECS:
+        return 1
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps <= 0 or np.isnan(fps):
+        fps = 30.0
+
+    return max(12, int(round(fps * 2)))
+
+def select_decode_strategy(
+    cap: cv2.VideoCapture,
+    frame_indices: Sequence[int],
+    video_path: Optional[str] = None
+) -> str:
+    """
+    Pick a decode strategy for the container and the requested indices
+
+    Args:
+        cap: Opened video capture
+        frame_indices: Sorted frame indices that will be requested
+        video_path: Path to the video (used to detect the container)
+
+    Returns:
+        'scan' or 'seek'
+    """
+    if len(frame_indices) == 0:
+        return 'scan'
+
+    if video_path and os.path.splitext(video_path)[1].lower() in SCAN_ONLY_CONTAINERS:
+        return 'scan'
+
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if total_frames <= 0:
+        # Frame count is unknown, so seek targets can't be trusted
+        return 'scan'
+
+    if get_codec_fourcc(cap) in INTRA_ONLY_CODECS:
+        return 'seek'
+
+    # Dense sampling: every seek would land in the GOP we are already decoding
+    span = frame_indices[-1] - frame_indices[0] + 1
+    avg_gap = span / len(frame_indices)
+    if avg_gap <= estimate_seek_gap(cap):
+        return 'scan'
+
+    return 'seek'
+
+def iter_decoded_frames(
+    cap: cv2.VideoCapture,
+    frame_indices: Sequence[int],
+    strategy: str = 'auto',
+    video_path: Optional[str] = None,
+    min_seek_gap: Optional[int] = None
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Decode the requested frames in a single forward pass
+
+    Frames that are not requested are only grabbed (demuxed and decoded but
+    never converted), requested frames are retrieved and converted to RGB.
+
+    Args:
+        cap: Opened video capture positioned at the first frame
+        frame_indices: Frame indices to decode
+        strategy: 'auto', 'scan' or 'seek'
+        video_path: Path to the video (used by 'auto')
+        min_seek_gap: Gap above which 'seek' jumps instead of grabbing forward
+
+    Yields:
+        (frame index, RGB frame) in increasing index order
+    """
+    if strategy not in DECODE_STRATEGIES:
+        raise ValueError(f"Unknown decode strategy: {strategy}")
+
+    targets = sorted(set(int(i) for i in frame_indices))
+    if not targets:
+        return
+
+    if strategy == 'auto':
+        strategy = select_decode_strategy(cap, targets, video_path)
+
+    if min_seek_gap is None:
+        min_seek_gap = estimate_seek_gap(cap)
+
+    position = 0  # index of the frame the next grab() will return
+
+    for target in targets:
+        if target < position:
+            continue
+
+        if strategy == 'seek' and target - position > min_seek_gap:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            position = target
+
+        # Grab forward without converting skipped frames
+        while position < target:
+            if not cap.grab():
+                return
+            position += 1
+
+        if not cap.grab():
+            return
+        position += 1
+
+        ret, frame = cap.retrieve()
+        if not ret:
+            continue
+
+        yield target, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+def read_frames(
+    video_path: str,
+    frame_indices: Sequence[int],
+    strategy: str = 'auto'
+) -> List[Tuple[int, np.ndarray]]:
+    """
+    Decode the requested frames of a video file
+
+    Args:
+        video_path: Path to video
+        frame_indices: Frame indices to decode
+        strategy: 'auto', 'scan' or 'seek'
+
+    Returns:
+        List of (frame index, RGB frame)
+    """
+    cap = cv2.VideoCapture(video_path)
+
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {video_path}")
+
+    try:
+        return list(iter_decoded_frames(cap, frame_indices, strategy, video_path))
+    finally:
+        cap.release()
+
+def decode_ahead(iterable: Iterable, max_items: int = 8) -> Iterator:
+    """
+    Produce items of `iterable` in a background thread, at most `max_items` ahead
+
+    Decoding releases the GIL, so the next frames are decoded while the
+    consumer works on the current one. Exceptions raised by the producer are
+    re-raised in the consumer; closing the generator early stops the producer.
+    """
+    items = queue.Queue(maxsize=max(1, max_items))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_END, None))
+        except BaseException as e:
+            put((_END, e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item, error = items.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
@@ -12,9 +12,13 @@ import torch.nn as nn
 import torch.nn.functional as F
 from torchvision import transforms
 import numpy as np
-from typing import Tuple, List, Dict
-import cv2
-from scipy import fftpack
+from typing import Tuple, List, Dict, Optional
+import inspect
+import math
+import os
+from abc import ABC, abstractmethod
+
+from preprocessing import preprocess_batch
 
 class PatchEmbedding(nn.Module):
     """Split image into patches and embed them"""
@@ -52,7 +56,12 @@ class MultiHeadAttention(nn.Module):
         self.proj = nn.Linear(embed_dim, embed_dim)
         self.dropout = nn.Dropout(dropout)
         
-    def forward(self, x):
+    def forward(self, x, return_attention=False):
+        """
+        Returns:
+            x: (B, N, C)
+            attn: (B, num_heads, N, N) attention weights, None unless return_attention
+        """
         B, N, C = x.shape
         
         # Generate Q, K, V
@@ -60,13 +69,21 @@ class MultiHeadAttention(nn.Module):
         qkv = qkv.permute(2, 0, 3, 1, 4)  # (3, B, num_heads, N, head_dim)
         q, k, v = qkv[0], qkv[1], qkv[2]
         
-        # Attention
-        attn = (q @ k.transpose(-2, -1)) * (self.head_dim ** -0.5)
-        attn = F.softmax(attn, dim=-1)
-        attn = self.dropout(attn)
+        if return_attention:
+            # Explicit path: the (N, N) weights are needed for visualization
+            attn = (q @ k.transpose(-2, -1)) * (self.head_dim ** -0.5)
+            attn = F.softmax(attn, dim=-1)
+            attn = self.dropout(attn)
+            x = attn @ v
+        else:
+            # Fused kernel, the attention matrix is never materialized
+            attn = None
+            x = F.scaled_dot_product_attention(
+                q, k, v, dropout_p=self.dropout.p if self.training else 0.0
+            )
         
         # Combine heads
-        x = (attn @ v).transpose(1, 2).reshape(B, N, C)
+        x = x.transpose(1, 2).reshape(B, N, C)
         x = self.proj(x)
         x = self.dropout(x)
         
@@ -89,9 +106,9 @@ class TransformerBlock(nn.Module):
             nn.Dropout(dropout)
         )
         
-    def forward(self, x):
+    def forward(self, x, return_attention=False):
         # Attention with residual
-        attn_out, attn_weights = self.attn(self.norm1(x))
+        attn_out, attn_weights = self.attn(self.norm1(x), return_attention)
         x = x + attn_out
         
         # MLP with residual
@@ -106,62 +123,151 @@ class TemporalAttention(nn.Module):
         self.attention = nn.MultiheadAttention(embed_dim, num_heads, batch_first=True)
         self.norm = nn.LayerNorm(embed_dim)
         
-    def forward(self, x):
+    def forward(self, x, key_padding_mask=None):
         # x: (B, T, embed_dim) where T is number of frames
-        attn_out, attn_weights = self.attention(x, x, x)
+        # key_padding_mask: (B, T), True for padding frames to ignore
+        attn_out, attn_weights = self.self_attention(x, key_padding_mask)
         x = self.norm(x + attn_out)
         return x, attn_weights
+    
+    def self_attention(self, x, key_padding_mask=None):
+        """
+        Same result as self.attention(x, x, x, key_padding_mask=...), spelled out
+        with the module's own weights so traced and ONNX graphs keep T dynamic
+        
+        Returns:
+            out: (B, T, embed_dim)
+            weights: (B, T, T) attention averaged over heads
+        """
+        B, T, C = x.shape
+        num_heads = self.attention.num_heads
+        head_dim = C // num_heads
+        
+        qkv = F.linear(x, self.attention.in_proj_weight, self.attention.in_proj_bias)
+        qkv = qkv.reshape(B, T, 3, num_heads, head_dim).permute(2, 0, 3, 1, 4)
+        q, k, v = qkv[0], qkv[1], qkv[2]  # (B, heads, T, head_dim)
+        
+        scores = (q @ k.transpose(-2, -1)) * (head_dim ** -0.5)
+        if key_padding_mask is not None:
+            scores = scores.masked_fill(key_padding_mask[:, None, None, :], float('-inf'))
+        weights = F.softmax(scores, dim=-1)
+        
+        out = (weights @ v).transpose(1, 2).reshape(B, T, C)
+        out = self.attention.out_proj(out)
+        return out, weights.mean(dim=1)
+
+def dct_matrix(n: int) -> torch.Tensor:
+    """Orthonormal DCT-II matrix, same convention as scipy.fftpack.dct(norm='ortho')"""
+    k = torch.arange(n, dtype=torch.float64).unsqueeze(1)
+    i = torch.arange(n, dtype=torch.float64).unsqueeze(0)
+    basis = torch.cos(math.pi * (2 * i + 1) * k / (2 * n)) * math.sqrt(2.0 / n)
+    basis[0] /= math.sqrt(2.0)
+    return basis.float()
+
+def frequency_basis(
+    height: int,
+    width: int,
+    num_features: int = 128,
+    block_stride: int = 32,
+    block_size: int = 8,
+    coeffs_per_block: int = 16
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Precompute what FrequencyAnalyzer needs from the 2-D DCT of a frame
+    
+    Features are the first `coeffs_per_block` coefficients (row-major) of the
+    8x8 block at every 32 pixel step, truncated to `num_features`. Only the
+    DCT rows/columns covered by those blocks are ever computed.
+    
+    Returns:
+        row_basis: (R, height) DCT rows that are needed
+        col_basis: (K, width) DCT columns that are needed
+        feature_index: (<= num_features,) flat indices into the (R, K) result
+    """
+    positions = []
+    for i in range(0, height, block_stride):
+        for j in range(0, width, block_stride):
+            block_h = min(block_size, height - i)
+            block_w = min(block_size, width - j)
+            for n in range(min(coeffs_per_block, block_h * block_w)):
+                positions.append((i + n // block_w, j + n % block_w))
+    positions = positions[:num_features]
+    
+    rows = sorted({r for r, _ in positions})
+    cols = sorted({c for _, c in positions})
+    row_pos = {r: n for n, r in enumerate(rows)}
+    col_pos = {c: n for n, c in enumerate(cols)}
+    
+    row_basis = dct_matrix(height)[rows]
+    col_basis = dct_matrix(width)[cols]
+    feature_index = torch.tensor(
+        [row_pos[r] * len(cols) + col_pos[c] for r, c in positions],
+        dtype=torch.long
+    )
+    
+    return row_basis, col_basis, feature_index
 
 class FrequencyAnalyzer(nn.Module):
     """Analyze frequency domain for deepfake artifacts"""
-    def __init__(self, embed_dim=768):
+    def __init__(self, embed_dim=768, img_size=224, num_features=128):
         super().__init__()
+        self.img_size = img_size
+        self.num_features = num_features
+        
+        row_basis, col_basis, feature_index = frequency_basis(img_size, img_size, num_features)
+        self.register_buffer('row_basis', row_basis, persistent=False)
+        self.register_buffer('col_basis', col_basis, persistent=False)
+        self.register_buffer('feature_index', feature_index, persistent=False)
+        
         self.fc = nn.Sequential(
-            nn.Linear(128, 256),
+            nn.Linear(num_features, 256),
             nn.ReLU(),
             nn.Dropout(0.2),
             nn.Linear(256, embed_dim)
         )
         
+    def to_gray(self, images):
+        """
+        uint8 grayscale exactly as cv2.cvtColor((img * 255).astype(np.uint8), RGB2GRAY)
+        
+        Args:
+            images: (..., C, H, W) float frames
+        
+        Returns:
+            (..., H, W) float32 grayscale in [0, 255]
+        """
+        # float -> uint8 cast: truncate, then wrap like numpy does on CPU
+        pixels = (images * 255).to(torch.int64).remainder(256)
+        
+        if images.shape[-3] != 3:
+            return pixels[..., 0, :, :].float()
+        
+        # cv2 fixed-point BT.601 luma (15-bit coefficients, rounded)
+        r, g, b = pixels[..., 0, :, :], pixels[..., 1, :, :], pixels[..., 2, :, :]
+        gray = (r * 9798 + g * 19235 + b * 3735 + 16384) >> 15
+        return gray.float()
+        
     def forward(self, images):
         """Extract frequency features from images"""
         B, T, C, H, W = images.shape
-        freq_features = []
-        
-        for b in range(B):
-            frame_features = []
-            for t in range(T):
-                img = images[b, t].cpu().numpy().transpose(1, 2, 0)
-                
-                # Convert to grayscale
-                if img.shape[2] == 3:
-                    gray = cv2.cvtColor((img * 255).astype(np.uint8), cv2.COLOR_RGB2GRAY)
-                else:
-                    gray = (img[:, :, 0] * 255).astype(np.uint8)
-                
-                # DCT (Discrete Cosine Transform)
-                dct = fftpack.dct(fftpack.dct(gray.T, norm='ortho').T, norm='ortho')
-                
-                # Extract low-frequency components (8x8 blocks)
-                dct_features = []
-                for i in range(0, gray.shape[0], 32):
-                    for j in range(0, gray.shape[1], 32):
-                        block = dct[i:i+8, j:j+8]
-                        if block.size > 0:
-                            dct_features.append(block.flatten()[:16])
-                
-                if dct_features:
-                    dct_features = np.concatenate(dct_features)[:128]
-                    if len(dct_features) < 128:
-                        dct_features = np.pad(dct_features, (0, 128 - len(dct_features)))
-                else:
-                    dct_features = np.zeros(128)
-                
-                frame_features.append(torch.tensor(dct_features, dtype=torch.float32))
-            
-            freq_features.append(torch.stack(frame_features))
         
-        freq_features = torch.stack(freq_features).to(images.device)
+        if (H, W) == (self.img_size, self.img_size):
+            row_basis, col_basis, feature_index = self.row_basis, self.col_basis, self.feature_index
+        else:
+            row_basis, col_basis, feature_index = (
+                t.to(images.device) for t in frequency_basis(H, W, self.num_features)
+            )
+        
+        gray = self.to_gray(images)  # (B, T, H, W)
+        
+        # Needed rows/columns of the orthonormal 2-D DCT-II: D_H @ gray @ D_W^T
+        dct = row_basis @ gray @ col_basis.transpose(0, 1)  # (B, T, R, K)
+        
+        # Gather the low-frequency coefficients of each 8x8 block
+        freq_features = dct.flatten(2).index_select(-1, feature_index)
+        if freq_features.shape[-1] < self.num_features:
+            freq_features = F.pad(freq_features, (0, self.num_features - freq_features.shape[-1]))
+        
         freq_features = self.fc(freq_features)
         
         return freq_features
@@ -188,10 +294,14 @@ class ViTDeepfakeDetector(nn.Module):
         depth=12,
         num_heads=12,
         mlp_ratio=4.0,
-        dropout=0.1
+        dropout=0.1,
+        frame_batch_size=None
     ):
         super().__init__()
         
+        # Max frames encoded per spatial pass (None = all B*T frames at once)
+        self.frame_batch_size = frame_batch_size
+        
         # Patch embedding
         self.patch_embed = PatchEmbedding(img_size, patch_size, in_channels, embed_dim)
         num_patches = self.patch_embed.n_patches
@@ -211,7 +321,7 @@ class ViTDeepfakeDetector(nn.Module):
         self.temporal_attn = TemporalAttention(embed_dim, num_heads=8)
         
         # Frequency analyzer
-        self.freq_analyzer = FrequencyAnalyzer(embed_dim)
+        self.freq_analyzer = FrequencyAnalyzer(embed_dim, img_size)
         
         # Fusion layer
         self.fusion = nn.Sequential(
@@ -236,82 +346,374 @@ class ViTDeepfakeDetector(nn.Module):
         nn.init.trunc_normal_(self.pos_embed, std=0.02)
         nn.init.trunc_normal_(self.cls_token, std=0.02)
         
-    def forward(self, x, return_attention=False):
+    def encode_frames(self, frames, return_attention=False):
         """
+        Run the spatial ViT on a flat batch of frames
+        
+        Args:
+            frames: (N, C, H, W) - Frames from all sequences, N = B*T
+            return_attention: Compute the last block's attention weights
+                (all blocks use fused attention otherwise)
+        
+        Returns:
+            cls_tokens: (N, embed_dim)
+            attn: Attention weights of the last block (N, heads, tokens, tokens), or None
+        """
+        N = frames.shape[0]
+        
+        # Patch embedding
+        patches = self.patch_embed(frames)  # (N, num_patches, embed_dim)
+        
+        # Add class token
+        cls_tokens = self.cls_token.expand(N, -1, -1)
+        patches = torch.cat([cls_tokens, patches], dim=1)
+        
+        # Add position embedding
+        patches = patches + self.pos_embed
+        patches = self.pos_drop(patches)
+        
+        # Transformer blocks
+        last = len(self.blocks) - 1
+        for i, block in enumerate(self.blocks):
+            patches, attn = block(patches, return_attention and i == last)
+        
+        # Extract class token
+        return patches[:, 0], attn
+        
+    def frame_features(self, x, frame_mask=None, return_attention=False):
+        """
+        Per-frame output of the spatial transformer stack (class token)
+        
+        Each frame is encoded independently, so features can be cached per
+        frame (see frame_cache.py) and combined later with score_frames.
+        
         Args:
             x: (B, T, C, H, W) - Batch of video sequences
-            return_attention: Whether to return attention maps
+            frame_mask: (B, T) bool, False for padding frames (never encoded)
+            return_attention: Also return the last block's attention per chunk
         
         Returns:
-            logits: (B, num_classes)
-            attention_maps: Dict of attention visualizations (if return_attention=True)
+            frame_features: (B, T, embed_dim), zeros at padding frames
+            spatial_attentions: List of (N, heads, tokens, tokens), empty unless return_attention
         """
         B, T, C, H, W = x.shape
         
-        # Process each frame through ViT
+        # Encode all B*T frames together instead of one timestep at a time
+        frames = x.reshape(B * T, C, H, W)
+        if frame_mask is not None:
+            # Padding frames are never encoded
+            frames = frames[frame_mask.reshape(-1)]
+        N = frames.shape[0]
+        if self.frame_batch_size and self.frame_batch_size < N:
+            chunks = frames.split(self.frame_batch_size)
+        else:
+            # One pass; also keeps traced/exported graphs free of a fixed frame count
+            chunks = [frames]
+        
         frame_features = []
         spatial_attentions = []
         
-        for t in range(T):
-            frame = x[:, t]  # (B, C, H, W)
-            
-            # Patch embedding
-            patches = self.patch_embed(frame)  # (B, num_patches, embed_dim)
-            
-            # Add class token
-            cls_tokens = self.cls_token.expand(B, -1, -1)
-            patches = torch.cat([cls_tokens, patches], dim=1)
-            
-            # Add position embedding
-            patches = patches + self.pos_embed
-            patches = self.pos_drop(patches)
+        for chunk in chunks:
+            cls_token, attn = self.encode_frames(chunk, return_attention)
+            frame_features.append(cls_token)
             
-            # Transformer blocks
-            for block in self.blocks:
-                patches, attn = block(patches)
-                
             # Store attention from last block
             if return_attention:
                 spatial_attentions.append(attn)
-            
-            # Extract class token
-            cls_token = patches[:, 0]
-            frame_features.append(cls_token)
         
-        # Stack frame features
-        frame_features = torch.stack(frame_features, dim=1)  # (B, T, embed_dim)
+        frame_features = torch.cat(frame_features)
+        if frame_mask is not None:
+            padded = frame_features.new_zeros(B * T, frame_features.shape[-1])
+            padded[frame_mask.reshape(-1)] = frame_features
+            frame_features = padded
+        frame_features = frame_features.reshape(B, T, -1)  # (B, T, embed_dim)
         
-        # Temporal attention
-        temporal_features, temporal_attn = self.temporal_attn(frame_features)
+        return frame_features, spatial_attentions
+    
+    def score_frames(self, frame_features, freq_features, frame_mask=None):
+        """
+        Temporal attention, fusion, pooling and head on per-frame features
         
-        # Frequency analysis
-        freq_features = self.freq_analyzer(x)
+        Args:
+            frame_features: (B, T, embed_dim) from frame_features
+            freq_features: (B, T, embed_dim) from freq_analyzer
+            frame_mask: (B, T) bool, False for padding frames
+        
+        Returns:
+            logits: (B, num_classes)
+            temporal_attn: (B, T, T)
+        """
+        # Temporal attention
+        key_padding_mask = ~frame_mask if frame_mask is not None else None
+        temporal_features, temporal_attn = self.temporal_attn(frame_features, key_padding_mask)
         
         # Fusion
         combined = torch.cat([temporal_features, freq_features], dim=-1)
         fused = self.fusion(combined)
         
-        # Average pooling over time
-        pooled = fused.mean(dim=1)  # (B, embed_dim)
+        # Average pooling over time (valid frames only)
+        if frame_mask is not None:
+            weights = frame_mask.unsqueeze(-1).to(fused.dtype)
+            pooled = (fused * weights).sum(dim=1) / weights.sum(dim=1)
+        else:
+            pooled = fused.mean(dim=1)  # (B, embed_dim)
         
         # Classification
         pooled = self.norm(pooled)
         logits = self.head(pooled)
         
+        return logits, temporal_attn
+        
+    def forward(self, x, return_attention=False, frame_mask=None):
+        """
+        Args:
+            x: (B, T, C, H, W) - Batch of video sequences
+            return_attention: Whether to return attention maps
+            frame_mask: (B, T) bool, False for padding frames when sequences of
+                different lengths share a batch (None = all frames valid)
+        
+        Returns:
+            logits: (B, num_classes)
+            attention_maps: Dict of attention visualizations (if return_attention=True)
+        """
+        if return_attention and frame_mask is not None:
+            raise ValueError("return_attention is not supported with frame_mask")
+        
+        B, T = x.shape[:2]
+        
+        frame_features, spatial_attentions = self.frame_features(x, frame_mask, return_attention)
+        
+        # Frequency analysis
+        freq_features = self.freq_analyzer(x)
+        
+        logits, temporal_attn = self.score_frames(frame_features, freq_features, frame_mask)
+        
         if return_attention:
+            # One (B, heads, tokens, tokens) map per frame, as before
+            spatial = torch.cat(spatial_attentions)
+            spatial = spatial.reshape(B, T, *spatial.shape[1:])
             attention_maps = {
-                'spatial': spatial_attentions,
+                'spatial': list(spatial.unbind(dim=1)),
                 'temporal': temporal_attn
             }
             return logits, attention_maps
         
         return logits
 
-def load_vit_model(model_path: str = None, device: str = None) -> ViTDeepfakeDetector:
-    """Load Vision Transformer model"""
+# Inference engines selectable with VIT_ENGINE
+VIT_ENGINES = ('fp32', 'int8', 'torchscript', 'onnx')
+
+# Exported graphs live next to their checkpoint: models/model_best.pt -> models/model_best.onnx
+EXPORT_SUFFIXES = {'torchscript': '.torchscript', 'onnx': '.onnx'}
+
+def quantize_vit_model(model: ViTDeepfakeDetector) -> ViTDeepfakeDetector:
+    """
+    Dynamic int8 quantization of the Linear layers (CPU only)
+    
+    Covers the transformer blocks (attention qkv/proj + MLP), fusion and the
+    classification head. Patch embedding, temporal attention and the
+    frequency analyzer stay fp32.
+    """
+    qconfig = torch.ao.quantization.default_dynamic_qconfig
+    return torch.ao.quantization.quantize_dynamic(
+        model,
+        qconfig_spec={'blocks': qconfig, 'fusion': qconfig, 'head': qconfig},
+        dtype=torch.qint8
+    )
+
+def exported_model_path(model_path: str, engine: str) -> str:
+    """Path of the exported graph of a checkpoint for 'torchscript' or 'onnx'"""
+    return os.path.splitext(model_path)[0] + EXPORT_SUFFIXES[engine]
+
+def export_vit_model(
+    model: ViTDeepfakeDetector,
+    model_path: str,
+    engines: Tuple[str, ...] = ('torchscript', 'onnx'),
+    num_frames: int = 20,
+    opset_version: int = 17
+) -> Dict[str, str]:
+    """
+    Export an fp32 model to TorchScript and/or ONNX next to its checkpoint
+    
+    Graphs take frames (B, T, C, H, W) with B and T dynamic and return logits
+    (B, num_classes); frame_mask and attention maps are eager-only.
+    
+    Args:
+        model: Loaded fp32 model
+        model_path: Checkpoint the model was loaded from (names the outputs)
+        engines: Formats to write
+        num_frames: Frames of the example sequence used for tracing
+        opset_version: ONNX opset
+    
+    Returns:
+        Engine -> written path
+    """
+    img_size = model.patch_embed.img_size
+    example = torch.rand(1, num_frames, 3, img_size, img_size)
+    
+    # Frame chunking is a memory knob of the eager model, graphs encode all frames at once
+    frame_batch_size, model.frame_batch_size = model.frame_batch_size, None
+    model = model.cpu().eval()
+    
+    paths = {}
+    try:
+        with torch.no_grad():
+            if 'torchscript' in engines:
+                paths['torchscript'] = exported_model_path(model_path, 'torchscript')
+                traced = torch.jit.trace(model, example, check_trace=False)
+                torch.jit.save(traced, paths['torchscript'])
+            
+            if 'onnx' in engines:
+                paths['onnx'] = exported_model_path(model_path, 'onnx')
+                kwargs = {}
+                # torch >= 2.5 defaults to the dynamo exporter; the graph is written for the tracing one
+                if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+                    kwargs['dynamo'] = False
+                torch.onnx.export(
+                    model,
+                    (example,),
+                    paths['onnx'],
+                    input_names=['frames'],
+                    output_names=['logits'],
+                    dynamic_axes={'frames': {0: 'batch', 1: 'frames'}, 'logits': {0: 'batch'}},
+                    opset_version=opset_version,
+                    **kwargs
+                )
+    finally:
+        model.frame_batch_size = frame_batch_size
+    
+    return paths
+
+class ExportedViT(ABC):
+    """
+    Exported graph behind the ViTDeepfakeDetector call interface (CPU, logits only)
+    
+    Graphs have no frame_mask input, so a padded batch is run as groups of
+    sequences with the same number of valid frames (padding at the end).
+    """
+    device = torch.device('cpu')
+    
+    @abstractmethod
+    def run(self, x: torch.Tensor) -> torch.Tensor:
+        """Logits of an unpadded (B, T, C, H, W) batch"""
+    
+    def eval(self):
+        return self
+    
+    def __call__(self, x, return_attention=False, frame_mask=None):
+        if return_attention:
+            raise ValueError("Attention maps need the eager model (VIT_ENGINE=fp32)")
+        
+        x = x.cpu()
+        if frame_mask is None:
+            return self.run(x)
+        
+        lengths = frame_mask.cpu().sum(dim=1)
+        logits = None
+        for length in lengths.unique().tolist():
+            rows = (lengths == length).nonzero().squeeze(1)
+            group_logits = self.run(x[rows, :length])
+            if logits is None:
+                logits = group_logits.new_empty(len(x), group_logits.shape[1])
+            logits[rows] = group_logits
+        return logits
+
+class TorchScriptViT(ExportedViT):
+    """Traced graph run by the TorchScript interpreter"""
+    def __init__(self, path: str):
+        self.module = torch.jit.load(path, map_location='cpu')
+        self.module.eval()
+    
+    def run(self, x):
+        return self.module(x)
+
+class OnnxViT(ExportedViT):
+    """ONNX graph run by ONNX Runtime (CPU execution provider)"""
+    def __init__(self, path: str, num_threads: int = None):
+        # Optional dependency, only needed for VIT_ENGINE=onnx
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX graphs need onnxruntime (pip install onnxruntime==1.17.1)") from e
+        
+        options = ort.SessionOptions()
+        # Stay within the worker's thread budget (see JOB_THREADS_PER_WORKER)
+        options.intra_op_num_threads = num_threads or torch.get_num_threads()
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+    
+    def run(self, x):
+        logits, = self.session.run(['logits'], {'frames': x.contiguous().numpy()})
+        return torch.from_numpy(logits)
+
+def load_exported_vit(model_path: str, engine: str) -> Optional[ExportedViT]:
+    """
+    Load the exported graph of a checkpoint
+    
+    Returns:
+        The runner, None (with a warning) when there is no up-to-date export
+    """
+    if not model_path or not os.path.exists(model_path):
+        print(f"⚠ {engine} engine needs MODEL_PATH and an exported graph, keeping fp32")
+        return None
+    
+    path = exported_model_path(model_path, engine)
+    if not os.path.exists(path):
+        print(f"⚠ No exported graph at {path} (run export_vit.py), keeping fp32")
+        return None
+    if os.stat(path).st_mtime_ns < os.stat(model_path).st_mtime_ns:
+        print(f"⚠ {path} is older than {model_path} (re-run export_vit.py), keeping fp32")
+        return None
+    
+    try:
+        runner = TorchScriptViT(path) if engine == 'torchscript' else OnnxViT(path)
+    except Exception as e:
+        print(f"⚠ Could not load {path}: {e}")
+        return None
+    
+    print(f"✓ Loaded {engine} graph from {path}")
+    return runner
+
+def load_vit_model(
+    model_path: str = None,
+    device: str = None,
+    frame_batch_size: int = None,
+    engine: str = None
+) -> ViTDeepfakeDetector:
+    """
+    Load Vision Transformer model
+    
+    Args:
+        model_path: Path to checkpoint
+        device: Device to load on
+        frame_batch_size: Max frames per spatial pass (bounds peak memory).
+            Defaults to the VIT_FRAME_BATCH_SIZE environment variable, unset = no cap.
+        engine: 'fp32', 'int8' (dynamic quantization), or 'torchscript' / 'onnx'
+            (graphs written by export_vit.py, returned as an ExportedViT).
+            Everything but fp32 is CPU only.
+            Defaults to the VIT_ENGINE environment variable, unset = fp32.
+    """
+    if frame_batch_size is None:
+        frame_batch_size = int(os.getenv("VIT_FRAME_BATCH_SIZE", "0")) or None
+    
+    if engine is None:
+        engine = os.getenv("VIT_ENGINE", "fp32")
+    if engine not in VIT_ENGINES:
+        raise ValueError(f"Unknown VIT_ENGINE {engine!r}, expected one of {VIT_ENGINES}")
+    
     if device is None:
         device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     
+    if engine != 'fp32' and torch.device(device).type != 'cpu':
+        print(f"⚠ {engine} engine is CPU only, keeping fp32 on {device}")
+        engine = 'fp32'
+    
+    # Exported graphs skip building the eager model altogether
+    if engine in EXPORT_SUFFIXES:
+        exported = load_exported_vit(model_path, engine)
+        if exported is not None:
+            return exported
+        engine = 'fp32'
+    
     # Initialize model with smaller size for faster inference
     model = ViTDeepfakeDetector(
         img_size=224,
@@ -319,7 +721,8 @@ def load_vit_model(model_path: str = None, device: str = None) -> ViTDeepfakeDet
         embed_dim=384,  # Smaller than standard ViT
         depth=6,        # Fewer layers
         num_heads=6,
-        dropout=0.1
+        dropout=0.1,
+        frame_batch_size=frame_batch_size
     )
     
     # Try to load weights
@@ -341,6 +744,10 @@ def load_vit_model(model_path: str = None, device: str = None) -> ViTDeepfakeDet
     model = model.to(device)
     model.eval()
     
+    if engine == 'int8':
+        model = quantize_vit_model(model)
+        print("✓ Using dynamic int8 quantized Linear layers")
+    
     return model
 
 def get_vit_transform():
@@ -355,6 +762,40 @@ def get_vit_transform():
         )
     ])
 
+def preprocess_faces(face_images: List[np.ndarray], max_frames: int = 20) -> torch.Tensor:
+    """
+    Turn face crops into a model input sequence
+    
+    Args:
+        face_images: List of face images
+        max_frames: Frames kept (evenly spaced) for efficiency
+    
+    Returns:
+        (T, C, H, W) normalized tensor (preprocessing.preprocess_batch,
+        same result as get_vit_transform image by image)
+    """
+    if not face_images:
+        raise ValueError("No face images provided")
+    
+    # Limit to max_frames for efficiency
+    if len(face_images) > max_frames:
+        indices = np.linspace(0, len(face_images) - 1, max_frames, dtype=int)
+        face_images = [face_images[i] for i in indices]
+    
+    return preprocess_batch(face_images, size=224)
+
+def prediction_from_probabilities(probabilities: torch.Tensor) -> Dict:
+    """Result dict for one sequence from its (num_classes,) probabilities"""
+    prediction = torch.argmax(probabilities).item()
+    return {
+        'prediction': prediction,
+        'confidence': probabilities[prediction].item(),
+        'probabilities': {
+            'real': probabilities[0].item(),
+            'fake': probabilities[1].item()
+        }
+    }
+
 def predict_with_vit(
     model: ViTDeepfakeDetector,
     face_images: List[np.ndarray],
@@ -376,37 +817,8 @@ def predict_with_vit(
     if device is None:
         device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     
-    if not face_images:
-        raise ValueError("No face images provided")
-    
-    # Limit to 20 frames for efficiency
-    if len(face_images) > 20:
-        indices = np.linspace(0, len(face_images) - 1, 20, dtype=int)
-        face_images = [face_images[i] for i in indices]
-    
-    # Preprocess images
-    transform = get_vit_transform()
-    processed_images = []
-    
-    for img in face_images:
-        try:
-            # Convert to RGB if needed
-            if len(img.shape) == 2:
-                img = np.stack([img] * 3, axis=-1)
-            elif img.shape[2] == 4:
-                img = img[:, :, :3]
-            
-            tensor = transform(img)
-            processed_images.append(tensor)
-        except Exception as e:
-            print(f"Error processing image: {e}")
-            continue
-    
-    if not processed_images:
-        raise ValueError("Failed to process any images")
-    
     # Stack into batch
-    sequence = torch.stack(processed_images).unsqueeze(0)  # (1, T, C, H, W)
+    sequence = preprocess_faces(face_images).unsqueeze(0)  # (1, T, C, H, W)
     sequence = sequence.to(device)
     
     # Run inference
@@ -418,21 +830,10 @@ def predict_with_vit(
             attention_maps = None
         
         probabilities = torch.softmax(logits, dim=1)
-        prediction = torch.argmax(probabilities, dim=1).item()
-        confidence = probabilities[0, prediction].item()
     
-    result = {
-        'prediction': prediction,
-        'confidence': confidence,
-        'probabilities': {
-            'real': probabilities[0, 0].item(),
-            'fake': probabilities[0, 1].item()
-        }
-    }
+    result = prediction_from_probabilities(probabilities[0])
     
     if attention_maps:
         result['attention_maps'] = attention_maps
     
     return result
-
-import os